@@ -0,0 +1,141 @@
+"""Benchmark building entities from rows and binding them on insert.
+
+The "legacy" mode reproduces the baseline: a connection with `detect_types`, whose
+converters run eagerly on every column, `sqlite3.Row` rows expanded as keywords
+into dict-backed dataclasses, and `dataclasses.asdict()` on insert. The "slots"
+mode uses the lazy row factory and tuple binding of `unverdad.data.schema`.
+Both read the same database file. Time and memory are measured in separate passes,
+since `tracemalloc` slows allocation down more than the code it measures, and each
+mode runs in a fresh interpreter so peak RSS is comparable.
+
+    pdm run bench-rows --rows 50000
+"""
+
+import argparse
+import dataclasses
+import pathlib
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+
+from unverdad.data import database, schema, tables, views
+
+MODES = ["legacy", "slots"]
+
+
+def __legacy(cls: type) -> type:
+    """Dict-backed, mutable copy of the dataclass `cls`."""
+    return dataclasses.make_dataclass(
+        f"Legacy{cls.__name__}",
+        [(x.name, x.type) for x in dataclasses.fields(cls)],
+    )
+
+
+def __legacy_connection(db: pathlib.Path) -> sqlite3.Connection:
+    """Connection converting values like the baseline did, before any were read."""
+    sqlite3.register_converter("bool", lambda b: False if int(b) == 0 else True)
+    sqlite3.register_converter("path", lambda b: pathlib.Path(b.decode()))
+    sqlite3.register_converter("uuid", lambda b: uuid.UUID(bytes=b))
+    con = sqlite3.connect(
+        db,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        factory=database.UnverdadConnection,
+    )
+    con.row_factory = sqlite3.Row
+    schema.init_functions(con)
+    return con
+
+
+def __populate(con, rows: int, mode: str) -> float:
+    game = tables.game.GameEntity(
+        game_id=schema.new_uuid(),
+        name="BENCH GAME",
+        game_path=pathlib.Path("bench/root"),
+        game_path_offset=pathlib.Path("offset"),
+        mods_home_relative_path=pathlib.Path("~mods"),
+    )
+    tables.game.insert_one(con, game)
+    mods = [
+        tables.mod.ModEntity(
+            mod_id=schema.new_uuid(), game_id=game.game_id, name=f"mod {i}"
+        )
+        for i in range(rows)
+    ]
+    start = time.perf_counter_ns()
+    if mode == "legacy":
+        with con:
+            con.executemany(
+                """
+                INSERT INTO mod (mod_id, gb_mod_id, game_id, name, enabled)
+                VALUES (:mod_id, :gb_mod_id, :game_id, :name, :enabled)
+                """,
+                [dataclasses.asdict(x) for x in mods],
+            )
+    else:
+        tables.mod.insert_many(con, mods)
+    return (time.perf_counter_ns() - start) / rows
+
+
+def __select(db: pathlib.Path, con, mode: str) -> Callable[[], list]:
+    """Return a function reading every row of m_mod as entities in `mode`."""
+    if mode == "legacy":
+        legacy_con = __legacy_connection(db)
+        legacy = __legacy(views.ModView)
+        return lambda: [
+            legacy(**row) for row in legacy_con.execute("SELECT * FROM m_mod")
+        ]
+    return lambda: list(schema.select_as(con, views.ModView, "SELECT * FROM m_mod"))
+
+
+def run_mode(rows: int, mode: str) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = pathlib.Path(tmp) / "db"
+        con = database._reset_db(db_path=db)
+        insert_ns = __populate(con, rows, mode)
+        select = __select(db, con, mode)
+        assert len(select()) == rows
+        start = time.perf_counter_ns()
+        result = select()
+        select_ns = (time.perf_counter_ns() - start) / rows
+        del result
+        tracemalloc.start()
+        result = select()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        con.close()
+    return {
+        "insert ns/row": insert_ns,
+        "select ns/row": select_ns,
+        "select bytes/row": peak / rows,
+        "max rss MiB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        for key, value in run_mode(args.rows, args.mode).items():
+            print(f"{key}\t{value:.1f}")
+        return
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "tests.bench_rows", f"--rows={args.rows}"]
+            + [f"--mode={mode}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        print(f"[{mode}]\n{output}")
+
+
+if __name__ == "__main__":
+    main()
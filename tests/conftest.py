@@ -0,0 +1,38 @@
+"""Fixtures shared by the tests.
+
+Every home directory is moved to a temporary directory before `unverdad` is
+imported, so tests never touch the config or database of the user.
+"""
+
+import os
+import pathlib
+import tempfile
+
+__home = tempfile.mkdtemp(prefix="unverdad-tests-")
+for var in ["XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_STATE_HOME"]:
+    os.environ[var] = os.path.join(__home, var.lower())
+
+import pytest  # noqa: E402
+
+from unverdad import config  # noqa: E402
+from unverdad.data import database  # noqa: E402
+
+
+@pytest.fixture
+def game_dir(tmp_path: pathlib.Path, monkeypatch) -> pathlib.Path:
+    """Empty install of the default game under `tmp_path`."""
+    path = tmp_path / "game"
+    (path / "RED" / "Content" / "Paks").mkdir(parents=True)
+    monkeypatch.setattr(config.SETTINGS.games.guilty_gear_strive, "game_path", path)
+    return path
+
+
+@pytest.fixture
+def con(tmp_path: pathlib.Path, monkeypatch, game_dir) -> database.UnverdadConnection:
+    """Fresh database file, with `mods_home` and the cache under `tmp_path`."""
+    monkeypatch.setattr(config.SETTINGS, "mods_home", tmp_path / "mods")
+    monkeypatch.setattr(config.SETTINGS.cache, "path", tmp_path / "cache")
+    monkeypatch.setattr(config, "DB_FILE", tmp_path / "db")
+    con = database._reset_db(db_path=tmp_path / "db")
+    yield con
+    con.close()
@@ -71,7 +71,12 @@ def print_table(con, table_name: str):
 
 
 def print_all(con: sqlite3.Connection):
-    for t in [x.TABLE_NAME for x in tables.as_list()] + ["v_mod", "v_pak"]:
+    for t in [x.TABLE_NAME for x in tables.as_list()] + [
+        "v_mod",
+        "v_pak",
+        "m_mod",
+        "m_pak",
+    ]:
         print_table(con, t)
         print("")
     print("---===---===---\n")
@@ -0,0 +1,17 @@
+import os
+import pathlib
+import struct
+
+from unverdad import pakfile
+
+
+def write_pak(path: pathlib.Path, size: int) -> tuple[pathlib.Path, pathlib.Path]:
+    """Write a pak of `size` bytes with a valid footer, and its sig; return both."""
+    index = os.urandom(100)
+    body = os.urandom(size - len(index) - 200)
+    footer = b"\0" * 17 + struct.pack("<Iiqq", pakfile.MAGIC, 11, len(body), len(index))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body + index + footer.ljust(200, b"\0"))
+    sig = path.with_suffix(".sig")
+    sig.write_bytes(b"sig")
+    return path, sig
@@ -0,0 +1,29 @@
+import pathlib
+
+from tests.data import fixture_files
+from unverdad import api, config, errors, garbage, run
+
+
+def test_gc_removes_untracked_cache_files(tmp_path: pathlib.Path, monkeypatch, con):
+    monkeypatch.setattr(config.SETTINGS.cache, "enabled", True)
+    library = api.Library()
+    for name in ["modA", "modB"]:
+        pair = fixture_files.write_pak(tmp_path / "src" / name / f"{name}.pak", 1000)
+        result = library.import_mod(name, [pair], enabled=True)
+        assert not errors.is_error(result)
+    assert not errors.is_error(library.install())
+    cache_dir = config.SETTINGS.cache.path
+    cached = sorted(x for x in cache_dir.rglob("*") if x.is_file())
+    assert len(cached) == 4
+    leftover = cached[0].with_name(f".{cached[0].name}.0123")
+    leftover.write_bytes(b"interrupted copy")
+    stray = cache_dir / "deleted mod" / "gone.pak"
+    stray.parent.mkdir()
+    stray.write_bytes(b"deleted pak")
+
+    found = garbage.find_cache(con, cache_dir)
+    assert sorted(path for path, _ in found.files) == sorted([leftover, stray])
+
+    assert run.parse_args(args=["gc"]).code == 0
+    assert sorted(x for x in cache_dir.rglob("*") if x.is_file()) == cached
+    assert not stray.parent.exists()
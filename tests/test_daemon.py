@@ -0,0 +1,50 @@
+import asyncio
+import pathlib
+import threading
+import time
+
+import pytest
+
+from tests.data import fixture_files
+from unverdad import api, daemon, errors, run
+from unverdad.data import database
+
+
+@pytest.fixture
+def server(tmp_path: pathlib.Path, con) -> pathlib.Path:
+    """Daemon serving the database of `con` from a thread; return its socket."""
+    con.close()
+    database._reset_db(db_path=tmp_path / "db", check_same_thread=False)
+    path = tmp_path / "socket"
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=[daemon.Server(parser=run.build_parser(), path=path).serve()],
+    )
+    thread.start()
+    while not daemon.is_running(path):
+        time.sleep(0.01)
+    yield path
+    daemon.call(path, "shutdown")
+    thread.join()
+
+
+def test_sees_and_survives_writes_of_other_processes(
+    tmp_path: pathlib.Path, server: pathlib.Path, capsys
+):
+    pair = fixture_files.write_pak(tmp_path / "src" / "modA.pak", 1000)
+    assert not errors.is_error(api.Library().import_mod("modA", [pair], enabled=True))
+    argv = ["mod-registry", "-n", "modA", "--fields", "enabled"]
+    assert daemon.forward(server, argv) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "True"
+
+    other = database._open(tmp_path / "db")
+    with other:
+        other.execute("UPDATE mod SET enabled = 0 WHERE name = 'modA'")
+    assert daemon.forward(server, argv) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "False"
+
+    assert daemon.forward(server, [*argv, "--enable"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "True"
+    row = other.execute("SELECT enabled FROM mod WHERE name = 'modA'").fetchone()
+    assert row["enabled"] == 1
+    other.close()
@@ -0,0 +1,44 @@
+import pathlib
+
+from tests.data import fixture_files
+from unverdad import api, errors, run
+from unverdad.data import database
+
+
+def test_only_measures_when_asked(tmp_path: pathlib.Path, con, capsys):
+    pair = fixture_files.write_pak(tmp_path / "src" / "modA.pak", 2048)
+    assert not errors.is_error(api.Library().import_mod("modA", [pair]))
+    with con:
+        con.execute("DELETE FROM pak_size")
+    assert run.parse_args(args=["du"]).code == 0
+    assert con.execute("SELECT COUNT(*) FROM pak_size").fetchone()[0] == 0
+    capsys.readouterr()
+
+    assert run.parse_args(args=["du", "--measure"]).code == 0
+    assert con.execute("SELECT COUNT(*) FROM pak_size").fetchone()[0] == 1
+    assert capsys.readouterr().out.splitlines()[-1].startswith("2.")
+
+
+def test_measures_with_pooled_connections(tmp_path: pathlib.Path, monkeypatch, con):
+    library = api.Library()
+    for name in ["modA", "modB", "modC"]:
+        pair = fixture_files.write_pak(tmp_path / "src" / f"{name}.pak", 1000)
+        assert not errors.is_error(library.import_mod(name, [pair]))
+    with con:
+        con.execute("DELETE FROM pak_size")
+    borrowed = []
+    connection = database.ConnectionPool.connection
+
+    def spy(pool: database.ConnectionPool):
+        borrowed.append(pool)
+        return connection(pool)
+
+    monkeypatch.setattr(database.ConnectionPool, "connection", spy)
+
+    assert library.pool is database.get_pool(con) is not None
+    assert library.backfill_sizes(workers=2) == 3
+    assert len(borrowed) == 2
+    assert con.execute("SELECT COUNT(*) FROM pak_size").fetchone()[0] == 3
+    other = database._open(tmp_path / "db")
+    assert other.execute("SELECT COUNT(*) FROM pak_size").fetchone()[0] == 3
+    other.close()
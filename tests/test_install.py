@@ -0,0 +1,36 @@
+import errno
+import os
+import pathlib
+
+from tests.data import fixture_files
+from unverdad import api, errors, transfer
+
+
+def test_failed_copy_records_what_is_in_place(tmp_path: pathlib.Path, monkeypatch, con):
+    library = api.Library()
+    for name in ["modA", "modB"]:
+        pair = fixture_files.write_pak(tmp_path / "src" / f"{name}.pak", 1000)
+        result = library.import_mod(name, [pair], enabled=True)
+        assert not errors.is_error(result)
+    copy_file = transfer.copy_file
+
+    def full_disk(src: pathlib.Path, dst: pathlib.Path, *args) -> int:
+        if src.name == "modB.pak":
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        return copy_file(src, dst, *args)
+
+    monkeypatch.setattr(transfer, "copy_file", full_disk)
+
+    result = library.install()
+    assert errors.is_error(result)
+    assert "modB.pak" in result.message
+    assert "3 of 4 files" in result.message
+    recorded = sorted(
+        pathlib.Path(row["path"]).name
+        for row in con.execute("SELECT path FROM install_manifest")
+    )
+    assert recorded == ["modA.pak", "modA.sig", "modB.sig"]
+    assert all(
+        pathlib.Path(row["path"]).is_file()
+        for row in con.execute("SELECT path FROM install_manifest")
+    )
@@ -0,0 +1,949 @@
+"""Python interface to the mod library, independent of the command line.
+
+>>> from unverdad import api
+>>> library = api.Library()
+>>> for mod in library.query_mods(enabled=True):
+...     print(mod.name)
+
+Methods never print; expected failures, such as an unknown game, are returned as
+an `unverdad.errors.ErrorResult` instead of raised. A `Library` holds no state
+besides its connection and settings, so one instance can serve any number of calls.
+Methods which write to the files of a game hold its `unverdad.locks.game_lock()`,
+and `Library.install()` also holds `unverdad.locks.cache_lock()` while it copies
+from the cache tier.
+"""
+
+import concurrent.futures
+import contextlib
+import dataclasses
+import logging
+import pathlib
+import shutil
+import sqlite3
+import time
+import uuid
+import zipfile
+from typing import Callable, Iterable, Optional, Sequence
+
+from unverdad import (
+    cache,
+    config,
+    delta,
+    errors,
+    locks,
+    pakfile,
+    plan,
+    scanner,
+    transfer,
+)
+from unverdad.config import user_config
+from unverdad.data import builders, database, schema, tables, views
+
+logger = logging.getLogger(__name__)
+
+
+def _measure(
+    pak_id: uuid.UUID,
+    pak_path: pathlib.Path,
+    sig_path: pathlib.Path,
+) -> tables.pak_size.PakSizeEntity:
+    """Stat the files of a pak."""
+    pak_stat, sig_stat = pak_path.stat(), sig_path.stat()
+    return tables.pak_size.PakSizeEntity(
+        pak_id=pak_id,
+        pak_size=pak_stat.st_size,
+        pak_mtime_ns=pak_stat.st_mtime_ns,
+        sig_size=sig_stat.st_size,
+        sig_mtime_ns=sig_stat.st_mtime_ns,
+    )
+
+
+class Library:
+    """Operations on imported mods and their installation."""
+
+    def __init__(
+        self,
+        con: Optional[sqlite3.Connection] = None,
+        settings: Optional[user_config.SettingsSpec] = None,
+        lock_timeout: float = locks.TIMEOUT,
+    ):
+        """
+        Args:
+            con: Database connection to use. Default is `database.get_db()`.
+            settings: Settings to use. Default is `config.SETTINGS`.
+            lock_timeout: Seconds to wait for the lock of a game.
+        """
+        self.con = con if con is not None else database.get_db()
+        self.pool = database.get_pool(self.con)
+        """Connections for worker threads, if `con` is the default file database."""
+        self.settings = settings if settings is not None else config.SETTINGS
+        self.lock_timeout = lock_timeout
+
+    def find_game(
+        self,
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+    ) -> errors.Result[tables.game.GameEntity]:
+        """Return the game by id, by name, or the default game, in that order."""
+        sql_statement = "SELECT * FROM game WHERE "
+        if game_id:
+            sql_statement += "game_id = :game"
+        elif game_name or self.settings.default_game.enabled:
+            sql_statement += "match_name(name, :game)"
+        else:
+            return errors.ErrorResult("specify a game or enable default_game")
+        key = game_id or game_name or self.settings.default_game.name
+        game = next(
+            schema.select_as(
+                self.con, tables.game.GameEntity, sql_statement, {"game": key}
+            ),
+            None,
+        )
+        if game is None:
+            return errors.ErrorResult(f"could not find game '{key}'")
+        return errors.GoodResult(game)
+
+    def query_mods(
+        self,
+        game_id: Optional[uuid.UUID] = None,
+        mod_ids: Iterable[uuid.UUID] = (),
+        mod_names: Iterable[str] = (),
+        categories: Iterable[str] = (),
+        enabled: Optional[bool] = None,
+    ) -> list[tables.mod.ModEntity]:
+        """Return mods matching every given filter.
+
+        Args:
+            game_id: Only mods of this game.
+            mod_ids: Only mods with one of these ids or one of `mod_names`.
+            mod_names: Only mods with one of these names or one of `mod_ids`.
+            categories: Only mods in one of these categories or their descendants.
+            enabled: Only mods which are enabled or disabled, respectively.
+        """
+        conditions = builders.ConditionBuilderBranch(
+            combine_operator=builders.LogicalOperator.AND,
+        )
+        and_conds = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.AND
+        )
+        if game_id is not None:
+            and_conds._add_param(column_name="game_id", column_value=game_id)
+        if enabled is not None:
+            and_conds._add_param(column_name="enabled", column_value=enabled)
+        or_conds = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.OR
+        )
+        for mod_id in mod_ids:
+            or_conds._add_param(column_name="mod_id", column_value=mod_id)
+        for mod_name in mod_names:
+            or_conds._add_param(column_name="name", column_value=mod_name)
+        category_conds = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.OR
+        )
+        for category in categories:
+            category_conds._add_param_expr(
+                column_name="mod_id",
+                expression=tables.category_closure.MOD_FILTER_EXPR,
+                param_value=category,
+            )
+        sql_statement = "SELECT * FROM mod"
+        if conditions:
+            sql_statement += f" WHERE {conditions.render()}"
+        return list(
+            schema.select_as(
+                self.con, tables.mod.ModEntity, sql_statement, conditions.params()
+            )
+        )
+
+    def set_enabled(
+        self,
+        mod_ids: Iterable[uuid.UUID],
+        enabled: bool,
+    ) -> errors.Result[int]:
+        """Enable or disable each mod in `mod_ids`; return the number of rows changed."""
+        with self.con:
+            cursor = self.con.executemany(
+                "UPDATE mod SET enabled = :enabled WHERE mod_id = :mod_id",
+                [{"mod_id": x, "enabled": enabled} for x in mod_ids],
+            )
+        return errors.GoodResult(cursor.rowcount)
+
+    def import_mod(
+        self,
+        name: str,
+        files: Sequence[tuple[pathlib.Path, pathlib.Path]],
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+        enabled: bool = False,
+        gb_mod_id: Optional[str] = None,
+    ) -> errors.Result[tables.mod.ModEntity]:
+        """Copy `.pak` and `.sig` pairs into `mods_home` and register them as a mod.
+
+        Args:
+            name: Name of the new mod; it must not be in use.
+            files: Each `(pak_path, sig_path)` pair of the mod.
+            game_id: See `find_game()`.
+            game_name: See `find_game()`.
+            enabled: Whether the new mod starts enabled.
+            gb_mod_id: Id of the mod on gamebanana, if known.
+        """
+        problems = pakfile.check_pairs(files)
+        if problems:
+            lines = "\n".join(f"  {x}" for x in problems)
+            return errors.ErrorResult(f"invalid paks:\n{lines}")
+        return self.__add_mod(
+            name=name,
+            file_names=[(pak.name, sig.name) for pak, sig in files],
+            populate=lambda parent_dir: transfer.copy_files(
+                [(file, parent_dir / file.name) for pair in files for file in pair]
+            ),
+            game_id=game_id,
+            game_name=game_name,
+            enabled=enabled,
+            gb_mod_id=gb_mod_id,
+        )
+
+    def import_archive(
+        self,
+        name: str,
+        archive: pathlib.Path,
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+        enabled: bool = False,
+        gb_mod_id: Optional[str] = None,
+    ) -> errors.Result[tables.mod.ModEntity]:
+        """Extract `.pak` and `.sig` pairs of a zip archive as a new mod.
+
+        Pairs are streamed from the archive straight into `mods_home`, flattening
+        directories; other members are neither read nor extracted. Extracted pairs
+        are checked with `pakfile.check_pairs()`. Arguments are as for
+        `import_mod()`.
+        """
+        try:
+            zip_file = zipfile.ZipFile(archive)
+        except (OSError, zipfile.BadZipFile) as e:
+            return errors.ErrorResult(f"could not open '{archive}': {e}")
+        with zip_file:
+            scan = scanner.scan_zip(zip_file)
+            missing_sigs = [x for x in scan.unpaired if x.suffix == scanner.PAK_SUFFIX]
+            if missing_sigs:
+                lines = "\n".join(f"  {path}" for path in missing_sigs)
+                return errors.ErrorResult(f"missing matching .sig files for:\n{lines}")
+            if not scan.pairs:
+                return errors.ErrorResult(f"'{archive}' contains no .pak files")
+
+            def extract(parent_dir: pathlib.Path):
+                for member in (file for pair in scan.pairs for file in pair):
+                    with (
+                        zip_file.open(member.as_posix()) as src,
+                        open(parent_dir / member.name, "xb") as dst,
+                    ):
+                        shutil.copyfileobj(src, dst, transfer.CHUNK_SIZE)
+                problems = pakfile.check_pairs(
+                    (parent_dir / pak.name, parent_dir / sig.name)
+                    for pak, sig in scan.pairs
+                )
+                if problems:
+                    raise ValueError("; ".join(problems))
+
+            return self.__add_mod(
+                name=name,
+                file_names=[(pak.name, sig.name) for pak, sig in scan.pairs],
+                populate=extract,
+                game_id=game_id,
+                game_name=game_name,
+                enabled=enabled,
+                gb_mod_id=gb_mod_id,
+            )
+
+    def __add_mod(
+        self,
+        name: str,
+        file_names: list[tuple[str, str]],
+        populate: Callable[[pathlib.Path], object],
+        game_id: Optional[uuid.UUID],
+        game_name: Optional[str],
+        enabled: bool,
+        gb_mod_id: Optional[str],
+    ) -> errors.Result[tables.mod.ModEntity]:
+        """Create the directory of a new mod, fill it with `populate`, and register it.
+
+        The directory is removed again if `populate` or the insert fails.
+        """
+        game_result = self.find_game(game_id=game_id, game_name=game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        game = game_result.value
+        try:
+            with locks.game_lock(game.game_id, self.lock_timeout):
+                return self.__add_mod_locked(
+                    game, name, file_names, populate, enabled, gb_mod_id
+                )
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+
+    def __add_mod_locked(
+        self,
+        game: tables.game.GameEntity,
+        name: str,
+        file_names: list[tuple[str, str]],
+        populate: Callable[[pathlib.Path], object],
+        enabled: bool,
+        gb_mod_id: Optional[str],
+    ) -> errors.Result[tables.mod.ModEntity]:
+        parent_dir = self.settings.mods_home / game.name / name
+        parent_dir = parent_dir.expanduser().resolve()
+        try:
+            parent_dir.mkdir(parents=True)
+        except FileExistsError:
+            return errors.ErrorResult(f"'{parent_dir}' already exists")
+        mod = tables.mod.ModEntity(
+            mod_id=schema.new_uuid(),
+            game_id=game.game_id,
+            name=name,
+            gb_mod_id=gb_mod_id,
+            enabled=enabled,
+        )
+        paks = [
+            tables.pak.PakEntity(
+                pak_id=schema.new_uuid(),
+                mod_id=mod.mod_id,
+                pak_path=pathlib.Path(pak_name),
+                sig_path=pathlib.Path(sig_name),
+            )
+            for pak_name, sig_name in file_names
+        ]
+        try:
+            populate(parent_dir)
+            sizes = [
+                _measure(x.pak_id, parent_dir / x.pak_path, parent_dir / x.sig_path)
+                for x in paks
+            ]
+            with self.con:
+                tables.mod.insert_many(self.con, [mod])
+                tables.pak.insert_many(self.con, paks)
+                tables.pak_size.upsert_many(self.con, sizes)
+        except (OSError, ValueError, zipfile.BadZipFile, sqlite3.IntegrityError) as e:
+            shutil.rmtree(parent_dir, ignore_errors=True)
+            return errors.ErrorResult(f"could not import '{name}': {e}")
+        logger.info(f"imported '{name}' with {len(paks)} paks")
+        return errors.GoodResult(mod)
+
+    def update_mod(
+        self,
+        name: str,
+        files: Sequence[tuple[pathlib.Path, pathlib.Path]],
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+    ) -> errors.Result[int]:
+        """Replace the files of mod `name` with a new version, writing only changes.
+
+        Paks are matched by the names of their .pak and .sig files. A matched .pak is
+        patched in place with `delta.patch()`, in `mods_home` and in each installed
+        copy which is not a link to it, then checked against the digest of the new
+        version and copied whole if it differs. Chunk hashes are kept in table
+        pak_hash, so the next update only hashes the new version. Unmatched paks of
+        the mod are deleted with their installed copies; new paks are imported but
+        not installed.
+
+        Args:
+            name: Name of an existing mod.
+            files: Each `(pak_path, sig_path)` pair of the new version.
+            game_id: See `find_game()`.
+            game_name: See `find_game()`.
+
+        Returns:
+            Number of bytes written.
+        """
+        problems = pakfile.check_pairs(files)
+        if problems:
+            lines = "\n".join(f"  {x}" for x in problems)
+            return errors.ErrorResult(f"invalid paks:\n{lines}")
+        game_result = self.find_game(game_id=game_id, game_name=game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        game = game_result.value
+        mod = next(
+            schema.select_as(
+                self.con,
+                tables.mod.ModEntity,
+                "SELECT * FROM mod WHERE game_id = ? AND name = ?",
+                [game.game_id, name],
+            ),
+            None,
+        )
+        if mod is None:
+            return errors.ErrorResult(f"no mod named '{name}'")
+        try:
+            with locks.game_lock(game.game_id, self.lock_timeout):
+                return self.__update_mod_locked(game, mod, files)
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+
+    def __update_mod_locked(
+        self,
+        game: tables.game.GameEntity,
+        mod: tables.mod.ModEntity,
+        files: Sequence[tuple[pathlib.Path, pathlib.Path]],
+    ) -> errors.Result[int]:
+        parent_dir = self.settings.mods_home / game.name / mod.name
+        parent_dir = parent_dir.expanduser().resolve()
+        old_paks = {
+            (x.pak_path.name, x.sig_path.name): x
+            for x in schema.select_as(
+                self.con,
+                tables.pak.PakEntity,
+                "SELECT * FROM pak WHERE mod_id = ?",
+                [mod.mod_id],
+            )
+        }
+        installed: dict[uuid.UUID, list[pathlib.Path]] = {}
+        sql_statement = """
+            SELECT install_manifest.path, install_manifest.pak_id
+            FROM install_manifest
+            INNER JOIN pak USING (pak_id)
+            WHERE pak.mod_id = ?
+        """
+        for row in self.con.execute(sql_statement, [mod.mod_id]):
+            installed.setdefault(row["pak_id"], []).append(row["path"])
+        jobs = []
+        added = []
+        for pak_path, sig_path in files:
+            old = old_paks.pop((pak_path.name, sig_path.name), None)
+            if old is None:
+                added.append((pak_path, sig_path))
+                continue
+            cached = tables.pak_hash.get(self.con, old.pak_id)
+            jobs.append((old, pak_path, sig_path, cached))
+
+        def update(job) -> Optional[tuple[tables.pak_hash.PakHashEntity, int]]:
+            old, pak_path, sig_path, cached = job
+            try:
+                return self.__update_pak(
+                    parent_dir, old, pak_path, sig_path, cached, installed
+                )
+            except OSError as e:
+                logger.warning("could not update '%s': %s", pak_path, e)
+                return None
+
+        with concurrent.futures.ThreadPoolExecutor(transfer.DEFAULT_WORKERS) as pool:
+            results = list(pool.map(update, jobs))
+        updated = [x for x in results if x is not None]
+        written = sum(count for _, count in updated)
+
+        removed = list(old_paks.values())
+        for pak in removed:
+            for path in [
+                parent_dir / pak.pak_path,
+                parent_dir / pak.sig_path,
+                *installed.get(pak.pak_id, []),
+            ]:
+                path.unlink(missing_ok=True)
+        new_paks = [
+            tables.pak.PakEntity(
+                pak_id=schema.new_uuid(),
+                mod_id=mod.mod_id,
+                pak_path=pathlib.Path(pak_path.name),
+                sig_path=pathlib.Path(sig_path.name),
+            )
+            for pak_path, sig_path in added
+        ]
+        written += transfer.copy_files(
+            [(file, parent_dir / file.name) for pair in added for file in pair]
+        )
+
+        installed_at = time.time()
+        manifest = []
+        for entity, _ in updated:
+            for path in installed.get(entity.pak_id, []):
+                stat = path.stat()
+                manifest.append(
+                    tables.install_manifest.InstallManifestEntity(
+                        path=path,
+                        game_id=game.game_id,
+                        pak_id=entity.pak_id,
+                        size=stat.st_size,
+                        mtime_ns=stat.st_mtime_ns,
+                        installed_at=installed_at,
+                    )
+                )
+        with self.con:
+            tables.install_manifest.delete_many(
+                self.con,
+                [path for pak in removed for path in installed.get(pak.pak_id, [])],
+            )
+            tables.pak.delete_many(self.con, [pak.pak_id for pak in removed])
+            tables.pak.insert_many(self.con, new_paks)
+            tables.pak_hash.upsert_many(self.con, [entity for entity, _ in updated])
+            tables.pak_size.upsert_many(
+                self.con,
+                [
+                    _measure(x.pak_id, parent_dir / x.pak_path, parent_dir / x.sig_path)
+                    for x in [job[0] for job in jobs] + new_paks
+                ],
+            )
+            tables.install_manifest.upsert_many(self.con, manifest)
+        logger.info(
+            f"updated mod '{mod.name}': {len(updated)} paks patched, "
+            f"{len(new_paks)} added, {len(removed)} removed, "
+            f"{transfer.format_size(written)} written"
+        )
+        if new_paks and installed:
+            logger.warning(f"install '{mod.name}' again to install its new paks")
+        if len(updated) < len(jobs):
+            return errors.ErrorResult(
+                f"{len(jobs) - len(updated)} paks could not be updated"
+            )
+        return errors.GoodResult(written)
+
+    def __update_pak(
+        self,
+        parent_dir: pathlib.Path,
+        old: tables.pak.PakEntity,
+        pak_path: pathlib.Path,
+        sig_path: pathlib.Path,
+        cached: Optional[tables.pak_hash.PakHashEntity],
+        installed: dict[uuid.UUID, list[pathlib.Path]],
+    ) -> tuple[tables.pak_hash.PakHashEntity, int]:
+        """Patch one pak and its installed copies; return its hashes and bytes written."""
+        mods_pak = parent_dir / old.pak_path
+        mods_sig = parent_dir / old.sig_path
+        stat = mods_pak.stat()
+        if (
+            cached is not None
+            and cached.chunk_size == delta.CHUNK_SIZE
+            and cached.size == stat.st_size
+            and cached.mtime_ns == stat.st_mtime_ns
+        ):
+            old_chunks = delta.Chunks(
+                chunk_size=cached.chunk_size,
+                size=cached.size,
+                hashes=cached.chunks,
+                digest=cached.digest,
+            )
+        else:
+            old_chunks = delta.hash_file(mods_pak)
+        new_chunks = delta.hash_file(pak_path)
+        ranges = delta.changed_ranges(old_chunks, new_chunks)
+        # Links to the files in `mods_home` change along with them.
+        copies = [
+            x
+            for x in installed.get(old.pak_id, [])
+            if not x.is_symlink()
+            and x.is_file()
+            and not (x.samefile(mods_pak) or x.samefile(mods_sig))
+        ]
+        written = 0
+        for dst in [mods_pak, *(x for x in copies if x.name == mods_pak.name)]:
+            written += delta.patch(pak_path, dst, ranges, new_chunks.size)
+            if delta.digest(dst) != new_chunks.digest:
+                logger.warning("'%s' differs after patching; copying it whole", dst)
+                shutil.copyfile(pak_path, dst)
+                written += new_chunks.size
+        for dst in [mods_sig, *(x for x in copies if x.name == mods_sig.name)]:
+            shutil.copyfile(sig_path, dst)
+            written += dst.stat().st_size
+        stat = mods_pak.stat()
+        entity = tables.pak_hash.PakHashEntity(
+            pak_id=old.pak_id,
+            chunk_size=new_chunks.chunk_size,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            chunks=new_chunks.hashes,
+            digest=new_chunks.digest,
+        )
+        return entity, written
+
+    def backfill_sizes(self, workers: int = transfer.DEFAULT_WORKERS) -> int:
+        """Measure the files of every pak without a size, in parallel.
+
+        Paks whose files are missing are skipped with a warning and stay unmeasured.
+        Each worker records and commits its own sizes with a connection of `pool`,
+        unless there is none or `con` is in a batch, which pooled writers would wait
+        on. Using the pool commits `con` first, so its next read sees those sizes.
+
+        Returns:
+            Number of paks measured.
+        """
+        sql_statement = """
+            SELECT pak.pak_id, game.name, mod.name, pak.pak_path, pak.sig_path
+            FROM pak
+            INNER JOIN mod USING (mod_id)
+            INNER JOIN game USING (game_id)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM pak_size WHERE pak_size.pak_id = pak.pak_id
+            )
+        """
+        mods_home = self.settings.mods_home.expanduser().resolve()
+        jobs = []
+        for row in self.con.execute(sql_statement).fetchall():
+            pak_id, game_name, mod_name, pak_path, sig_path = row
+            parent_dir = mods_home / game_name / mod_name
+            jobs.append((pak_id, parent_dir / pak_path, parent_dir / sig_path))
+        if not jobs:
+            return 0
+
+        con_pool = (
+            self.pool if self.pool is not None and not self.con.batching else None
+        )
+        if con_pool is not None:
+            # Ends the snapshot of the query above; a later one would miss the
+            # sizes the workers commit.
+            self.con.commit()
+
+        def measure(chunk) -> list[tables.pak_size.PakSizeEntity]:
+            sizes = []
+            for job in chunk:
+                try:
+                    sizes.append(_measure(*job))
+                except OSError as e:
+                    logger.warning("could not measure '%s': %s", job[1], e)
+            if con_pool is not None:
+                with con_pool.connection() as con:
+                    tables.pak_size.upsert_many(con, sizes)
+            return sizes
+
+        chunks = [jobs[i::workers] for i in range(workers)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            sizes = [x for chunk in pool.map(measure, chunks) for x in chunk]
+        if con_pool is None:
+            tables.pak_size.upsert_many(self.con, sizes)
+        logger.info(f"measured {len(sizes)} of {len(jobs)} paks without a size")
+        return len(sizes)
+
+    def plan_install(
+        self,
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+        mod_ids: Iterable[uuid.UUID] = (),
+        categories: Iterable[str] = (),
+        use_cache: bool = False,
+        link: str = "copy",
+    ) -> errors.Result[plan.InstallPlan]:
+        """Plan installing every enabled mod of a game, plus any in `mod_ids`.
+
+        Args:
+            game_id: See `find_game()`.
+            game_name: See `find_game()`.
+            mod_ids: Mods to install even if they are disabled.
+            categories: Only mods in one of these categories or their descendants.
+            use_cache:
+                Source files from the cache tier when it is enabled in the settings.
+                This fills the cache, so it is not suitable for dry runs, and the
+                cached sources are only safe from eviction by other installs while
+                the caller holds `locks.cache_lock()`, as `install()` does.
+                Links always point into `mods_home`, so the cache is only used
+                when copying.
+            link: One of `plan.LINK_MODES`.
+        """
+        if link not in plan.LINK_MODES:
+            return errors.ErrorResult(f"unknown link mode '{link}'")
+        game_result = self.find_game(game_id=game_id, game_name=game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        game = game_result.value
+        if game.game_path is None:
+            return errors.ErrorResult(f"game path of '{game.name}' needs to be set")
+        game_dir = (game.game_path / game.game_path_offset).expanduser().resolve()
+        if not game_dir.is_dir():
+            return errors.ErrorResult(f"'{game_dir}' is not a valid directory")
+        if (game_dir / game.mods_home_relative_path).is_symlink():
+            return errors.ErrorResult(
+                f"a profile is installed for '{game.name}'; uninstall it first"
+            )
+        tier = self.__cache_tier() if use_cache and link == "copy" else None
+        if isinstance(tier, errors.ErrorResult):
+            return errors.ErrorResult(tier.message)
+        conditions = builders.ConditionBuilderBranch(
+            combine_operator=builders.LogicalOperator.AND
+        )
+        game_cond = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.AND
+        )
+        game_cond._add_param(column_name="game_id", column_value=game.game_id)
+        mod_conds = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.OR
+        )
+        mod_conds._add_param(column_name="enabled", column_value=True)
+        for mod_id in mod_ids:
+            mod_conds._add_param(column_name="mod_id", column_value=mod_id)
+        category_conds = conditions.add_subfilter(
+            combine_operator=builders.LogicalOperator.OR
+        )
+        for category in categories:
+            category_conds._add_param_expr(
+                column_name="mod_id",
+                expression=tables.category_closure.MOD_FILTER_EXPR,
+                param_value=category,
+            )
+        sql_statement = f"SELECT * FROM m_mod\nWHERE {conditions.render()}"
+        logger.debug("sql_statement=%s", sql_statement)
+        install_plan = plan.InstallPlan(game_id=game.game_id, link=link)
+        for mod in schema.select_as(
+            self.con, views.ModView, sql_statement, conditions.params()
+        ):
+            destination = mod.install_path.expanduser().resolve()
+            install_plan.mkdirs.append(destination)
+            for pak in schema.select_as(
+                self.con,
+                views.PakView,
+                "SELECT * FROM m_pak WHERE mod_id = ?",
+                [mod.mod_id],
+            ):
+                pak_path = (self.settings.mods_home / pak.pak_path).expanduser()
+                sig_path = (self.settings.mods_home / pak.sig_path).expanduser()
+                if not pak_path.is_file() or not sig_path.is_file():
+                    return errors.ErrorResult(
+                        f"'{pak_path}' and/or '{sig_path}' are not valid files"
+                    )
+                if tier is not None:
+                    try:
+                        pak_path, sig_path = tier.fetch(pak)
+                    except locks.LockTimeout as e:
+                        return errors.ErrorResult(str(e))
+                for file in [pak_path, sig_path]:
+                    stat = file.stat()
+                    install_plan.copies.append(
+                        plan.CopyOp(
+                            src=file,
+                            dst=destination / file.name,
+                            pak_id=pak.pak_id,
+                            size=stat.st_size,
+                            mtime_ns=stat.st_mtime_ns,
+                        )
+                    )
+            logger.info("planned mod '%s'", mod.mod_name)
+        if not install_plan.mkdirs:
+            return errors.ErrorResult("Could not find any mods to install")
+        return errors.GoodResult(install_plan)
+
+    def install(
+        self,
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+        mod_ids: Iterable[uuid.UUID] = (),
+        categories: Iterable[str] = (),
+        max_rate: int = 0,
+        low_priority: bool = False,
+        link: str = "copy",
+    ) -> errors.Result[int]:
+        """Install mods as planned by `plan_install()`; return the bytes copied.
+
+        The plan is applied with `apply_plan()`, strictly, since its sources were
+        just measured and any change means they were modified during the install.
+        The game lock, and the cache lock if the cache tier is enabled, are held
+        from planning until the plan is applied, so no other install can change the
+        destination or evict the cached sources in between.
+
+        Args:
+            max_rate: See `apply_plan()`.
+            low_priority: See `apply_plan()`.
+            link: One of `plan.LINK_MODES`.
+        """
+        game_result = self.find_game(game_id=game_id, game_name=game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        game_id = game_result.value.game_id
+        use_cache = self.settings.cache.enabled and link == "copy"
+        try:
+            with (
+                locks.game_lock(game_id, self.lock_timeout),
+                (
+                    locks.cache_lock(self.lock_timeout)
+                    if use_cache
+                    else contextlib.nullcontext()
+                ),
+            ):
+                plan_result = self.plan_install(
+                    game_id=game_id,
+                    mod_ids=mod_ids,
+                    categories=categories,
+                    use_cache=use_cache,
+                    link=link,
+                )
+                if errors.is_error(plan_result):
+                    return errors.ErrorResult(plan_result.message)
+                return self.apply_plan(
+                    plan_result.value,
+                    max_rate=max_rate,
+                    low_priority=low_priority,
+                    strict=True,
+                )
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+
+    def plan_uninstall(
+        self,
+        game_id: Optional[uuid.UUID] = None,
+        game_name: Optional[str] = None,
+    ) -> errors.Result[plan.InstallPlan]:
+        """Plan removing the mods directory of a game.
+
+        A profile installed by `profile --switch` is a symlink, so only the link is
+        removed.
+
+        Args:
+            game_id: See `find_game()`.
+            game_name: See `find_game()`.
+        """
+        game_result = self.find_game(game_id=game_id, game_name=game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        game = game_result.value
+        if game.game_path is None:
+            return errors.ErrorResult("game path needs to be set")
+        mods_dir = game.game_path / game.game_path_offset / game.mods_home_relative_path
+        mods_dir = mods_dir.expanduser()
+        mods_dir = mods_dir.parent.resolve() / mods_dir.name
+        return errors.GoodResult(
+            plan.InstallPlan(game_id=game.game_id, rmtrees=[mods_dir])
+        )
+
+    def apply_plan(
+        self,
+        install_plan: plan.InstallPlan,
+        max_rate: int = 0,
+        low_priority: bool = False,
+        strict: bool = False,
+    ) -> errors.Result[int]:
+        """Apply a plan from `plan_install()`, `plan_uninstall()`, or a saved file.
+
+        Copies whose source no longer matches its fingerprint are skipped with a
+        warning and the rest is applied, but the result is still an error since
+        the install is incomplete; if `strict`, nothing is applied. A copy which
+        fails, such as on a full disk, is an error too; the files already in place
+        are still recorded. Nothing is
+        written unless every destination filesystem has room for the rest. Every
+        copied file is recorded in the install manifest, including ones which
+        already existed and were skipped; removed directories are dropped from it.
+
+        Args:
+            max_rate: Maximum bytes written per second, or 0 for unlimited.
+            low_priority: See `transfer.copy_file()`.
+            strict: Fail instead of skipping stale copies.
+
+        Returns:
+            Number of bytes copied.
+        """
+        if install_plan.game_id is None:
+            return errors.ErrorResult("plan is not for any game")
+        try:
+            with locks.game_lock(install_plan.game_id, self.lock_timeout):
+                return self.__apply_plan_locked(
+                    install_plan, max_rate, low_priority, strict
+                )
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+
+    def __apply_plan_locked(
+        self,
+        install_plan: plan.InstallPlan,
+        max_rate: int,
+        low_priority: bool,
+        strict: bool,
+    ) -> errors.Result[int]:
+        with concurrent.futures.ThreadPoolExecutor(transfer.DEFAULT_WORKERS) as pool:
+            stale = list(pool.map(plan.CopyOp.is_stale, install_plan.copies))
+        stale_ops = [op for op, x in zip(install_plan.copies, stale) if x]
+        for op in stale_ops:
+            logger.warning("'%s' changed since it was planned", op.src)
+        if stale_ops and strict:
+            return errors.ErrorResult(
+                f"{len(stale_ops)} sources changed since the plan was made"
+            )
+        if stale_ops:
+            install_plan = dataclasses.replace(
+                install_plan,
+                copies=[op for op, x in zip(install_plan.copies, stale) if not x],
+            )
+        estimate = plan.estimate(install_plan)
+        shortfalls = list(estimate.shortfalls())
+        if shortfalls:
+            return errors.ErrorResult(f"not enough space: {'; '.join(shortfalls)}")
+        limiter = transfer.TokenBucket(max_rate) if max_rate > 0 else None
+        started_at = time.time()
+        start = time.monotonic()
+        done: list[plan.CopyOp] = []
+        try:
+            copied = plan.apply(
+                install_plan, limiter=limiter, low_priority=low_priority, done=done
+            )
+        except OSError as e:
+            return self.__record_failed_apply(install_plan, done, e)
+        if install_plan.copies:
+            tables.install_log.insert_many(
+                self.con,
+                [
+                    tables.install_log.InstallLogEntity(
+                        game_id=install_plan.game_id,
+                        started_at=started_at,
+                        files=len(install_plan.copies),
+                        bytes=copied,
+                        seconds=time.monotonic() - start,
+                        max_rate=max_rate,
+                    )
+                ],
+            )
+        for dir in install_plan.rmtrees:
+            tables.install_manifest.delete_under(self.con, dir)
+        self.record_install(install_plan)
+        if stale_ops:
+            return errors.ErrorResult(
+                f"skipped {len(stale_ops)} files whose sources changed since the "
+                "plan was made"
+            )
+        return errors.GoodResult(copied)
+
+    def __record_failed_apply(
+        self,
+        install_plan: plan.InstallPlan,
+        done: list[plan.CopyOp],
+        error: OSError,
+    ) -> errors.ErrorResult:
+        """Record the part of `install_plan` which is on disk despite `error`."""
+        for dir in install_plan.rmtrees:
+            if not dir.exists() and not dir.is_symlink():
+                tables.install_manifest.delete_under(self.con, dir)
+        self.record_install(dataclasses.replace(install_plan, copies=done))
+        done_ids = {id(op) for op in done}
+        failed = next(
+            (op for op in install_plan.copies if id(op) not in done_ids), None
+        )
+        path = error.filename or (failed.dst if failed is not None else None)
+        return errors.ErrorResult(
+            f"install failed at '{path}': {error.strerror or error}; "
+            f"{len(done)} of {len(install_plan.copies)} files are in place and recorded"
+        )
+
+    def record_install(self, install_plan: plan.InstallPlan) -> None:
+        """Add the destination of each copy of an applied plan to the manifest."""
+        installed_at = time.time()
+        entities = []
+        for op in install_plan.copies:
+            stat = op.dst.stat()
+            entities.append(
+                tables.install_manifest.InstallManifestEntity(
+                    path=op.dst,
+                    game_id=install_plan.game_id,
+                    pak_id=op.pak_id,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    installed_at=installed_at,
+                )
+            )
+        tables.install_manifest.upsert_many(self.con, entities)
+
+    def __cache_tier(self) -> Optional[cache.TieredCache] | errors.ErrorResult:
+        if not self.settings.cache.enabled:
+            return None
+        try:
+            budget = transfer.parse_size(self.settings.cache.budget)
+        except ValueError as e:
+            return errors.ErrorResult(f"invalid cache.budget in config: {e}")
+        return cache.TieredCache(
+            con=self.con,
+            slow_root=self.settings.mods_home,
+            fast_root=self.settings.cache.path,
+            budget=budget,
+            lock_timeout=self.lock_timeout,
+        )
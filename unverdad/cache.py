@@ -0,0 +1,186 @@
+"""Local cache tier in front of a slow `mods_home`.
+
+When `mods_home` lives on a network mount, installs can be served from a copy on
+local storage instead. A cached copy is used as long as the size and modification
+time of the files in `mods_home` still match the ones recorded when it was cached.
+Copies are evicted least recently installed first to stay within a byte budget,
+except those already handed out by the same `TieredCache`, which a plan in progress
+may still copy from. The cache is shared by every game, so `fetch()` and `evict()`
+hold `unverdad.locks.cache_lock()`; callers hold it too until the paks handed out
+have been copied, so another install cannot evict them in between.
+"""
+
+import logging
+import os
+import pathlib
+import shutil
+import sqlite3
+import time
+import uuid
+
+from unverdad import locks
+from unverdad.data import schema, tables, views
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """Serve pak files from `fast_root`, filling it from `slow_root` on a miss."""
+
+    def __init__(
+        self,
+        con: sqlite3.Connection,
+        slow_root: pathlib.Path,
+        fast_root: pathlib.Path,
+        budget: int,
+        lock_timeout: float = locks.TIMEOUT,
+    ):
+        """
+        Args:
+            con: Database tracking the cache in table pak_cache.
+            slow_root: Directory of the authoritative copies, like `mods_home`.
+            fast_root: Directory of the cached copies.
+            budget: Maximum total bytes kept in `fast_root`.
+            lock_timeout: Seconds to wait for the cache lock.
+        """
+        self.con = con
+        self.slow_root = slow_root.expanduser().resolve()
+        self.fast_root = fast_root.expanduser().resolve()
+        self.budget = budget
+        self.lock_timeout = lock_timeout
+        self.pinned: set[uuid.UUID] = set()
+        """Paks returned from `fast_root` by `fetch()`, which `evict()` keeps."""
+
+    def used(self) -> int:
+        """Total bytes of every cached pak and sig."""
+        row = self.con.execute(
+            "SELECT TOTAL(pak_size + sig_size) AS used FROM pak_cache"
+        ).fetchone()
+        return int(row["used"])
+
+    def fetch(self, pak: views.PakView) -> tuple[pathlib.Path, pathlib.Path]:
+        """Return paths to use for the .pak and .sig of `pak`.
+
+        Paths are in `fast_root` on a hit or after a successful fill. A pak is
+        returned from `slow_root` and not cached if it does not fit in the budget
+        next to the paks already pinned.
+
+        Raises:
+            unverdad.locks.LockTimeout: The cache lock was not released in time.
+        """
+        with locks.cache_lock(self.lock_timeout):
+            return self.__fetch_locked(pak)
+
+    def __fetch_locked(self, pak: views.PakView) -> tuple[pathlib.Path, pathlib.Path]:
+        slow_paths = (self.slow_root / pak.pak_path, self.slow_root / pak.sig_path)
+        fast_paths = (self.fast_root / pak.pak_path, self.fast_root / pak.sig_path)
+        pak_stat, sig_stat = [x.stat() for x in slow_paths]
+        entity = tables.pak_cache.PakCacheEntity(
+            pak_id=pak.pak_id,
+            pak_size=pak_stat.st_size,
+            pak_mtime_ns=pak_stat.st_mtime_ns,
+            sig_size=sig_stat.st_size,
+            sig_mtime_ns=sig_stat.st_mtime_ns,
+            last_installed=time.time(),
+        )
+        cached = next(
+            schema.select_as(
+                self.con,
+                tables.pak_cache.PakCacheEntity,
+                "SELECT * FROM pak_cache WHERE pak_id = ?",
+                [pak.pak_id],
+            ),
+            None,
+        )
+        if cached is not None and self.__is_fresh(cached, entity, fast_paths):
+            logger.debug("cache hit '%s'", pak.pak_path)
+            tables.pak_cache.touch_many(self.con, [pak.pak_id], entity.last_installed)
+            self.pinned.add(pak.pak_id)
+            return fast_paths
+        size = entity.pak_size + entity.sig_size
+        if size > self.budget:
+            logger.debug("'%s' is larger than the cache budget", pak.pak_path)
+            return slow_paths
+        logger.debug("cache miss '%s'", pak.pak_path)
+        tables.pak_cache.delete_many(self.con, [pak.pak_id])
+        self.__evict_locked(self.budget - size)
+        if self.used() + size > self.budget:
+            logger.debug("'%s' does not fit next to pinned paks", pak.pak_path)
+            return slow_paths
+        for src, dst in zip(slow_paths, fast_paths):
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f".{dst.name}.{schema.new_uuid().hex}")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        tables.pak_cache.upsert_many(self.con, [entity])
+        self.pinned.add(pak.pak_id)
+        return fast_paths
+
+    def evict(self, target: int) -> int:
+        """Remove least recently installed paks until at most `target` bytes are used.
+
+        Pinned paks are never removed, so fewer bytes may be freed than asked for.
+
+        Returns:
+            Number of bytes freed.
+
+        Raises:
+            unverdad.locks.LockTimeout: The cache lock was not released in time.
+        """
+        with locks.cache_lock(self.lock_timeout):
+            return self.__evict_locked(target)
+
+    def __evict_locked(self, target: int) -> int:
+        used = self.used()
+        freed = 0
+        if used <= target:
+            return freed
+        evicted = []
+        sql_statement = """
+            SELECT
+                pak_cache.pak_id,
+                pak_cache.pak_size + pak_cache.sig_size AS size,
+                m_pak.pak_path,
+                m_pak.sig_path
+            FROM pak_cache
+            INNER JOIN m_pak USING (pak_id)
+            ORDER BY pak_cache.last_installed
+        """
+        for row in self.con.execute(sql_statement).fetchall():
+            if used - freed <= target:
+                break
+            if row["pak_id"] in self.pinned:
+                continue
+            for path in [row["pak_path"], row["sig_path"]]:
+                (self.fast_root / path).unlink(missing_ok=True)
+            evicted.append(row["pak_id"])
+            freed += row["size"]
+        tables.pak_cache.delete_many(self.con, evicted)
+        if evicted:
+            logger.info(f"evicted {len(evicted)} paks ({freed} bytes) from the cache")
+        return freed
+
+    @staticmethod
+    def __is_fresh(
+        cached: tables.pak_cache.PakCacheEntity,
+        current: tables.pak_cache.PakCacheEntity,
+        fast_paths: tuple[pathlib.Path, pathlib.Path],
+    ) -> bool:
+        """True if `cached` has the fingerprint of `current` and is intact on disk."""
+        if (
+            cached.pak_size,
+            cached.pak_mtime_ns,
+            cached.sig_size,
+            cached.sig_mtime_ns,
+        ) != (
+            current.pak_size,
+            current.pak_mtime_ns,
+            current.sig_size,
+            current.sig_mtime_ns,
+        ):
+            return False
+        try:
+            sizes = [x.stat().st_size for x in fast_paths]
+        except FileNotFoundError:
+            return False
+        return sizes == [cached.pak_size, cached.sig_size]
@@ -1,11 +1,16 @@
 from unverdad.config.constants import (
     APP_NAME,
     APP_VERSION,
+    CONFIG_CACHE_FILE,
     CONFIG_FILE,
     CONFIG_HOME,
     DATA_HOME,
     DB_FILE,
+    DOWNLOADS_HOME,
+    LOCKS_HOME,
     LOG_FILE,
+    PROFILES_HOME,
+    SOCKET_FILE,
     STATE_HOME,
 )
-from unverdad.config.user_config import SCHEMA, SETTINGS
+from unverdad.config.user_config import FINGERPRINT, SCHEMA, SETTINGS
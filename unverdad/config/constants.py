@@ -5,11 +5,16 @@ __version__ = "0.0.0"
 __all__ = [
     "APP_NAME",
     "APP_VERSION",
+    "CONFIG_CACHE_FILE",
     "CONFIG_FILE",
     "CONFIG_HOME",
     "DATA_HOME",
     "DB_FILE",
+    "DOWNLOADS_HOME",
+    "LOCKS_HOME",
     "LOG_FILE",
+    "PROFILES_HOME",
+    "SOCKET_FILE",
     "STATE_HOME",
 ]
 
@@ -34,4 +39,9 @@ STATE_HOME = pathlib.Path(
 
 LOG_FILE: pathlib.Path = STATE_HOME.expanduser() / "log"
 CONFIG_FILE: pathlib.Path = CONFIG_HOME.expanduser() / "config.toml"
+CONFIG_CACHE_FILE: pathlib.Path = STATE_HOME.expanduser() / "config.cache"
 DB_FILE: pathlib.Path = DATA_HOME.expanduser() / "db"
+SOCKET_FILE: pathlib.Path = STATE_HOME.expanduser() / "socket"
+LOCKS_HOME: pathlib.Path = STATE_HOME.expanduser() / "locks"
+PROFILES_HOME: pathlib.Path = DATA_HOME.expanduser() / "profiles"
+DOWNLOADS_HOME: pathlib.Path = STATE_HOME.expanduser() / "downloads"
@@ -1,5 +1,9 @@
 import dataclasses
+import hashlib
+import os
 import pathlib
+import pickle
+import types
 
 import schemaspec
 from unverdad.config import constants
@@ -39,6 +43,85 @@ class SettingsSpec:
         ).metadata(),
     )
 
+    @dataclasses.dataclass
+    class InstallSpec:
+        max_rate: str = dataclasses.field(
+            default="0",
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.StringAdapter(),),
+                description="maximum bytes per second written while installing, such as '200M'. '0' is unlimited.",
+            ).metadata(),
+        )
+        low_priority: bool = dataclasses.field(
+            default=False,
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.BoolAdapter(),),
+                description="evict installed files from the page cache while copying.",
+            ).metadata(),
+        )
+        link: str = dataclasses.field(
+            default="copy",
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.StringAdapter(),),
+                description="how installed files are placed: 'copy', 'hardlink', or 'symlink'. links take no space but point into mods_home.",
+            ).metadata(),
+        )
+
+    install: InstallSpec = dataclasses.field(
+        default_factory=InstallSpec,
+        metadata=schemaspec.SchemaTableField(
+            description="table of install settings",
+        ).metadata(),
+    )
+
+    @dataclasses.dataclass
+    class CacheSpec:
+        enabled: bool = dataclasses.field(
+            default=False,
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.BoolAdapter(),),
+                description="install from a local copy of mods_home, useful when mods_home is slow or remote.",
+            ).metadata(),
+        )
+        path: pathlib.Path = dataclasses.field(
+            default=constants.DATA_HOME / "cache",
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.PathAdapter(),),
+                description="directory of the local copies.",
+            ).metadata(),
+        )
+        budget: str = dataclasses.field(
+            default="10G",
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.StringAdapter(),),
+                description="maximum size of the cache, such as '10G'. least recently installed mods are evicted first.",
+            ).metadata(),
+        )
+
+    cache: CacheSpec = dataclasses.field(
+        default_factory=CacheSpec,
+        metadata=schemaspec.SchemaTableField(
+            description="table of local cache settings",
+        ).metadata(),
+    )
+
+    @dataclasses.dataclass
+    class GameBananaSpec:
+        base_url: str = dataclasses.field(
+            default="https://gamebanana.com/apiv11",
+            metadata=schemaspec.SchemaItemField(
+                possible_values=(schemaspec.StringAdapter(),),
+                description="root url of the gamebanana api.",
+            ).metadata(),
+        )
+
+    gamebanana: GameBananaSpec = dataclasses.field(
+        default_factory=GameBananaSpec,
+        metadata=schemaspec.SchemaTableField(
+            description="table of gamebanana settings",
+        ).metadata(),
+    )
+
     @dataclasses.dataclass
     class PredefinedGamesSpec:
         @dataclasses.dataclass
@@ -73,9 +156,101 @@ class SettingsSpec:
     )
 
 
+def __describe(value: object, parents: tuple[int, ...] = ()) -> str:
+    """Describe `value` the same way in every process.
+
+    Unlike `repr()`, objects without a custom one, such as schemaspec adapters, are
+    described by their type and attributes instead of their address. `parents` are
+    the ids of the objects being described, to stop at cycles.
+    """
+    if value is None or isinstance(
+        value, (bool, int, float, str, bytes, pathlib.PurePath)
+    ):
+        return repr(value)
+    if isinstance(value, (type, types.FunctionType)):
+        return f"{value.__module__}.{value.__qualname__}"
+    if id(value) in parents:
+        return "..."
+    parents = (*parents, id(value))
+    if isinstance(value, dict):
+        items = [
+            f"{__describe(k, parents)}: {__describe(v, parents)}"
+            for k, v in value.items()
+        ]
+        return "{" + ", ".join(items) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(__describe(x, parents) for x in value) + "]"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ", ".join(sorted(__describe(x, parents) for x in value)) + "}"
+    attrs = dict(getattr(value, "__dict__", {}))
+    for slot in getattr(type(value), "__slots__", ()):
+        if hasattr(value, slot):
+            attrs[slot] = getattr(value, slot)
+    return f"{__describe(type(value))}({__describe(attrs, parents)})"
+
+
+def __describe_spec(cls: type) -> list[str]:
+    """Name, type, and metadata of the fields of `cls` and of its nested specs."""
+    lines = []
+    for field in dataclasses.fields(cls):
+        lines.append(
+            f"{field.name}: {__describe(field.type)} {__describe(dict(field.metadata))}"
+        )
+        if isinstance(field.type, type) and dataclasses.is_dataclass(field.type):
+            lines.extend(f"{field.name}.{x}" for x in __describe_spec(field.type))
+    return lines
+
+
+def fingerprint(config_file: pathlib.Path) -> bytes:
+    """Identify the settings `config_file` loads to.
+
+    Covers the app version and the schema of `SettingsSpec`, meaning the types,
+    metadata, and adapters of its fields and their defaults, so a cache written by
+    another version or schema is never used. Also covers the size, modification
+    time, and content of the file. A missing file has a fingerprint too.
+    """
+    key = hashlib.blake2b(digest_size=16)
+    key.update(constants.APP_VERSION.encode())
+    key.update("\n".join(__describe_spec(SettingsSpec)).encode())
+    key.update(repr(SettingsSpec()).encode())
+    try:
+        stat = config_file.stat()
+        key.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        key.update(config_file.read_bytes())
+    except FileNotFoundError:
+        key.update(b"missing")
+    return key.digest()
+
+
+def __load(config_file: pathlib.Path, cache_file: pathlib.Path) -> SettingsSpec:
+    """Load `config_file`, reusing the settings in `cache_file` if still current.
+
+    The cache is a pickle of the fingerprint and the validated settings. It is only
+    an optimization, so failing to read or write it is ignored.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, settings = pickle.load(f)
+        if cached_key == FINGERPRINT and isinstance(settings, SettingsSpec):
+            return settings
+    except Exception:
+        # A corrupt pickle can raise nearly anything; it is rewritten below.
+        pass
+    settings = (
+        SCHEMA.load_toml(config_file) if config_file.is_file() else SettingsSpec()
+    )
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f".{cache_file.name}.{os.getpid()}")
+        with open(tmp, "wb") as f:
+            pickle.dump((FINGERPRINT, settings), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except (OSError, pickle.PicklingError):
+        pass
+    return settings
+
+
 SCHEMA: schemaspec.Schema = schemaspec.schema_from(SettingsSpec)
-SETTINGS: SettingsSpec = (
-    SCHEMA.load_toml(constants.CONFIG_FILE)
-    if constants.CONFIG_FILE.is_file()
-    else SettingsSpec()
-)
+FINGERPRINT: bytes = fingerprint(constants.CONFIG_FILE)
+"""Fingerprint of the loaded settings; see `fingerprint()`."""
+SETTINGS: SettingsSpec = __load(constants.CONFIG_FILE, constants.CONFIG_CACHE_FILE)
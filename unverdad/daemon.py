@@ -0,0 +1,269 @@
+"""JSON-RPC over a Unix domain socket to a long running process.
+
+The server keeps the database connection and the loaded config warm between calls,
+so each request only pays for the subcommand itself. The transaction of that
+connection ends with each request, so the next one sees writes made meanwhile by
+other processes, and does not hold an old read snapshot other writers wait on. Messages are JSON-RPC 2.0
+objects, one per line.
+
+Methods:
+    run: Params `{"argv": [...], "cwd": str}`; run a subcommand as if from the
+        command line in directory `cwd`, which is optional and must be absolute.
+        Result is `{"code": int, "stdout": str, "stderr": str}`.
+    ping: Result is `"pong"`.
+    shutdown: Stop the server after replying.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import pathlib
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+from typing import Any, Optional
+
+from unverdad.data import database
+
+logger = logging.getLogger(__name__)
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+CONNECT_TIMEOUT: float = 1.0
+"""Seconds a client waits to connect before assuming no server is running."""
+
+
+def run_argv(
+    parser: argparse.ArgumentParser,
+    argv: list[str],
+    cwd: Optional[pathlib.Path] = None,
+) -> dict[str, Any]:
+    """Parse `argv` with `parser` and run the chosen hook, capturing its output.
+
+    Logging output at the requested verbosity is captured along with stdout.
+    Relative paths in `argv` are resolved against `cwd`, which the process changes
+    to for the duration of the call.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    handler = logging.StreamHandler(stdout)
+    root_logger = logging.getLogger()
+    old_level = root_logger.level
+    code: int | str | None = 0
+    with (
+        contextlib.chdir(cwd) if cwd is not None else contextlib.nullcontext(),
+        contextlib.redirect_stdout(stdout),
+        contextlib.redirect_stderr(stderr),
+    ):
+        try:
+            namespace = parser.parse_args(args=argv)
+            handler.setLevel(namespace.logging_level)
+            root_logger.addHandler(handler)
+            root_logger.setLevel(min(old_level, namespace.logging_level))
+            code = namespace.hook(namespace).code
+        except SystemExit as e:
+            code = e.code
+        finally:
+            root_logger.removeHandler(handler)
+            root_logger.setLevel(old_level)
+    if not isinstance(code, int):
+        code = 0 if code is None else 1
+    return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def _response(
+    request_id: Any,
+    result: Any = None,
+    error: Optional[tuple[int, str]] = None,
+) -> bytes:
+    response: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id}
+    if error is None:
+        response["result"] = result
+    else:
+        response["error"] = {"code": error[0], "message": error[1]}
+    return json.dumps(response).encode() + b"\n"
+
+
+class Server:
+    """Answer requests from clients one at a time, on the thread running the loop."""
+
+    def __init__(self, parser: argparse.ArgumentParser, path: pathlib.Path):
+        self.parser = parser
+        self.path = path
+        self.__stop = asyncio.Event()
+
+    def handle(self, line: bytes) -> bytes:
+        """Decode one request and return its encoded response."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return _response(None, error=(PARSE_ERROR, str(e)))
+        if not isinstance(request, dict) or "method" not in request:
+            return _response(None, error=(INVALID_REQUEST, "expected an object"))
+        request_id = request.get("id")
+        params = request.get("params", {})
+        match request["method"]:
+            case "ping":
+                return _response(request_id, "pong")
+            case "shutdown":
+                self.__stop.set()
+                return _response(request_id, None)
+            case "run":
+                if not isinstance(params, dict):
+                    params = {}
+                argv = params.get("argv")
+                if not isinstance(argv, list) or not all(
+                    isinstance(x, str) for x in argv
+                ):
+                    return _response(
+                        request_id,
+                        error=(INVALID_PARAMS, "argv must be a list of strings"),
+                    )
+                cwd = params.get("cwd")
+                if cwd is not None and (
+                    not isinstance(cwd, str) or not os.path.isabs(cwd)
+                ):
+                    return _response(
+                        request_id,
+                        error=(INVALID_PARAMS, "cwd must be an absolute path"),
+                    )
+                logger.debug("run %s in %s", argv, cwd)
+                ok = False
+                try:
+                    result = run_argv(
+                        self.parser,
+                        argv,
+                        cwd=None if cwd is None else pathlib.Path(cwd),
+                    )
+                    ok = result["code"] == 0
+                    return _response(request_id, result)
+                except Exception as e:
+                    logger.exception(f"request {request_id} failed")
+                    return _response(request_id, error=(SERVER_ERROR, repr(e)))
+                finally:
+                    self.__end_transaction(ok)
+            case method:
+                return _response(
+                    request_id,
+                    error=(METHOD_NOT_FOUND, f"unknown method '{method}'"),
+                )
+
+    @staticmethod
+    def __end_transaction(commit: bool) -> None:
+        """Commit or roll back what a request left open on the shared connection."""
+        con = database.get_db()
+        if commit:
+            try:
+                con.commit()
+                return
+            except sqlite3.Error:
+                logger.exception("could not commit a request; rolling back")
+        con.rollback()
+
+    async def __on_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                writer.write(self.handle(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Listen on `path` until a shutdown request or a termination signal."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Restrict the umask while binding, so the socket never exists with the
+        # default permissions other users could connect through.
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(os.fspath(self.path))
+        except BaseException:
+            sock.close()
+            raise
+        finally:
+            os.umask(old_umask)
+        server = await asyncio.start_unix_server(self.__on_client, sock=sock)
+        if threading.current_thread() is threading.main_thread():
+            loop = asyncio.get_running_loop()
+            for sig in [signal.SIGINT, signal.SIGTERM]:
+                loop.add_signal_handler(sig, self.__stop.set)
+        logger.info(f"listening on '{self.path}'")
+        try:
+            async with server:
+                await self.__stop.wait()
+        finally:
+            self.path.unlink(missing_ok=True)
+
+
+def is_running(path: pathlib.Path) -> bool:
+    """True if a server is accepting connections at `path`."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(os.fspath(path))
+        except OSError:
+            return False
+    return True
+
+
+def call(path: pathlib.Path, method: str, params: Optional[dict] = None) -> Any:
+    """Send one request to the server at `path` and return its result.
+
+    Raises:
+        OSError: No server could be reached.
+        RuntimeError: The server replied with an error.
+    """
+    request = {"jsonrpc": "2.0", "id": 0, "method": method, "params": params or {}}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(os.fspath(path))
+        sock.settimeout(None)
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+            response = json.loads(stream.readline())
+    if "error" in response:
+        raise RuntimeError(response["error"]["message"])
+    return response["result"]
+
+
+def forward(
+    path: pathlib.Path,
+    argv: list[str],
+    cwd: Optional[pathlib.Path] = None,
+) -> Optional[int]:
+    """Run `argv` on the server at `path`, echoing its output.
+
+    Args:
+        cwd: Directory relative paths in `argv` are resolved against.
+
+    Returns:
+        Exit code of the subcommand, or None if no server is running.
+    """
+    try:
+        params: dict[str, Any] = {"argv": argv}
+        if cwd is not None:
+            params["cwd"] = os.fspath(cwd.absolute())
+        result = call(path, "run", params)
+    except (OSError, ValueError):
+        return None
+    except RuntimeError as e:
+        print(f"{path}: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    return result["code"]
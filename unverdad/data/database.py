@@ -1,25 +1,131 @@
+import contextlib
 import pathlib
 import sqlite3
-from typing import Optional
+import threading
+from typing import Iterator, Literal, Optional, Self
 
 from unverdad import config
 from unverdad.data import defaults, schema, tables, views
 
-__db: sqlite3.Connection | None = None
 
+class UnverdadConnection(sqlite3.Connection):
+    """SQLite connection whose context manager can be grouped into one transaction.
 
-def __connect(
+    Outside of `batch()`, using the connection as a context manager commits or
+    rolls back as usual. Inside, each `with con:` block becomes a savepoint, so a
+    failing block only undoes its own changes and nothing is committed until the
+    batch ends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.column_types: dict[str, str] = {}
+        """Declared types of columns by name, used by `schema.UnverdadRow`."""
+        self.__batching = False
+        self.__depth = 0
+
+    @property
+    def batching(self) -> bool:
+        """True inside `batch()`, whose writes are held until it ends."""
+        return self.__batching
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[Self]:
+        """Commit once when the block exits, or roll back if it raises."""
+        if self.__batching:
+            yield self
+            return
+        self.__batching = True
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+        finally:
+            self.__batching = False
+
+    def __enter__(self) -> Self:
+        if not self.__batching:
+            return super().__enter__()
+        self.__depth += 1
+        self.execute(f"SAVEPOINT batch_{self.__depth}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Literal[False]:
+        if not self.__batching:
+            return super().__exit__(exc_type, exc_value, traceback)
+        name = f"batch_{self.__depth}"
+        self.__depth -= 1
+        if exc_type is not None:
+            self.execute(f"ROLLBACK TO {name}")
+        self.execute(f"RELEASE {name}")
+        return False
+
+
+class ConnectionPool:
+    """Extra connections to a database file for worker threads.
+
+    A connection is used by one thread at a time, which borrows it with
+    `connection()`; idle connections are kept for reuse, up to `size`. The database
+    is in WAL mode, so pooled readers are not blocked by a writer, and writers wait
+    for each other up to the busy timeout of `sqlite3.connect()`.
+    """
+
+    def __init__(self, db: pathlib.Path, column_types: dict[str, str], size: int = 4):
+        """
+        Args:
+            db: Path to an initialized database.
+            column_types: See `UnverdadConnection.column_types`.
+            size: Maximum number of idle connections kept open.
+        """
+        self.db = db
+        self.column_types = column_types
+        self.size = size
+        self.__idle: list[UnverdadConnection] = []
+        self.__lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[UnverdadConnection]:
+        """Borrow a connection for the duration of the block."""
+        with self.__lock:
+            con = self.__idle.pop() if self.__idle else None
+        if con is None:
+            con = _open(self.db, check_same_thread=False)
+            con.column_types = self.column_types
+        try:
+            yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            with self.__lock:
+                if len(self.__idle) < self.size:
+                    self.__idle.append(con)
+                    con = None
+            if con is not None:
+                con.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+        for con in idle:
+            con.close()
+
+
+__db: UnverdadConnection | None = None
+__pool: ConnectionPool | None = None
+
+
+def _open(
     db: pathlib.Path | None,
     autocommit: bool = False,
-    detect_types: int = sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
     **kwargs,
-) -> sqlite3.Connection:
-    """Connect and initialize database.
+) -> UnverdadConnection:
+    """Connect and configure a connection, without touching the schema.
 
-    If creating a new file, then it also inserts default values.
-
-    Args:
-        db: Path to database or None to use in-memory database.
+    Files are switched to WAL mode, so readers are not blocked by a writer.
     """
     # HACK: SQLite cannot set foreign_keys unless in autocommit mode.
     #   "It is not possible to enable or disable foreign key constraints in the middle of a multi-statement transaction (when SQLite is not in autocommit mode). Attempting to do so does not return an error; it simply has no effect."
@@ -27,35 +133,67 @@ def __connect(
     # But directly changing autocommit can result problems ...
     #   "setting the autocommit mode by writing to the attribute is deprecated, since this may result in I/O and related exceptions, making it difficult to implement in an async context."
     #   <https://peps.python.org/pep-0249/#autocommit>
-    add_defaults = db is None or not db.exists()
     con = sqlite3.connect(
         db or ":memory:",
         autocommit=True,
-        detect_types=detect_types,
+        factory=UnverdadConnection,
         **kwargs,
     )
     con.execute("PRAGMA foreign_keys = ON")
+    if db is not None:
+        con.execute("PRAGMA journal_mode = WAL")
     con.autocommit = autocommit
     con.row_factory = schema.UnverdadRow
     schema.init_functions(con)
+    return con
+
+
+def __connect(
+    db: pathlib.Path | None,
+    autocommit: bool = False,
+    **kwargs,
+) -> UnverdadConnection:
+    """Connect and initialize database.
+
+    If creating a new file, then it also inserts default values.
+
+    Args:
+        db: Path to database or None to use in-memory database.
+    """
+    add_defaults = db is None or not db.exists()
+    con = _open(db, autocommit=autocommit, **kwargs)
     tables.init_tables(con)
     views.init_views(con)
+    con.column_types = schema.column_types(con)
     if add_defaults:
         defaults.insert_defaults(con)
     schema.sync_db_config(con)
     return con
 
 
-def _reset_db(db_path: Optional[pathlib.Path], **kwargs) -> sqlite3.Connection:
+def _reset_db(db_path: Optional[pathlib.Path], **kwargs) -> UnverdadConnection:
     """Create a new database connection; replacing the old one."""
-    global __db
+    global __db, __pool
+    if __pool is not None:
+        __pool.close()
     __db = __connect(db=db_path, **kwargs)
+    __pool = None
+    if db_path is not None:
+        __pool = ConnectionPool(db_path, __db.column_types)
     return __db
 
 
-def get_db() -> sqlite3.Connection:
+def get_db() -> UnverdadConnection:
     """Returns an existing connection or creates a new one."""
     global __db
     if __db is None:
         __db = _reset_db(db_path=config.DB_FILE)
     return __db
+
+
+def get_pool(con: sqlite3.Connection) -> Optional[ConnectionPool]:
+    """Returns the pool of the database of `con`.
+
+    None unless `con` is the connection of `get_db()` and its database is a file.
+    """
+    return __pool if con is __db else None
@@ -1,11 +1,17 @@
+import dataclasses
 import enum
+import functools
+import operator
 import pathlib
 import re
 import sqlite3
 import uuid
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
 
 from unverdad import config, errors
 
+T = TypeVar("T")
+
 type SQLiteNative = None | int | float | str | bytes
 type SQLiteAdaptable = SQLiteNative | sqlite3.PrepareProtocol | bool | pathlib.Path | uuid.UUID
 
@@ -15,15 +21,29 @@ def __adapt_path(path: pathlib.PurePath) -> str:
     return path.as_posix()
 
 
-sqlite3.register_converter("bool", lambda b: False if int(b) == 0 else True)
+def __convert_path(value: str | bytes | int | float) -> pathlib.Path:
+    # path has NUMERIC affinity, so a path which looks like a number is stored as one
+    if isinstance(value, bytes):
+        return pathlib.Path(value.decode())
+    return pathlib.Path(str(value))
+
+
 sqlite3.register_adapter(bool, lambda b: 1 if b else 0)
-sqlite3.register_converter("path", lambda b: pathlib.Path(b.decode()))
 sqlite3.register_adapter(pathlib.WindowsPath, __adapt_path)
 sqlite3.register_adapter(pathlib.PosixPath, __adapt_path)
 sqlite3.register_adapter(pathlib.Path, __adapt_path)
-sqlite3.register_converter("uuid", lambda b: uuid.UUID(bytes=b))
 sqlite3.register_adapter(uuid.UUID, lambda p: p.bytes)
 
+CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    "bool": lambda value: value != 0,
+    "path": __convert_path,
+    "uuid": lambda value: uuid.UUID(bytes=value),
+}
+"""Conversions of non-NULL values by declared type, applied when a value is read.
+
+Connections are opened without `detect_types`; see `UnverdadRow` instead.
+"""
+
 
 def match_name(name: str, value: str) -> bool:
     return re.search(re.sub("[_ ]", "[_ ]", name), value, re.IGNORECASE) is not None
@@ -54,8 +74,113 @@ def new_uuid() -> uuid.UUID:
     return uuid.uuid4()
 
 
-class UnverdadRow(sqlite3.Row):
-    """SQLite row object with pretty printing."""
+def column_types(con: sqlite3.Connection) -> dict[str, str]:
+    """Map each column name of every table to its declared type, if it has a converter.
+
+    Names declared with different types in different tables are left out, as they
+    cannot be converted by name alone.
+    """
+    found: dict[str, set[str]] = {}
+    tables = con.execute(
+        "SELECT name FROM sqlite_schema WHERE type = 'table'"
+    ).fetchall()
+    for (table,) in tables:
+        for column in con.execute(f'PRAGMA table_info("{table}")').fetchall():
+            found.setdefault(column[1], set()).add(column[2].casefold())
+    return {
+        name: next(iter(types))
+        for name, types in found.items()
+        if len(types) == 1 and next(iter(types)) in CONVERTERS
+    }
+
+
+_COLUMN_TYPE = re.compile(r"(.*\S)\s*\[(\w+)\]")
+
+
+class _Columns:
+    """Names and converters of the columns of one query, shared by all its rows."""
+
+    __slots__ = ("description", "names", "index", "converters")
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        types = getattr(cursor.connection, "column_types", {})
+        names = []
+        converters = []
+        for column in cursor.description:
+            name, decltype = column[0], None
+            # explicit type such as `AS "pak_path [path]"`, as PARSE_COLNAMES would
+            if match := _COLUMN_TYPE.fullmatch(name):
+                name, decltype = match[1], match[2].casefold()
+            names.append(name)
+            converters.append(CONVERTERS.get(decltype or types.get(name, "")))
+        self.description = cursor.description
+        self.names: tuple[str, ...] = tuple(names)
+        self.index: dict[str, int] = {}
+        for i, name in reversed(list(enumerate(names))):
+            self.index[name] = self.index[name.casefold()] = i
+        self.converters: tuple[Optional[Callable], ...] = tuple(converters)
+
+
+__columns_cache: dict[int, _Columns] = {}
+
+
+def _columns(cursor: sqlite3.Cursor) -> _Columns:
+    """Return the columns of the last query of `cursor`, computed once per query."""
+    description = cursor.description
+    columns = __columns_cache.get(id(description))
+    if columns is None or columns.description is not description:
+        if len(__columns_cache) >= 64:
+            __columns_cache.clear()
+        columns = __columns_cache[id(description)] = _Columns(cursor)
+    return columns
+
+
+class UnverdadRow:
+    """SQLite row which converts values on first access, with pretty printing.
+
+    Values stay as returned by sqlite until read by index or name; columns with a
+    converter in `CONVERTERS` are then converted once and memoized. Conversions are
+    chosen by declared type through `UnverdadConnection.column_types`, or by a
+    column alias such as `AS "pak_path [path]"`. Names are case-insensitive.
+    """
+
+    __slots__ = ("_columns", "_values", "_converted")
+
+    def __init__(self, cursor: sqlite3.Cursor, values: tuple):
+        self._columns = _columns(cursor)
+        self._values = values
+        self._converted: Optional[dict[int, Any]] = None
+
+    def __getitem__(self, key: int | str) -> Any:
+        if isinstance(key, str):
+            index = self._columns.index
+            try:
+                key = index[key] if key in index else index[key.casefold()]
+            except KeyError:
+                raise IndexError(f"no column named '{key}'") from None
+        value = self._values[key]
+        converter = self._columns.converters[key]
+        if converter is None or value is None:
+            return value
+        if self._converted is None:
+            self._converted = {}
+        elif key in self._converted:
+            return self._converted[key]
+        value = self._converted[key] = converter(value)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self[i] for i in range(len(self._values)))
+
+    def keys(self) -> list[str]:
+        return list(self._columns.names)
+
+    def raw(self) -> tuple:
+        """Values as returned by sqlite, without any conversion."""
+        return self._values
 
     def __repr__(self) -> str:
         cols = ", ".join([f"{k!r}={self[k]!r}" for k in self.keys()])
@@ -66,6 +191,94 @@ class UnverdadRow(sqlite3.Row):
         return f"Row(\n{cols}\n)"
 
 
+@functools.cache
+def row_factory(cls: type[T]) -> Callable[[sqlite3.Cursor, tuple], T]:
+    """Return a row factory building the dataclass `cls` positionally from each row.
+
+    Columns are matched to fields by name once per query, so the query may select
+    columns in any order, but it must select every field of `cls`. Values are
+    converted as by `UnverdadRow`.
+    """
+    fields = tuple(x.name for x in dataclasses.fields(cls))
+    cached: tuple[Any, Any] = (None, None)
+
+    def factory(cursor: sqlite3.Cursor, row: tuple) -> T:
+        nonlocal cached
+        description, plan = cached
+        if cursor.description is not description:
+            columns = _columns(cursor)
+            try:
+                order = [columns.index[x] for x in fields]
+            except KeyError:
+                missing = [x for x in fields if x not in columns.index]
+                raise errors.UnverdadError(
+                    f"query for {cls.__name__} is missing columns {missing}"
+                ) from None
+            plan = tuple((i, columns.converters[i]) for i in order)
+            if all(c is None for _, c in plan) and order == list(range(len(row))):
+                plan = None
+            cached = (cursor.description, plan)
+        if plan is None:
+            return cls(*row)
+        return cls(
+            *[
+                row[i] if convert is None or row[i] is None else convert(row[i])
+                for i, convert in plan
+            ]
+        )
+
+    return factory
+
+
+def select_as(
+    con: sqlite3.Connection,
+    cls: type[T],
+    sql: str,
+    parameters: Any = (),
+) -> Iterator[T]:
+    """Execute the query `sql`, yielding each row as an instance of `cls`."""
+    cursor = con.cursor()
+    cursor.row_factory = row_factory(cls)
+    return cursor.execute(sql, parameters)
+
+
+def select_raw(
+    con: sqlite3.Connection,
+    sql: str,
+    parameters: Any = (),
+) -> sqlite3.Cursor:
+    """Execute the query `sql`, yielding plain tuples of unconverted values.
+
+    For bulk queries which only count, compare, or pass values back to sqlite:
+    uuid columns are bytes, paths are str, and bools are int.
+    """
+    cursor = con.cursor()
+    cursor.row_factory = None
+    return cursor.execute(sql, parameters)
+
+
+@functools.cache
+def __param_getter(cls: type) -> Callable[[Any], tuple]:
+    getter = operator.attrgetter(*[x.name for x in dataclasses.fields(cls)])
+    if len(dataclasses.fields(cls)) == 1:
+        return lambda x: (getter(x),)
+    return getter
+
+
+def as_params(data: Iterable[Any]) -> Iterator[tuple]:
+    """Yield the fields of each dataclass in `data` as a tuple, in field order.
+
+    Unlike `dataclasses.astuple()`, field values are not copied. Bind the result to
+    positional `?` placeholders listed in the same order as the fields.
+    """
+    kind, getter = None, None
+    for x in data:
+        if type(x) is not kind:
+            kind = type(x)
+            getter = __param_getter(kind)
+        yield getter(x)
+
+
 class SchemaChange(enum.Enum):
     """Difference between expected schema and found schema. Returned by verify_schema()."""
 
@@ -114,13 +327,32 @@ def verify_schema(
 
 
 def sync_db_config(con: sqlite3.Connection):
-    """Synchronize `config.SETTINGS` with `con`."""
-    gamespec = config.SETTINGS.games.guilty_gear_strive
+    """Synchronize `config.SETTINGS` with `con`.
+
+    Every game of `config.SETTINGS.games` is written, matched by its key with
+    underscores as spaces. Nothing is written if `config.FINGERPRINT` is the one
+    recorded by the previous sync.
+    """
+    row = con.execute("SELECT fingerprint FROM config_sync").fetchone()
+    if row is not None and row[0] == config.FINGERPRINT:
+        return
     sql = """
-        UPDATE game 
+        UPDATE game
         SET game_path = :game_path
         WHERE match_name(name, :name)
     """
-    params = {"game_path": gamespec.game_path, "name": "guilty gear strive"}
+    games = config.SETTINGS.games
+    params = [
+        {
+            "game_path": getattr(games, field.name).game_path,
+            "name": field.name.replace("_", " "),
+        }
+        for field in dataclasses.fields(games)
+    ]
     with con:
-        con.execute(sql, params)
+        con.executemany(sql, params)
+        con.execute(
+            "INSERT OR REPLACE INTO config_sync (config_sync_id, fingerprint) "
+            "VALUES (0, ?)",
+            [config.FINGERPRINT],
+        )
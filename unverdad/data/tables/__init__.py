@@ -1,8 +1,44 @@
-from unverdad.data.tables import category, game, mod, mod_category, pak
+from unverdad.data.tables import (
+    category,
+    category_closure,
+    config_sync,
+    game,
+    gb_metadata,
+    install_log,
+    install_manifest,
+    mod,
+    mod_category,
+    mod_fts,
+    pak,
+    pak_cache,
+    pak_hash,
+    pak_size,
+    profile,
+    profile_mod,
+    stats,
+)
 
 
 def as_list():
-    return [category, game, mod, mod_category, pak]
+    return [
+        category,
+        category_closure,
+        config_sync,
+        game,
+        gb_metadata,
+        install_log,
+        install_manifest,
+        mod,
+        mod_category,
+        mod_fts,
+        pak,
+        pak_cache,
+        pak_hash,
+        pak_size,
+        profile,
+        profile_mod,
+        stats,
+    ]
 
 
 def init_tables(con):
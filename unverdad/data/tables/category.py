@@ -2,10 +2,12 @@ import dataclasses
 import uuid
 from typing import Optional
 
+from unverdad.data import schema
+
 TABLE_NAME = "category"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class CategoryEntity:
     category_id: uuid.UUID
     name: str
@@ -27,16 +29,17 @@ def create_table(con):
         )
             """
         )
+        con.execute("CREATE INDEX IF NOT EXISTS category_name ON category (name)")
 
 
 def insert_many(con, data: list[CategoryEntity]):
     with con:
         con.executemany(
             """
-        INSERT INTO category (category_id, parent_id, name)
-        VALUES (:category_id, :parent_id, :name)
+        INSERT INTO category (category_id, name, parent_id)
+        VALUES (?, ?, ?)
             """,
-            [dataclasses.asdict(x) for x in data],
+            schema.as_params(data),
         )
 
 
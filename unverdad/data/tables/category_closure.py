@@ -0,0 +1,143 @@
+"""SQL closure table of the category hierarchy.
+
+Every category has one row per ancestor, including itself at depth 0, so a whole
+subtree is found with a single indexed lookup instead of a recursive query.
+Rows are maintained by triggers on the category table and should not be written
+directly.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+
+TABLE_NAME = "category_closure"
+
+MOD_FILTER_EXPR = """{column} IN (
+    SELECT mod_category.mod_id
+    FROM category
+    INNER JOIN category_closure ON category_closure.ancestor_id = category.category_id
+    INNER JOIN mod_category ON mod_category.category_id = category_closure.descendant_id
+    WHERE category.name = {param}
+)"""
+"""Expression for `builders.ConditionBuilderNode._add_param_expr()`.
+
+Matches a mod id column against every mod in the named category or any of its
+descendants.
+"""
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class CategoryClosureEntity:
+    """
+    Attributes:
+        ancestor_id: category which contains descendant_id
+        descendant_id: category contained by ancestor_id
+        depth: number of edges between the two; 0 when they are the same category
+    """
+
+    ancestor_id: uuid.UUID
+    descendant_id: uuid.UUID
+    depth: int
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table, index, and triggers if they don't exist.
+
+    Existing categories are added when the table is empty.
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS category_closure (
+    ancestor_id uuid NOT NULL,
+    descendant_id uuid NOT NULL,
+    depth INTEGER NOT NULL CHECK (depth >= 0),
+    PRIMARY KEY (ancestor_id, descendant_id),
+    FOREIGN KEY (ancestor_id)
+    REFERENCES category (category_id)
+        ON DELETE CASCADE,
+    FOREIGN KEY (descendant_id)
+    REFERENCES category (category_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+        con.execute(
+            """
+CREATE INDEX IF NOT EXISTS category_closure_descendant
+ON category_closure (descendant_id, ancestor_id)
+        """
+        )
+        con.execute(
+            """
+INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT category_id, category_id, 0 FROM category
+    UNION ALL
+    SELECT tree.ancestor_id, category.category_id, tree.depth + 1
+    FROM tree
+    INNER JOIN category ON category.parent_id = tree.descendant_id
+)
+SELECT * FROM tree
+WHERE NOT EXISTS (SELECT 1 FROM category_closure)
+        """
+        )
+        con.execute(
+            """
+CREATE TRIGGER IF NOT EXISTS category_closure_insert
+AFTER INSERT ON category
+BEGIN
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT NEW.category_id, NEW.category_id, 0
+    UNION ALL
+    SELECT ancestor_id, NEW.category_id, depth + 1
+    FROM category_closure
+    WHERE descendant_id = NEW.parent_id;
+END
+        """
+        )
+        con.execute(
+            """
+CREATE TRIGGER IF NOT EXISTS category_closure_cycle
+BEFORE UPDATE OF parent_id ON category
+WHEN EXISTS (
+    SELECT 1 FROM category_closure
+    WHERE ancestor_id = NEW.category_id AND descendant_id = NEW.parent_id
+)
+BEGIN
+    SELECT RAISE(ABORT, 'category cannot be moved into its own subtree');
+END
+        """
+        )
+        con.execute(
+            """
+CREATE TRIGGER IF NOT EXISTS category_closure_update
+AFTER UPDATE OF parent_id ON category
+WHEN OLD.parent_id IS NOT NEW.parent_id
+BEGIN
+    DELETE FROM category_closure
+    WHERE descendant_id IN (
+        SELECT descendant_id FROM category_closure
+        WHERE ancestor_id = NEW.category_id
+    )
+    AND ancestor_id NOT IN (
+        SELECT descendant_id FROM category_closure
+        WHERE ancestor_id = NEW.category_id
+    );
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT super.ancestor_id, sub.descendant_id, super.depth + sub.depth + 1
+    FROM category_closure AS super
+    CROSS JOIN category_closure AS sub
+    WHERE super.descendant_id = NEW.parent_id
+        AND sub.ancestor_id = NEW.category_id;
+END
+        """
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table category_closure."""
+    with con:
+        con.execute("DELETE FROM category_closure")
@@ -0,0 +1,33 @@
+"""SQL table holding the fingerprint of the settings last synced into the database.
+
+`schema.sync_db_config()` compares it with `config.FINGERPRINT`, so game paths are
+only written when the config changed since the last connection.
+Module level functions are for manipulating the table.
+
+"""
+
+import sqlite3
+
+TABLE_NAME = "config_sync"
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS config_sync (
+    config_sync_id INTEGER NOT NULL PRIMARY KEY CHECK(config_sync_id = 0),
+    fingerprint BLOB NOT NULL
+)
+        """
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table config_sync."""
+    with con:
+        con.execute("DELETE FROM config_sync")
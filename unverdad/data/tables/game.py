@@ -14,7 +14,7 @@ from unverdad.data import schema
 TABLE_NAME = "game"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class GameEntity:
     """Mirrors the expected schema of game table.
 
@@ -71,10 +71,10 @@ def insert_one(con: sqlite3.Connection, data: GameEntity):
     with con:
         con.execute(
             """
-        INSERT INTO game (game_id, gb_game_id, name, mods_home_relative_path, game_path, game_path_offset)
-        VALUES (:game_id, :gb_game_id, :name, :mods_home_relative_path, :game_path, :game_path_offset)
+        INSERT INTO game (game_id, name, game_path_offset, mods_home_relative_path, gb_game_id, game_path)
+        VALUES (?, ?, ?, ?, ?, ?)
         """,
-            dataclasses.asdict(data),
+            next(schema.as_params([data])),
         )
 
 
@@ -0,0 +1,106 @@
+"""SQL table of mod metadata fetched from GameBanana.
+
+Rows keep the validators of the last response so unchanged entries can be skipped
+with a conditional request.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad.data import schema
+
+TABLE_NAME = "gb_metadata"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class GbMetadataEntity:
+    """
+    Attributes:
+        mod_id: local mod id
+        gb_mod_id: gamebanana mod id the metadata was fetched for
+        name: name of the mod on gamebanana
+        description: short description of the mod
+        body: full JSON response
+        etag: ETag header of the last successful response
+        last_modified: Last-Modified header of the last successful response
+        status: HTTP status of the last fetch
+        fetched_at: unix time of the last fetch
+    """
+
+    mod_id: uuid.UUID
+    gb_mod_id: str
+    status: int
+    fetched_at: float
+    name: Optional[str] = None
+    description: Optional[str] = None
+    body: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS gb_metadata (
+    mod_id uuid NOT NULL PRIMARY KEY,
+    gb_mod_id TEXT NOT NULL,
+    name TEXT,
+    description TEXT,
+    body TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    status INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    FOREIGN KEY (mod_id)
+    REFERENCES mod (mod_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+
+
+def upsert_many(con: sqlite3.Connection, data: list[GbMetadataEntity]):
+    """Insert each of data, replacing rows with the same mod_id."""
+    with con:
+        con.executemany(
+            """
+INSERT OR REPLACE INTO gb_metadata (
+    mod_id, gb_mod_id, status, fetched_at, name,
+    description, body, etag, last_modified
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def touch_many(con: sqlite3.Connection, data: list[GbMetadataEntity]):
+    """Record only the status and time of each fetch in data.
+
+    Existing metadata and validators are kept, as for a 304 or failed response.
+    """
+    with con:
+        con.executemany(
+            """
+INSERT INTO gb_metadata (mod_id, gb_mod_id, status, fetched_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (mod_id) DO UPDATE
+SET status = excluded.status, fetched_at = excluded.fetched_at
+        """,
+            [(x.mod_id, x.gb_mod_id, x.status, x.fetched_at) for x in data],
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table gb_metadata."""
+    with con:
+        con.execute("DELETE FROM gb_metadata")
@@ -0,0 +1,101 @@
+"""SQL table of completed installs and how long they took.
+
+The measured throughput of recent installs is used to estimate how long the next
+one will take.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad.data import schema
+
+TABLE_NAME = "install_log"
+RECENT: int = 10
+"""Number of most recent installs `throughput()` averages over."""
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class InstallLogEntity:
+    """
+    Attributes:
+        game_id: game installed into
+        started_at: unix time the install started
+        files: number of files in the plan
+        bytes: bytes copied
+        seconds: time spent applying the plan
+        max_rate: throttle in bytes per second, or 0 if unthrottled
+    """
+
+    game_id: uuid.UUID
+    started_at: float
+    files: int
+    bytes: int
+    seconds: float
+    max_rate: int = 0
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table and index if they don't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS install_log (
+    game_id uuid NOT NULL,
+    started_at REAL NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    max_rate INTEGER NOT NULL,
+    FOREIGN KEY (game_id)
+    REFERENCES game (game_id)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+)
+        """
+        )
+        con.execute(
+            """
+CREATE INDEX IF NOT EXISTS install_log_started_at
+ON install_log (started_at)
+        """
+        )
+
+
+def insert_many(con: sqlite3.Connection, data: list[InstallLogEntity]):
+    """Insert each of data into install_log table."""
+    with con:
+        con.executemany(
+            """
+INSERT INTO install_log (game_id, started_at, files, bytes, seconds, max_rate)
+VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def throughput(con: sqlite3.Connection) -> Optional[float]:
+    """Bytes per second of the most recent unthrottled installs which copied data."""
+    return con.execute(
+        """
+SELECT SUM(bytes) / SUM(seconds) FROM (
+    SELECT bytes, seconds FROM install_log
+    WHERE bytes > 0 AND seconds > 0 AND max_rate = 0
+    ORDER BY started_at DESC
+    LIMIT ?
+)
+        """,
+        [RECENT],
+    ).fetchone()[0]
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table install_log."""
+    with con:
+        con.execute("DELETE FROM install_log")
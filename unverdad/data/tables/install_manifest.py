@@ -0,0 +1,119 @@
+"""SQL table of files installed into each game.
+
+Each row records a file placed by `install`, with its size and modification time
+right after it was written, so the install state can be reported without walking
+the game directory and drift can be detected by comparing against `os.stat()`.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import pathlib
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad.data import schema
+
+TABLE_NAME = "install_manifest"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class InstallManifestEntity:
+    """
+    Attributes:
+        path: absolute path of the installed file
+        game_id: game the file was installed into
+        pak_id: pak the file is a copy of, or None once the pak is deleted
+        size: size in bytes when installed
+        mtime_ns: modification time when installed
+        installed_at: unix time of the install
+    """
+
+    path: pathlib.Path
+    game_id: uuid.UUID
+    pak_id: Optional[uuid.UUID]
+    size: int
+    mtime_ns: int
+    installed_at: float
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table and indexes if they don't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS install_manifest (
+    path path NOT NULL PRIMARY KEY,
+    game_id uuid NOT NULL,
+    pak_id uuid,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    installed_at REAL NOT NULL,
+    FOREIGN KEY (game_id)
+    REFERENCES game (game_id)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE,
+    FOREIGN KEY (pak_id)
+    REFERENCES pak (pak_id)
+        ON DELETE SET NULL
+)
+        """
+        )
+        for column in ["game_id", "pak_id"]:
+            con.execute(
+                f"""
+CREATE INDEX IF NOT EXISTS install_manifest_{column}
+ON install_manifest ({column})
+            """
+            )
+
+
+def upsert_many(con: sqlite3.Connection, data: list[InstallManifestEntity]):
+    """Insert each of data, updating rows with the same path.
+
+    Conflicts are resolved with an update rather than REPLACE so triggers on the
+    table see the change.
+    """
+    with con:
+        con.executemany(
+            """
+INSERT INTO install_manifest (path, game_id, pak_id, size, mtime_ns, installed_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    game_id = excluded.game_id,
+    pak_id = excluded.pak_id,
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns,
+    installed_at = excluded.installed_at
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_many(con: sqlite3.Connection, paths: list[pathlib.Path]):
+    """Delete each row whose path is in paths."""
+    with con:
+        con.executemany(
+            "DELETE FROM install_manifest WHERE path = ?",
+            [[x] for x in paths],
+        )
+
+
+def delete_under(con: sqlite3.Connection, dir: pathlib.Path):
+    """Delete every row whose path is inside the directory `dir`."""
+    prefix = f"{dir.as_posix().rstrip('/')}/"
+    with con:
+        con.execute(
+            "DELETE FROM install_manifest WHERE substr(path, 1, ?) = ?",
+            [len(prefix), prefix],
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table install_manifest."""
+    with con:
+        con.execute("DELETE FROM install_manifest")
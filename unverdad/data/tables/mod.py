@@ -14,7 +14,7 @@ from unverdad.data import schema
 TABLE_NAME = "mod"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class ModEntity:
     """
     Attributes:
@@ -29,8 +29,8 @@ class ModEntity:
     gb_mod_id: Optional[str] = None
     enabled: bool = False
 
-    def _params(self):
-        return dataclasses.asdict(self)
+    def _params(self) -> tuple:
+        return next(schema.as_params([self]))
 
 
 def _create_table_str() -> str:
@@ -64,6 +64,19 @@ def create_table(con: sqlite3.Connection):
             strict=True,
         )
         con.execute(sql)
+        # keyset pagination of mod-registry within one game
+        con.execute(
+            """
+CREATE INDEX IF NOT EXISTS mod_game_name
+ON mod (game_id, name)
+            """
+        )
+        con.execute(
+            """
+CREATE INDEX IF NOT EXISTS mod_game_mod_id
+ON mod (game_id, mod_id)
+            """
+        )
 
 
 def insert_many(con: sqlite3.Connection, data: list[ModEntity]):
@@ -76,27 +89,27 @@ def insert_many(con: sqlite3.Connection, data: list[ModEntity]):
     with con:
         con.executemany(
             """
-INSERT INTO mod (mod_id, gb_mod_id, game_id, name, enabled)
-VALUES (:mod_id, :gb_mod_id, :game_id, :name, :enabled)
+INSERT INTO mod (mod_id, game_id, name, gb_mod_id, enabled)
+VALUES (?, ?, ?, ?, ?)
         """,
-            [dataclasses.asdict(x) for x in data],
+            schema.as_params(data),
         )
 
 
 def replace_many(con: sqlite3.Connection, data: list[ModEntity]):
     with con:
-        con.execute(
+        con.executemany(
             """
         UPDATE mod
         SET
-            gb_mod_id = :gb_mod_id,
-            game_id = :game_id,
-            name = :name,
-            enabled = :enabled
+            game_id = ?2,
+            name = ?3,
+            gb_mod_id = ?4,
+            enabled = ?5
         WHERE
-            mod_id = :mod_id
+            mod_id = ?1
             """,
-            [dataclasses.asdict(x) for x in data],
+            schema.as_params(data),
         )
 
 
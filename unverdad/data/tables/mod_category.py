@@ -2,10 +2,12 @@ import dataclasses
 import uuid
 from typing import Optional
 
+from unverdad.data import schema
+
 TABLE_NAME = "mod_category"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class ModCategoryEntity:
     mod_id: uuid.UUID
     category_id: uuid.UUID
@@ -28,16 +30,33 @@ def create_table(con):
         )
             """
         )
+        con.execute(
+            """
+        CREATE INDEX IF NOT EXISTS mod_category_category
+        ON mod_category (category_id, mod_id)
+            """
+        )
 
 
 def insert_many(con, data: list[ModCategoryEntity]):
     with con:
         con.executemany(
             """
-        INSERT INTO mod_category (mod_id, category_id)
-        VALUES (:mod_id, :category_id)
+        INSERT OR IGNORE INTO mod_category (mod_id, category_id)
+        VALUES (?, ?)
+            """,
+            schema.as_params(data),
+        )
+
+
+def delete_many(con, data: list[ModCategoryEntity]):
+    with con:
+        con.executemany(
+            """
+        DELETE FROM mod_category
+        WHERE mod_id = ? AND category_id = ?
             """,
-            [dataclasses.asdict(x) for x in data],
+            schema.as_params(data),
         )
 
 
@@ -0,0 +1,190 @@
+"""SQL FTS5 table indexing mods by name, category names, and description.
+
+Each row shares its rowid with a row of mod. Categories include every ancestor of
+the categories a mod is assigned to, so searching a parent category finds mods in
+its subcategories. Triggers on mod, mod_category, category, category_closure, and
+gb_metadata keep the index in sync; it is never written to directly. As mod has no
+INTEGER PRIMARY KEY, VACUUM may renumber its rowids, so call `rebuild()` after one.
+Module level functions are for manipulating the table.
+"""
+
+import logging
+import re
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "mod_fts"
+WEIGHTS = (10.0, 5.0, 1.0)
+"""bm25 weights of the name, categories, and description columns."""
+
+
+def __categories_of(mod_id: str) -> str:
+    """Expression for the space separated category names of the mod `mod_id`."""
+    return f"""(
+        SELECT group_concat(name, ' ') FROM (
+            SELECT DISTINCT category.name
+            FROM mod_category
+            INNER JOIN category_closure
+                ON category_closure.descendant_id = mod_category.category_id
+            INNER JOIN category
+                ON category.category_id = category_closure.ancestor_id
+            WHERE mod_category.mod_id = {mod_id}
+        )
+    )"""
+
+
+def __refresh_categories(mod_ids: str) -> str:
+    """Statement recomputing the categories of each mod whose id is in `mod_ids`."""
+    return f"""
+    UPDATE mod_fts SET categories = {__categories_of("mod.mod_id")}
+    FROM mod
+    WHERE mod.rowid = mod_fts.rowid AND mod.mod_id IN ({mod_ids});"""
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table and triggers if they don't exist.
+
+    Existing mods are indexed when the table is empty. Nothing is created if sqlite
+    was built without FTS5, in which case searching is unavailable.
+    This function does not check if the schema is as expected.
+    """
+    try:
+        with con:
+            con.execute(
+                """
+CREATE VIRTUAL TABLE IF NOT EXISTS mod_fts USING fts5 (
+    name,
+    categories,
+    description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+            """
+            )
+    except sqlite3.OperationalError as e:
+        logger.warning(f"search is unavailable: {e}")
+        return
+    mods_in_subtree = """
+        SELECT mod_category.mod_id
+        FROM category_closure
+        INNER JOIN mod_category
+            ON mod_category.category_id = category_closure.descendant_id
+        WHERE category_closure.ancestor_id = {category_id}
+    """
+    triggers = {
+        "mod_fts_mod_insert": f"""
+AFTER INSERT ON mod
+BEGIN
+    INSERT INTO mod_fts (rowid, name, categories, description)
+    VALUES (
+        NEW.rowid,
+        NEW.name,
+        {__categories_of("NEW.mod_id")},
+        (SELECT description FROM gb_metadata WHERE mod_id = NEW.mod_id)
+    );
+END""",
+        "mod_fts_mod_update": """
+AFTER UPDATE OF name ON mod
+BEGIN
+    UPDATE mod_fts SET name = NEW.name WHERE rowid = NEW.rowid;
+END""",
+        "mod_fts_mod_delete": """
+AFTER DELETE ON mod
+BEGIN
+    DELETE FROM mod_fts WHERE rowid = OLD.rowid;
+END""",
+        "mod_fts_mod_category_insert": f"""
+AFTER INSERT ON mod_category
+BEGIN{__refresh_categories("NEW.mod_id")}
+END""",
+        "mod_fts_mod_category_delete": f"""
+AFTER DELETE ON mod_category
+BEGIN{__refresh_categories("OLD.mod_id")}
+END""",
+        "mod_fts_category_update": f"""
+AFTER UPDATE OF name ON category
+BEGIN{__refresh_categories(mods_in_subtree.format(category_id="NEW.category_id"))}
+END""",
+        "mod_fts_category_closure_insert": f"""
+AFTER INSERT ON category_closure
+BEGIN{__refresh_categories(mods_in_subtree.format(category_id="NEW.descendant_id"))}
+END""",
+        "mod_fts_category_closure_delete": f"""
+AFTER DELETE ON category_closure
+BEGIN{__refresh_categories(mods_in_subtree.format(category_id="OLD.descendant_id"))}
+END""",
+        "mod_fts_gb_metadata_insert": """
+AFTER INSERT ON gb_metadata
+BEGIN
+    UPDATE mod_fts SET description = NEW.description
+    WHERE rowid = (SELECT rowid FROM mod WHERE mod_id = NEW.mod_id);
+END""",
+        "mod_fts_gb_metadata_update": """
+AFTER UPDATE OF description ON gb_metadata
+BEGIN
+    UPDATE mod_fts SET description = NEW.description
+    WHERE rowid = (SELECT rowid FROM mod WHERE mod_id = NEW.mod_id);
+END""",
+    }
+    with con:
+        for name, body in triggers.items():
+            con.execute(f"CREATE TRIGGER IF NOT EXISTS {name}{body}")
+        con.execute(f"{__index_all()}\nWHERE NOT EXISTS (SELECT 1 FROM mod_fts)")
+
+
+def __index_all() -> str:
+    return f"""
+INSERT INTO mod_fts (rowid, name, categories, description)
+SELECT
+    mod.rowid,
+    mod.name,
+    {__categories_of("mod.mod_id")},
+    gb_metadata.description
+FROM mod
+LEFT JOIN gb_metadata USING (mod_id)"""
+
+
+def to_query(text: str) -> str:
+    """Turn words typed by a user into an FTS5 query matching all of them as prefixes.
+
+    >>> to_query("sol  bad")
+    '"sol"* AND "bad"*'
+    """
+    terms = [x.replace('"', '""') for x in re.split(r"\s+", text.strip()) if x]
+    return " AND ".join(f'"{x}"*' for x in terms)
+
+
+def search(
+    con: sqlite3.Connection,
+    query: str,
+    limit: int,
+) -> sqlite3.Cursor:
+    """Return mods matching the FTS5 `query`, best match first.
+
+    Rows have the columns mod_id, name, enabled, categories, and snippet, which is
+    an excerpt of the description around the match.
+    """
+    return con.execute(
+        f"""
+SELECT
+    mod.mod_id,
+    mod.name,
+    mod.enabled,
+    mod_fts.categories,
+    snippet(mod_fts, 2, '[', ']', '...', 8) AS snippet
+FROM mod_fts
+INNER JOIN mod ON mod.rowid = mod_fts.rowid
+WHERE mod_fts MATCH :query
+ORDER BY bm25(mod_fts, {", ".join(map(str, WEIGHTS))})
+LIMIT :limit
+        """,
+        {"query": query, "limit": limit},
+    )
+
+
+def rebuild(con: sqlite3.Connection):
+    """Reindex every mod from scratch."""
+    with con:
+        con.execute("DELETE FROM mod_fts")
+        con.execute(__index_all())
@@ -9,10 +9,12 @@ import dataclasses
 import pathlib
 import uuid
 
+from unverdad.data import schema
+
 TABLE_NAME = "pak"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class PakEntity:
     """
     Attributes:
@@ -29,7 +31,7 @@ class PakEntity:
 
 
 def create_table(con):
-    """Create table if it doesn't exist.
+    """Create table and index if they don't exist.
 
     This function does not check if the schema is as expected.
     """
@@ -48,18 +50,18 @@ CREATE TABLE IF NOT EXISTS pak (
 )
         """
         )
+        con.execute("CREATE INDEX IF NOT EXISTS pak_mod_id ON pak (mod_id)")
 
 
 def insert_many(con, data: list[PakEntity]):
     """Insert each of data into pak table."""
-    d = [dataclasses.asdict(x) for x in data]
     with con:
         con.executemany(
             """
 INSERT INTO pak (pak_id, mod_id, pak_path, sig_path)
-VALUES (:pak_id, :mod_id, :pak_path, :sig_path)
+VALUES (?, ?, ?, ?)
         """,
-            d,
+            schema.as_params(data),
         )
 
 
@@ -70,7 +72,7 @@ def delete_many(con, ids: list[uuid.UUID]):
         con.executemany(
             """
 DELETE FROM pak
-VALUES pak_id = :pak_id
+WHERE pak_id = :pak_id
         """,
             d,
         )
@@ -0,0 +1,108 @@
+"""SQL table for paks held in the local cache tier.
+
+Each row records the fingerprint of the `mods_home` files a cached copy was made
+from, and when it was last installed for least recently used eviction.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+
+from unverdad.data import schema
+
+TABLE_NAME = "pak_cache"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class PakCacheEntity:
+    """
+    Attributes:
+        pak_id: cached pak
+        pak_size: size of the .pak in bytes when it was cached
+        pak_mtime_ns: modification time of the .pak in `mods_home` when it was cached
+        sig_size: size of the .sig in bytes when it was cached
+        sig_mtime_ns: modification time of the .sig in `mods_home` when it was cached
+        last_installed: unix time the cached copy was last used
+    """
+
+    pak_id: uuid.UUID
+    pak_size: int
+    pak_mtime_ns: int
+    sig_size: int
+    sig_mtime_ns: int
+    last_installed: float
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table and index if they don't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS pak_cache (
+    pak_id uuid NOT NULL PRIMARY KEY,
+    pak_size INTEGER NOT NULL,
+    pak_mtime_ns INTEGER NOT NULL,
+    sig_size INTEGER NOT NULL,
+    sig_mtime_ns INTEGER NOT NULL,
+    last_installed REAL NOT NULL,
+    FOREIGN KEY (pak_id)
+    REFERENCES pak (pak_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+        con.execute(
+            """
+CREATE INDEX IF NOT EXISTS pak_cache_last_installed
+ON pak_cache (last_installed)
+        """
+        )
+
+
+def upsert_many(con: sqlite3.Connection, data: list[PakCacheEntity]):
+    """Insert each of data, replacing rows with the same pak_id."""
+    with con:
+        con.executemany(
+            """
+INSERT OR REPLACE INTO pak_cache
+    (pak_id, pak_size, pak_mtime_ns, sig_size, sig_mtime_ns, last_installed)
+VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def touch_many(con: sqlite3.Connection, ids: list[uuid.UUID], last_installed: float):
+    """Set last_installed of each row whose pak_id is in ids."""
+    with con:
+        con.executemany(
+            """
+UPDATE pak_cache
+SET last_installed = :last_installed
+WHERE pak_id = :pak_id
+        """,
+            [{"pak_id": x, "last_installed": last_installed} for x in ids],
+        )
+
+
+def delete_many(con: sqlite3.Connection, ids: list[uuid.UUID]):
+    """Delete each row whose pak_id is in ids."""
+    with con:
+        con.executemany(
+            """
+DELETE FROM pak_cache
+WHERE pak_id = :pak_id
+        """,
+            [{"pak_id": x} for x in ids],
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table pak_cache."""
+    with con:
+        con.execute("DELETE FROM pak_cache")
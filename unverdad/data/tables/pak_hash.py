@@ -0,0 +1,92 @@
+"""SQL table of chunk hashes of .pak files in `mods_home`.
+
+Rows are written by `api.Library.update_mod()`, so the next update of the same pak
+only has to hash the new version. A row is only valid while the size and
+modification time of the file still match.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad.data import schema
+
+TABLE_NAME = "pak_hash"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class PakHashEntity:
+    """
+    Attributes:
+        pak_id: hashed pak
+        chunk_size: bytes per chunk; the last chunk may be shorter
+        size: size of the .pak in bytes when it was hashed
+        mtime_ns: modification time of the .pak when it was hashed
+        chunks: digest of each chunk, concatenated
+        digest: digest of the whole file
+    """
+
+    pak_id: uuid.UUID
+    chunk_size: int
+    size: int
+    mtime_ns: int
+    chunks: bytes
+    digest: bytes
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS pak_hash (
+    pak_id uuid NOT NULL PRIMARY KEY,
+    chunk_size INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    chunks BLOB NOT NULL,
+    digest BLOB NOT NULL,
+    FOREIGN KEY (pak_id)
+    REFERENCES pak (pak_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+
+
+def get(con: sqlite3.Connection, pak_id: uuid.UUID) -> Optional[PakHashEntity]:
+    """Row of pak_id, if any."""
+    return next(
+        schema.select_as(
+            con,
+            PakHashEntity,
+            "SELECT * FROM pak_hash WHERE pak_id = ?",
+            [pak_id],
+        ),
+        None,
+    )
+
+
+def upsert_many(con: sqlite3.Connection, data: list[PakHashEntity]):
+    """Insert each of data, replacing rows with the same pak_id."""
+    with con:
+        con.executemany(
+            """
+INSERT OR REPLACE INTO pak_hash
+    (pak_id, chunk_size, size, mtime_ns, chunks, digest)
+VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table pak_hash."""
+    with con:
+        con.execute("DELETE FROM pak_hash")
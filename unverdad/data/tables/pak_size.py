@@ -0,0 +1,75 @@
+"""SQL table of the sizes of pak and sig files in `mods_home`.
+
+Rows are written when a mod is imported, so disk usage of the library can be
+reported with SQL aggregates instead of walking `mods_home`. Paks imported before
+this table existed have no row until `api.Library.backfill_sizes()` stats them.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+
+from unverdad.data import schema
+
+TABLE_NAME = "pak_size"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class PakSizeEntity:
+    """
+    Attributes:
+        pak_id: measured pak
+        pak_size: size of the .pak in bytes
+        pak_mtime_ns: modification time of the .pak when it was measured
+        sig_size: size of the .sig in bytes
+        sig_mtime_ns: modification time of the .sig when it was measured
+    """
+
+    pak_id: uuid.UUID
+    pak_size: int
+    pak_mtime_ns: int
+    sig_size: int
+    sig_mtime_ns: int
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS pak_size (
+    pak_id uuid NOT NULL PRIMARY KEY,
+    pak_size INTEGER NOT NULL,
+    pak_mtime_ns INTEGER NOT NULL,
+    sig_size INTEGER NOT NULL,
+    sig_mtime_ns INTEGER NOT NULL,
+    FOREIGN KEY (pak_id)
+    REFERENCES pak (pak_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+
+
+def upsert_many(con: sqlite3.Connection, data: list[PakSizeEntity]):
+    """Insert each of data, replacing rows with the same pak_id."""
+    with con:
+        con.executemany(
+            """
+INSERT OR REPLACE INTO pak_size
+    (pak_id, pak_size, pak_mtime_ns, sig_size, sig_mtime_ns)
+VALUES (?, ?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table pak_size."""
+    with con:
+        con.execute("DELETE FROM pak_size")
@@ -0,0 +1,86 @@
+"""SQL table for named mod profiles.
+
+A profile is a named set of mods for a single game. Its mods are listed in the
+profile_mod table.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import pathlib
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad.data import schema
+
+TABLE_NAME = "profile"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ProfileEntity:
+    """
+    Attributes:
+        profile_id: local id
+        game_id: game the profile belongs to
+        name: name of the profile, unique per game
+        build_path: directory of the prebuilt install tree, if it has been built
+    """
+
+    profile_id: uuid.UUID
+    game_id: uuid.UUID
+    name: str
+    build_path: Optional[pathlib.Path] = None
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS profile (
+    profile_id uuid NOT NULL PRIMARY KEY,
+    game_id uuid NOT NULL,
+    name TEXT NOT NULL,
+    build_path path,
+    UNIQUE (game_id, name),
+    FOREIGN KEY (game_id)
+    REFERENCES game (game_id)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+)
+        """
+        )
+
+
+def insert_many(con: sqlite3.Connection, data: list[ProfileEntity]):
+    """Insert each of data into profile table."""
+    with con:
+        con.executemany(
+            """
+INSERT INTO profile (profile_id, game_id, name, build_path)
+VALUES (?, ?, ?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_many(con: sqlite3.Connection, ids: list[uuid.UUID]):
+    """Delete each row whose profile_id is in ids."""
+    with con:
+        con.executemany(
+            """
+DELETE FROM profile
+WHERE profile_id = :profile_id
+        """,
+            [{"profile_id": x} for x in ids],
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table profile."""
+    with con:
+        con.execute("DELETE FROM profile")
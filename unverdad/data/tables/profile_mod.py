@@ -0,0 +1,72 @@
+"""SQL table tying mods to profiles.
+
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+
+from unverdad.data import schema
+
+TABLE_NAME = "profile_mod"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ProfileModEntity:
+    profile_id: uuid.UUID
+    mod_id: uuid.UUID
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table if it doesn't exist.
+
+    This function does not check if the schema is as expected.
+    """
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS profile_mod (
+    profile_id uuid NOT NULL,
+    mod_id uuid NOT NULL,
+    PRIMARY KEY (profile_id, mod_id),
+    FOREIGN KEY (profile_id)
+    REFERENCES profile (profile_id)
+        ON DELETE CASCADE,
+    FOREIGN KEY (mod_id)
+    REFERENCES mod (mod_id)
+        ON DELETE CASCADE
+)
+        """
+        )
+
+
+def insert_many(con: sqlite3.Connection, data: list[ProfileModEntity]):
+    """Insert each of data, ignoring rows which already exist."""
+    with con:
+        con.executemany(
+            """
+INSERT OR IGNORE INTO profile_mod (profile_id, mod_id)
+VALUES (?, ?)
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_many(con: sqlite3.Connection, data: list[ProfileModEntity]):
+    """Delete each row matching both ids of an entity in data."""
+    with con:
+        con.executemany(
+            """
+DELETE FROM profile_mod
+WHERE profile_id = ? AND mod_id = ?
+        """,
+            schema.as_params(data),
+        )
+
+
+def delete_all(con: sqlite3.Connection):
+    """Delete all rows of table profile_mod."""
+    with con:
+        con.execute("DELETE FROM profile_mod")
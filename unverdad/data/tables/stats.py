@@ -0,0 +1,188 @@
+"""SQL table of counters summarizing each game.
+
+Each game has one row counting its mods and paks, how many of them are enabled,
+and the files and bytes recorded in install_manifest. Triggers on game, mod, pak,
+and install_manifest keep the counters current; they are never written to directly.
+Module level functions are for manipulating the table.
+
+"""
+
+import dataclasses
+import sqlite3
+import uuid
+
+TABLE_NAME = "stats"
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class StatsEntity:
+    """
+    Attributes:
+        game_id: game the counters are for
+        mods: number of mods
+        enabled_mods: number of enabled mods
+        paks: number of paks
+        enabled_paks: number of paks of enabled mods
+        installed_files: number of files in install_manifest
+        installed_bytes: total size of the files in install_manifest
+    """
+
+    game_id: uuid.UUID
+    mods: int
+    enabled_mods: int
+    paks: int
+    enabled_paks: int
+    installed_files: int
+    installed_bytes: int
+
+
+__COUNTS = """
+SELECT
+    game.game_id,
+    (SELECT COUNT(*) FROM mod WHERE mod.game_id = game.game_id),
+    (SELECT IFNULL(SUM(mod.enabled), 0) FROM mod WHERE mod.game_id = game.game_id),
+    (
+        SELECT COUNT(*) FROM pak INNER JOIN mod USING (mod_id)
+        WHERE mod.game_id = game.game_id
+    ),
+    (
+        SELECT IFNULL(SUM(mod.enabled), 0) FROM pak INNER JOIN mod USING (mod_id)
+        WHERE mod.game_id = game.game_id
+    ),
+    (
+        SELECT COUNT(*) FROM install_manifest
+        WHERE install_manifest.game_id = game.game_id
+    ),
+    (
+        SELECT IFNULL(SUM(size), 0) FROM install_manifest
+        WHERE install_manifest.game_id = game.game_id
+    )
+FROM game"""
+
+
+def __add_mod(sign: str, mod: str) -> str:
+    """Statement adding (`sign` "+") or removing (`sign` "-") the counts of `mod`.
+
+    `mod` is OLD or NEW; its paks are counted from table pak.
+    """
+    enabled = f"IFNULL({mod}.enabled, 0)"
+    paks = f"(SELECT COUNT(*) FROM pak WHERE pak.mod_id = {mod}.mod_id)"
+    return f"""
+    UPDATE stats SET
+        mods = mods {sign} 1,
+        enabled_mods = enabled_mods {sign} {enabled},
+        paks = paks {sign} {paks},
+        enabled_paks = enabled_paks {sign} {enabled} * {paks}
+    WHERE game_id = {mod}.game_id;"""
+
+
+def __add_pak(sign: str, pak: str) -> str:
+    """Statement adding or removing the pak `pak` from the counts of its game.
+
+    Nothing changes when the mod of `pak` no longer exists, as happens when a mod
+    deletion cascades to its paks; the mod's own trigger accounts for them.
+    """
+    return f"""
+    UPDATE stats SET
+        paks = paks {sign} 1,
+        enabled_paks = enabled_paks {sign} IFNULL(mod.enabled, 0)
+    FROM mod
+    WHERE mod.mod_id = {pak}.mod_id AND stats.game_id = mod.game_id;"""
+
+
+def __add_file(sign: str, row: str) -> str:
+    return f"""
+    UPDATE stats SET
+        installed_files = installed_files {sign} 1,
+        installed_bytes = installed_bytes {sign} {row}.size
+    WHERE game_id = {row}.game_id;"""
+
+
+def create_table(con: sqlite3.Connection):
+    """Create table and triggers if they don't exist.
+
+    The counters are computed from scratch when the table is empty.
+    This function does not check if the schema is as expected.
+    """
+    triggers = {
+        "stats_game_insert": """
+AFTER INSERT ON game
+BEGIN
+    INSERT INTO stats (game_id) VALUES (NEW.game_id);
+END""",
+        "stats_mod_insert": f"""
+AFTER INSERT ON mod
+BEGIN{__add_mod("+", "NEW")}
+END""",
+        # BEFORE, so the paks about to be deleted by the cascade are still counted.
+        "stats_mod_delete": f"""
+BEFORE DELETE ON mod
+BEGIN{__add_mod("-", "OLD")}
+END""",
+        "stats_mod_update": f"""
+AFTER UPDATE OF game_id, enabled ON mod
+BEGIN{__add_mod("-", "OLD")}{__add_mod("+", "NEW")}
+END""",
+        "stats_pak_insert": f"""
+AFTER INSERT ON pak
+BEGIN{__add_pak("+", "NEW")}
+END""",
+        "stats_pak_delete": f"""
+AFTER DELETE ON pak
+BEGIN{__add_pak("-", "OLD")}
+END""",
+        "stats_install_manifest_insert": f"""
+AFTER INSERT ON install_manifest
+BEGIN{__add_file("+", "NEW")}
+END""",
+        "stats_install_manifest_update": f"""
+AFTER UPDATE OF game_id, size ON install_manifest
+BEGIN{__add_file("-", "OLD")}{__add_file("+", "NEW")}
+END""",
+        "stats_install_manifest_delete": f"""
+AFTER DELETE ON install_manifest
+BEGIN{__add_file("-", "OLD")}
+END""",
+    }
+    with con:
+        con.execute(
+            """
+CREATE TABLE IF NOT EXISTS stats (
+    game_id uuid NOT NULL PRIMARY KEY,
+    mods INTEGER NOT NULL DEFAULT 0,
+    enabled_mods INTEGER NOT NULL DEFAULT 0,
+    paks INTEGER NOT NULL DEFAULT 0,
+    enabled_paks INTEGER NOT NULL DEFAULT 0,
+    installed_files INTEGER NOT NULL DEFAULT 0,
+    installed_bytes INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (game_id)
+    REFERENCES game (game_id)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+)
+        """
+        )
+        for name, body in triggers.items():
+            con.execute(f"CREATE TRIGGER IF NOT EXISTS {name}{body}")
+        con.execute(
+            f"INSERT INTO stats {__COUNTS}\nWHERE NOT EXISTS (SELECT 1 FROM stats)"
+        )
+
+
+def check(con: sqlite3.Connection) -> int:
+    """Return the number of games whose counters differ from a fresh count."""
+    return con.execute(
+        f"""
+SELECT COUNT(*) FROM (
+    {__COUNTS}
+    EXCEPT SELECT * FROM stats
+)
+        """
+    ).fetchone()[0]
+
+
+def rebuild(con: sqlite3.Connection):
+    """Recompute every counter from scratch."""
+    with con:
+        con.execute("DELETE FROM stats")
+        con.execute(f"INSERT INTO stats {__COUNTS}")
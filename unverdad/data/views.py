@@ -5,7 +5,7 @@ import uuid
 from typing import ClassVar
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class ModView:
     mod_id: uuid.UUID
     mod_name: str
@@ -19,6 +19,8 @@ class ModView:
     install_path: pathlib.Path
 
     VIEW_NAME: ClassVar[str] = "v_mod"
+    TABLE_NAME: ClassVar[str] = "m_mod"
+    """Materialized copy of the view, kept in step by triggers."""
 
     @classmethod
     def create_view(cls, con: sqlite3.Connection):
@@ -46,15 +48,17 @@ class ModView:
             )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class PakView:
-    mod_id: uuid.UUID
     pak_id: uuid.UUID
+    mod_id: uuid.UUID
     pak_path: pathlib.Path
     sig_path: pathlib.Path
     enabled: bool
 
     VIEW_NAME: ClassVar[str] = "v_pak"
+    TABLE_NAME: ClassVar[str] = "m_pak"
+    """Materialized copy of the view, kept in step by triggers."""
 
     @classmethod
     def create_view(cls, con: sqlite3.Connection):
@@ -75,6 +79,168 @@ class PakView:
             )
 
 
+def create_materialized(con: sqlite3.Connection):
+    """Create m_mod and m_pak, their indexes, and the triggers maintaining them.
+
+    Rows are copied from v_mod and v_pak whenever a game, mod, or pak they derive
+    from changes, so the views remain the single definition of their contents.
+    Each table is filled from its view when it is empty.
+    """
+    mod_columns = ", ".join(x.name for x in dataclasses.fields(ModView))
+    pak_columns = ", ".join(x.name for x in dataclasses.fields(PakView))
+    refill_mod = f"""
+    INSERT INTO m_mod ({mod_columns})
+    SELECT * FROM v_mod WHERE mod_id = NEW.mod_id;
+    INSERT INTO m_pak ({pak_columns})
+    SELECT * FROM v_pak WHERE mod_id = NEW.mod_id;"""
+    clear_mod = """
+    DELETE FROM m_pak WHERE mod_id = OLD.mod_id;
+    DELETE FROM m_mod WHERE mod_id = OLD.mod_id;"""
+    with con:
+        con.execute(
+            """
+        CREATE TABLE IF NOT EXISTS m_mod (
+            mod_id uuid NOT NULL PRIMARY KEY,
+            mod_name TEXT NOT NULL,
+            enabled bool,
+            game_id uuid NOT NULL,
+            game_name TEXT NOT NULL,
+            game_path path NOT NULL,
+            game_path_offset path NOT NULL,
+            mods_home_relative_path path NOT NULL,
+            mod_path path NOT NULL,
+            install_path path NOT NULL
+        )
+            """
+        )
+        con.execute(
+            """
+        CREATE TABLE IF NOT EXISTS m_pak (
+            pak_id uuid NOT NULL PRIMARY KEY,
+            mod_id uuid NOT NULL,
+            pak_path path NOT NULL,
+            sig_path path NOT NULL,
+            enabled bool
+        )
+            """
+        )
+        for table, column in [
+            ("m_mod", "game_id"),
+            ("m_mod", "enabled"),
+            ("m_pak", "mod_id"),
+            ("m_pak", "enabled"),
+        ]:
+            con.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})"
+            )
+        triggers = {
+            "m_mod_game_update": f"""
+        AFTER UPDATE ON game
+        WHEN OLD.game_id IS NOT NEW.game_id
+            OR OLD.name IS NOT NEW.name
+            OR OLD.game_path IS NOT NEW.game_path
+            OR OLD.game_path_offset IS NOT NEW.game_path_offset
+            OR OLD.mods_home_relative_path IS NOT NEW.mods_home_relative_path
+        BEGIN
+            DELETE FROM m_pak WHERE mod_id IN (
+                SELECT mod_id FROM mod WHERE game_id IN (OLD.game_id, NEW.game_id)
+            );
+            DELETE FROM m_mod WHERE game_id IN (OLD.game_id, NEW.game_id);
+            INSERT INTO m_mod ({mod_columns})
+            SELECT * FROM v_mod WHERE game_id = NEW.game_id;
+            INSERT INTO m_pak ({pak_columns})
+            SELECT v_pak.* FROM v_pak
+            INNER JOIN mod USING (mod_id)
+            WHERE mod.game_id = NEW.game_id;
+        END""",
+            "m_mod_mod_insert": f"""
+        AFTER INSERT ON mod
+        BEGIN{refill_mod}
+        END""",
+            "m_mod_mod_update": f"""
+        AFTER UPDATE OF mod_id, game_id, name, enabled ON mod
+        BEGIN{clear_mod}{refill_mod}
+        END""",
+            "m_mod_mod_delete": f"""
+        AFTER DELETE ON mod
+        BEGIN{clear_mod}
+        END""",
+            "m_pak_pak_insert": f"""
+        AFTER INSERT ON pak
+        BEGIN
+            INSERT INTO m_pak ({pak_columns})
+            SELECT * FROM v_pak WHERE pak_id = NEW.pak_id;
+        END""",
+            "m_pak_pak_update": f"""
+        AFTER UPDATE ON pak
+        BEGIN
+            DELETE FROM m_pak WHERE pak_id = OLD.pak_id;
+            INSERT INTO m_pak ({pak_columns})
+            SELECT * FROM v_pak WHERE pak_id = NEW.pak_id;
+        END""",
+            "m_pak_pak_delete": """
+        AFTER DELETE ON pak
+        BEGIN
+            DELETE FROM m_pak WHERE pak_id = OLD.pak_id;
+        END""",
+        }
+        for name, body in triggers.items():
+            con.execute(f"CREATE TRIGGER IF NOT EXISTS {name}{body}")
+        con.execute(
+            f"""
+        INSERT INTO m_mod ({mod_columns})
+        SELECT * FROM v_mod WHERE NOT EXISTS (SELECT 1 FROM m_mod)
+            """
+        )
+        con.execute(
+            f"""
+        INSERT INTO m_pak ({pak_columns})
+        SELECT * FROM v_pak WHERE NOT EXISTS (SELECT 1 FROM m_pak)
+            """
+        )
+
+
+def check_materialized(con: sqlite3.Connection) -> dict[str, tuple[int, int]]:
+    """Compare each materialized table with its view.
+
+    Returns:
+        By table name, the number of rows missing from the table and the number of
+        rows in the table but not in the view. Both are 0 when they agree.
+    """
+    result = {}
+    for view in [ModView, PakView]:
+        sql_statement = f"""
+            SELECT
+                (SELECT COUNT(*) FROM (
+                    SELECT * FROM {view.VIEW_NAME}
+                    EXCEPT SELECT * FROM {view.TABLE_NAME}
+                )),
+                (SELECT COUNT(*) FROM (
+                    SELECT * FROM {view.TABLE_NAME}
+                    EXCEPT SELECT * FROM {view.VIEW_NAME}
+                ))
+        """
+        missing, extra = con.execute(sql_statement).fetchone()
+        result[view.TABLE_NAME] = (missing, extra)
+    return result
+
+
+def refresh_materialized(con: sqlite3.Connection):
+    """Replace the contents of each materialized table with its view."""
+    with con:
+        for view in [PakView, ModView]:
+            con.execute(f"DELETE FROM {view.TABLE_NAME}")
+        for view in [ModView, PakView]:
+            columns = ", ".join(x.name for x in dataclasses.fields(view))
+            con.execute(
+                f"""
+            INSERT INTO {view.TABLE_NAME} ({columns})
+            SELECT * FROM {view.VIEW_NAME}
+                """
+            )
+
+
 def init_views(con: sqlite3.Connection):
     ModView.create_view(con=con)
     PakView.create_view(con=con)
+    create_materialized(con=con)
@@ -0,0 +1,126 @@
+"""Rewrite only the changed parts of a file which has a new version.
+
+Both versions are split into fixed size chunks and each chunk is hashed. Chunks of
+the new version whose hash differs from the chunk at the same offset of the old
+version are written over the old file in place with `os.pwrite()`, and the file is
+truncated to the new size. A pak which gained a few megabytes in the middle of two
+gigabytes therefore costs reading both versions, but writing only the changes.
+
+Fixed chunks are used instead of content-defined ones because the file is patched
+in place: data which moved to another offset has to be rewritten either way.
+"""
+
+import dataclasses
+import hashlib
+import os
+import pathlib
+from typing import Optional
+
+from unverdad import transfer
+
+CHUNK_SIZE: int = transfer.CHUNK_SIZE
+"""Bytes hashed per chunk, and the granularity of rewrites."""
+DIGEST_SIZE: int = 16
+"""Bytes per chunk digest."""
+
+
+@dataclasses.dataclass
+class Chunks:
+    """
+    Attributes:
+        chunk_size: Bytes per chunk; the last chunk may be shorter.
+        size: Size of the file in bytes.
+        hashes: Digest of each chunk, concatenated.
+        digest: Digest of the whole file.
+    """
+
+    chunk_size: int
+    size: int
+    hashes: bytes
+    digest: bytes
+
+    def __len__(self) -> int:
+        return len(self.hashes) // DIGEST_SIZE
+
+    def hash(self, index: int) -> Optional[bytes]:
+        """Digest of chunk `index`, or None past the end of the file."""
+        if index >= len(self):
+            return None
+        return self.hashes[index * DIGEST_SIZE : (index + 1) * DIGEST_SIZE]
+
+
+def hash_file(path: pathlib.Path, chunk_size: int = CHUNK_SIZE) -> Chunks:
+    """Hash each chunk of `path` and the whole file in one read."""
+    whole = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    hashes = bytearray()
+    size = 0
+    with open(path, "rb", buffering=0) as f:
+        while chunk := f.read(chunk_size):
+            whole.update(chunk)
+            hashes += hashlib.blake2b(chunk, digest_size=DIGEST_SIZE).digest()
+            size += len(chunk)
+    return Chunks(
+        chunk_size=chunk_size,
+        size=size,
+        hashes=bytes(hashes),
+        digest=whole.digest(),
+    )
+
+
+def changed_ranges(old: Chunks, new: Chunks) -> list[tuple[int, int]]:
+    """Offset and length of each run of chunks of `new` which differ from `old`."""
+    assert old.chunk_size == new.chunk_size
+    result: list[tuple[int, int]] = []
+    for index in range(len(new)):
+        if new.hash(index) == old.hash(index):
+            continue
+        offset = index * new.chunk_size
+        length = min(new.chunk_size, new.size - offset)
+        if result and sum(result[-1]) == offset:
+            result[-1] = (result[-1][0], result[-1][1] + length)
+        else:
+            result.append((offset, length))
+    return result
+
+
+def patch(
+    src: pathlib.Path,
+    dst: pathlib.Path,
+    ranges: list[tuple[int, int]],
+    size: int,
+) -> int:
+    """Copy `ranges` of `src` over the same offsets of `dst` and truncate it to `size`.
+
+    Returns:
+        Number of bytes written.
+    """
+    written = 0
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY)
+        try:
+            for offset, length in ranges:
+                end = offset + length
+                while offset < end:
+                    data = os.pread(src_fd, min(CHUNK_SIZE, end - offset), offset)
+                    if not data:
+                        raise OSError(f"'{src}' is shorter than expected")
+                    count = os.pwrite(dst_fd, data, offset)
+                    written += count
+                    offset += count
+            os.ftruncate(dst_fd, size)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    return written
+
+
+def digest(path: pathlib.Path) -> bytes:
+    """Digest of the whole file, comparable to `Chunks.digest`."""
+    whole = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, "rb", buffering=0) as f:
+        while chunk := f.read(CHUNK_SIZE):
+            whole.update(chunk)
+    return whole.digest()
@@ -0,0 +1,294 @@
+"""Download files over HTTP with parallel range requests.
+
+A download is split into segments which are fetched concurrently, each over its own
+connection, and written in place with `os.pwrite()`. Progress is saved to a state
+file next to the partial data, so an interrupted download resumes where it stopped
+as long as the server still reports the same size and validators.
+"""
+
+import concurrent.futures
+import dataclasses
+import hashlib
+import http.client
+import json
+import logging
+import os
+import pathlib
+import re
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+from unverdad import transfer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTIONS: int = 4
+SEGMENT_MIN_SIZE: int = 4 << 20
+"""Downloads are not split into segments smaller than this."""
+SAVE_INTERVAL: float = 1.0
+"""Seconds between saves of the state file while downloading."""
+MAX_REDIRECTS: int = 5
+TIMEOUT: float = 30.0
+
+
+class DownloadError(Exception):
+    """The server misbehaved or the downloaded file failed verification."""
+
+
+@dataclasses.dataclass
+class Segment:
+    """Byte range `[start, end)` of the file, of which `done` bytes are written.
+
+    `end` is None when the size of the file is unknown.
+    """
+
+    start: int
+    end: Optional[int]
+    done: int = 0
+
+    def remaining(self) -> Optional[int]:
+        return None if self.end is None else self.end - self.start - self.done
+
+
+@dataclasses.dataclass
+class DownloadState:
+    """What is needed to resume a download, saved as JSON."""
+
+    url: str
+    size: Optional[int]
+    ranges: bool = False
+    """Whether the server honors range requests."""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    filename: Optional[str] = None
+    segments: list[Segment] = dataclasses.field(default_factory=list)
+
+    def save(self, path: pathlib.Path) -> None:
+        """Atomically write the state to `path`."""
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(dataclasses.asdict(self)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> Optional["DownloadState"]:
+        """Read the state saved at `path`, or None if it is missing or unreadable."""
+        try:
+            data = json.loads(path.read_text())
+            data["segments"] = [Segment(**x) for x in data["segments"]]
+            return cls(**data)
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.debug(f"ignoring state '{path}': {e!r}")
+            return None
+
+    def matches(self, other: "DownloadState") -> bool:
+        """Whether `other` describes the same remote file."""
+        return (
+            self.ranges
+            and other.ranges
+            and self.size is not None
+            and self.size == other.size
+            and self.etag == other.etag
+            and self.last_modified == other.last_modified
+        )
+
+
+def _connect(url: str) -> tuple[http.client.HTTPConnection, str]:
+    """Open a connection to the host of `url`; return it with the request target."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == "https":
+        connection = http.client.HTTPSConnection(parts.netloc, timeout=TIMEOUT)
+    elif parts.scheme == "http":
+        connection = http.client.HTTPConnection(parts.netloc, timeout=TIMEOUT)
+    else:
+        raise DownloadError(f"'{url}' is not an http or https url")
+    target = parts.path or "/"
+    if parts.query:
+        target += f"?{parts.query}"
+    return connection, target
+
+
+def __filename(url: str, disposition: Optional[str]) -> str:
+    name = pathlib.PurePosixPath(urllib.parse.urlsplit(url).path).name
+    name = urllib.parse.unquote(name)
+    if disposition:
+        match = re.search(r'filename="?([^";]+)"?', disposition)
+        if match:
+            name = match[1]
+    name = pathlib.PurePosixPath(name.replace("\\", "/")).name
+    return name if name not in ("", ".", "..") else "download"
+
+
+def probe(url: str) -> DownloadState:
+    """Follow redirects to the final url and read its size and validators.
+
+    The returned state has a single segment covering the whole file.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        connection, target = _connect(url)
+        try:
+            connection.request("GET", target, headers={"Range": "bytes=0-0"})
+            response = connection.getresponse()
+            headers = response.headers
+        finally:
+            connection.close()
+        if response.status in (301, 302, 303, 307, 308) and "Location" in headers:
+            url = urllib.parse.urljoin(url, headers["Location"])
+            continue
+        if response.status not in (200, 206):
+            raise DownloadError(f"'{url}' returned HTTP {response.status}")
+        state = DownloadState(
+            url=url,
+            size=None,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            filename=__filename(url, headers.get("Content-Disposition")),
+        )
+        if response.status == 206:
+            match = re.fullmatch(r"bytes 0-0/(\d+)", headers.get("Content-Range", ""))
+            if match:
+                state.size = int(match[1])
+                state.ranges = True
+        elif headers.get("Content-Length", "").isdigit():
+            state.size = int(headers["Content-Length"])
+        state.segments = [Segment(start=0, end=state.size)]
+        return state
+    raise DownloadError(f"more than {MAX_REDIRECTS} redirects")
+
+
+def plan_segments(size: int, connections: int) -> list[Segment]:
+    """Split `size` bytes into at most `connections` segments of similar size."""
+    count = max(1, min(connections, size // SEGMENT_MIN_SIZE))
+    bounds = [size * i // count for i in range(count + 1)]
+    return [Segment(start=a, end=b) for a, b in zip(bounds, bounds[1:])]
+
+
+class _Progress:
+    """Serializes saves of the state file from every worker."""
+
+    def __init__(self, state: DownloadState, path: pathlib.Path):
+        self.state = state
+        self.path = path
+        self.lock = threading.Lock()
+        self.saved_at = time.monotonic()
+
+    def update(self, segment: Segment, amount: int) -> None:
+        with self.lock:
+            segment.done += amount
+            now = time.monotonic()
+            if now - self.saved_at >= SAVE_INTERVAL:
+                self.state.save(self.path)
+                self.saved_at = now
+
+
+def __fetch_segment(
+    state: DownloadState,
+    segment: Segment,
+    fd: int,
+    progress: _Progress,
+) -> None:
+    if segment.remaining() == 0:
+        return
+    headers = {}
+    if state.ranges:
+        headers["Range"] = f"bytes={segment.start + segment.done}-{segment.end - 1}"
+        if state.etag or state.last_modified:
+            headers["If-Range"] = state.etag or state.last_modified
+    connection, target = _connect(state.url)
+    try:
+        connection.request("GET", target, headers=headers)
+        response = connection.getresponse()
+        if response.status != (206 if state.ranges else 200):
+            raise DownloadError(
+                f"'{state.url}' returned HTTP {response.status} for a segment; "
+                "it may have changed on the server"
+            )
+        while chunk := response.read(transfer.CHUNK_SIZE):
+            remaining = segment.remaining()
+            if remaining is not None:
+                chunk = chunk[:remaining]
+            os.pwrite(fd, chunk, segment.start + segment.done)
+            progress.update(segment, len(chunk))
+            if segment.remaining() == 0:
+                break
+    finally:
+        connection.close()
+    if segment.remaining():
+        raise DownloadError(f"connection closed with {segment.remaining()} bytes left")
+
+
+def download(
+    url: str,
+    directory: pathlib.Path,
+    connections: int = DEFAULT_CONNECTIONS,
+    size: Optional[int] = None,
+    sha256: Optional[str] = None,
+) -> pathlib.Path:
+    """Download `url` into `directory`, resuming an earlier attempt if possible.
+
+    Partial data and its state are kept in `directory` under a name derived from
+    `url` until the download completes and is verified.
+
+    Args:
+        connections: Maximum concurrent connections.
+        size: Expected size in bytes, if known.
+        sha256: Expected hex digest, if known.
+
+    Returns:
+        Path of the complete file, named after the remote file.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    part_path = directory / f"{key}.part"
+    state_path = directory / f"{key}.json"
+    state = probe(url)
+    if size is not None and state.size is not None and size != state.size:
+        raise DownloadError(f"server reports {state.size} bytes; expected {size}")
+    saved = DownloadState.load(state_path)
+    flags = os.O_WRONLY | os.O_CREAT
+    if saved is not None and saved.matches(state) and part_path.exists():
+        logger.info(f"resuming download of '{state.filename}'")
+        state.segments = saved.segments
+    else:
+        flags |= os.O_TRUNC
+        if state.ranges:
+            state.segments = plan_segments(state.size, connections)
+    fd = os.open(part_path, flags, 0o644)
+    progress = _Progress(state, state_path)
+    try:
+        if state.size is not None:
+            os.ftruncate(fd, state.size)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(state.segments)
+        ) as workers:
+            futures = [
+                workers.submit(__fetch_segment, state, segment, fd, progress)
+                for segment in state.segments
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+    except (OSError, http.client.HTTPException) as e:
+        raise DownloadError(f"download of '{url}' failed: {e!r}") from e
+    finally:
+        os.close(fd)
+        with progress.lock:
+            state.save(state_path)
+    total = sum(x.done for x in state.segments)
+    if size is not None and total != size:
+        raise DownloadError(f"downloaded {total} bytes; expected {size}")
+    if sha256 is not None:
+        with open(part_path, "rb") as file:
+            digest = hashlib.file_digest(file, "sha256").hexdigest()
+        if digest != sha256.lower():
+            part_path.unlink()
+            state_path.unlink()
+            raise DownloadError(f"sha256 is {digest}; expected {sha256}")
+    result = directory / (state.filename or key)
+    os.replace(part_path, result)
+    state_path.unlink()
+    logger.info(
+        f"downloaded '{result.name}' ({transfer.format_size(total)}) "
+        f"over {len(state.segments)} connections"
+    )
+    return result
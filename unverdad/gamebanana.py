@@ -0,0 +1,162 @@
+"""Client for the GameBanana API.
+
+Requests are spread over a bounded pool of threads, each reusing one keep-alive
+`http.client` connection. Validators from earlier responses are sent so unchanged
+entries are answered with a cheap 304.
+"""
+
+import concurrent.futures
+import dataclasses
+import http.client
+import json
+import logging
+import threading
+import urllib.parse
+from typing import Any, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL: str = "https://gamebanana.com/apiv11"
+DEFAULT_CONNECTIONS: int = 4
+TIMEOUT: float = 30.0
+
+
+@dataclasses.dataclass
+class ModRequest:
+    """Metadata to fetch along with the validators of the copy already stored."""
+
+    key: Any
+    """Opaque value returned with the response, such as a local mod id."""
+    gb_mod_id: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclasses.dataclass
+class ModResponse:
+    """
+    Attributes:
+        status: HTTP status, or 0 if no response was received.
+        text: Body of a 200 response.
+        data: Decoded JSON body of a 200 response.
+        error: Description of a failure.
+    """
+
+    request: ModRequest
+    status: int
+    text: Optional[str] = None
+    data: Optional[dict[str, Any]] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ConnectionPool:
+    """One keep-alive connection per worker thread, all to the host of `base_url`."""
+
+    def __init__(self, base_url: str, timeout: float = TIMEOUT):
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"'{base_url}' is not an http or https url")
+        self.__connection_cls = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.__netloc = parts.netloc
+        self.__prefix = parts.path.rstrip("/")
+        self.__timeout = timeout
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__connections: list[http.client.HTTPConnection] = []
+
+    def __connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = self.__connection_cls(self.__netloc, timeout=self.__timeout)
+            self.__local.connection = connection
+            with self.__lock:
+                self.__connections.append(connection)
+        return connection
+
+    def __discard(self, connection: http.client.HTTPConnection) -> None:
+        """Close `connection` so the next request of this thread opens a new one."""
+        connection.close()
+        self.__local.connection = None
+        with self.__lock:
+            self.__connections.remove(connection)
+
+    def get(
+        self,
+        path: str,
+        headers: dict[str, str],
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        """Send a GET for `path` relative to the base url; return status, headers, body.
+
+        A request on a connection the server already closed is retried once. On any
+        other error the connection is dropped, since it may be left mid-response.
+        """
+        for attempt in range(2):
+            connection = self.__connection()
+            try:
+                connection.request("GET", f"{self.__prefix}{path}", headers=headers)
+                response = connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.__discard(connection)
+                if attempt == 1:
+                    raise
+            except BaseException:
+                self.__discard(connection)
+                raise
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self.__lock:
+            for connection in self.__connections:
+                connection.close()
+            self.__connections.clear()
+
+
+def __fetch_mod(pool: ConnectionPool, request: ModRequest) -> ModResponse:
+    headers = {"Accept": "application/json"}
+    if request.etag:
+        headers["If-None-Match"] = request.etag
+    if request.last_modified:
+        headers["If-Modified-Since"] = request.last_modified
+    path = f"/Mod/{urllib.parse.quote(request.gb_mod_id)}/ProfilePage"
+    try:
+        status, response_headers, body = pool.get(path, headers)
+    except (OSError, http.client.HTTPException) as e:
+        return ModResponse(request=request, status=0, error=repr(e))
+    response = ModResponse(
+        request=request,
+        status=status,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+    )
+    if status == 200:
+        try:
+            response.text = body.decode()
+            response.data = json.loads(response.text)
+        except ValueError as e:
+            response.error = f"invalid JSON: {e}"
+    elif status != 304:
+        response.error = f"HTTP {status}"
+    return response
+
+
+def fetch_mods(
+    requests: Iterable[ModRequest],
+    base_url: str = DEFAULT_BASE_URL,
+    connections: int = DEFAULT_CONNECTIONS,
+) -> Iterator[ModResponse]:
+    """Fetch the profile of each mod concurrently, yielding responses as they finish."""
+    pool = ConnectionPool(base_url)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=connections) as workers:
+            futures = [workers.submit(__fetch_mod, pool, x) for x in requests]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+    finally:
+        pool.close()
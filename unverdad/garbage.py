@@ -0,0 +1,168 @@
+"""Find and remove files which no pak points to.
+
+Mods deleted from the database, and imports which failed after creating their
+directory, leave files behind in `mods_home` and in installed mods directories.
+Both trees of a game are laid out as `<mod name>/<file>`, so each is scanned in
+parallel into a temporary table and anti-joined against the paths of every pak of
+the game. The local cache tier is collected the same way, against its cached paks.
+"""
+
+import dataclasses
+import logging
+import os
+import pathlib
+import sqlite3
+
+from unverdad import scanner, transfer
+from unverdad.data import schema, tables
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class Garbage:
+    """
+    Attributes:
+        files: Each orphaned file with its size.
+        dirs: Directories which are empty once `files` are removed, deepest first.
+    """
+
+    files: list[tuple[pathlib.Path, int]] = dataclasses.field(default_factory=list)
+    dirs: list[pathlib.Path] = dataclasses.field(default_factory=list)
+
+    def size(self) -> int:
+        return sum(size for _, size in self.files)
+
+
+def roots(
+    game: tables.game.GameEntity,
+    mods_home: pathlib.Path,
+) -> list[pathlib.Path]:
+    """Directories of `game` holding one subdirectory per mod.
+
+    The mods directory of the game is left out while a profile is installed, since
+    it then links to a tree owned by the profile.
+    """
+    result = [(mods_home / game.name).expanduser().resolve()]
+    if game.game_path is not None:
+        mods_dir = game.game_path / game.game_path_offset / game.mods_home_relative_path
+        mods_dir = mods_dir.expanduser()
+        if not mods_dir.is_symlink():
+            result.append(mods_dir.resolve())
+    return result
+
+
+def find(
+    con: sqlite3.Connection,
+    game: tables.game.GameEntity,
+    mods_home: pathlib.Path,
+    workers: int = transfer.DEFAULT_WORKERS,
+) -> Garbage:
+    """Find files under the `roots()` of `game` which belong to none of its paks."""
+    result = Garbage()
+    sql_statement = """
+        SELECT path, size FROM temp.gc_file
+        WHERE path NOT IN (
+            SELECT mod.name || '/' || pak.pak_path
+            FROM pak INNER JOIN mod USING (mod_id)
+            WHERE mod.game_id = :game_id
+            UNION ALL
+            SELECT mod.name || '/' || pak.sig_path
+            FROM pak INNER JOIN mod USING (mod_id)
+            WHERE mod.game_id = :game_id
+        )
+        ORDER BY path
+    """
+    for root in roots(game, mods_home):
+        __find_under(
+            con, root, sql_statement, {"game_id": game.game_id}, workers, result
+        )
+    return result
+
+
+def find_cache(
+    con: sqlite3.Connection,
+    cache_root: pathlib.Path,
+    workers: int = transfer.DEFAULT_WORKERS,
+) -> Garbage:
+    """Find files under `cache_root` which belong to no row of table pak_cache.
+
+    Such files are left by copies which were interrupted, and by paks which were
+    deleted, which also deletes their row. Eviction only knows about rows, so they
+    are never removed otherwise.
+    """
+    result = Garbage()
+    sql_statement = """
+        SELECT path, size FROM temp.gc_file
+        WHERE path NOT IN (
+            SELECT m_pak.pak_path
+            FROM pak_cache INNER JOIN m_pak USING (pak_id)
+            UNION ALL
+            SELECT m_pak.sig_path
+            FROM pak_cache INNER JOIN m_pak USING (pak_id)
+        )
+        ORDER BY path
+    """
+    root = cache_root.expanduser().resolve()
+    __find_under(con, root, sql_statement, {}, workers, result)
+    return result
+
+
+def __find_under(
+    con: sqlite3.Connection,
+    root: pathlib.Path,
+    sql_statement: str,
+    params: dict,
+    workers: int,
+    result: Garbage,
+) -> None:
+    """Add to `result` the files under `root` which `sql_statement` selects.
+
+    The statement selects the garbage from `temp.gc_file`, which holds the path
+    relative to `root` and the size of every file under it.
+    """
+    with con:
+        con.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS gc_file (
+                path TEXT NOT NULL PRIMARY KEY,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+    scan = scanner.scan_tree(root, workers=workers)
+    try:
+        with con:
+            con.executemany(
+                "INSERT INTO temp.gc_file (path, size) VALUES (?, ?)",
+                scan.files.items(),
+            )
+        orphans = schema.select_raw(con, sql_statement, params).fetchall()
+    finally:
+        with con:
+            con.execute("DELETE FROM temp.gc_file")
+    orphaned = {path for path, _ in orphans}
+    kept_dirs = set()
+    for path in scan.files.keys() - orphaned:
+        kept_dirs.update(str(x) for x in pathlib.PurePosixPath(path).parents)
+    empty = [x for x in scan.dirs if x not in kept_dirs]
+    empty.sort(key=lambda x: x.count("/"), reverse=True)
+    result.files.extend((root / path, size) for path, size in orphans)
+    result.dirs.extend(root / x for x in empty)
+
+
+def remove(garbage: Garbage) -> int:
+    """Delete the files and then the directories of `garbage`; return bytes freed."""
+    freed = 0
+    for path, size in garbage.files:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        freed += size
+    for dir in garbage.dirs:
+        try:
+            os.rmdir(dir)
+        except OSError as e:
+            logger.warning("could not remove '%s': %s", dir, e)
+    return freed
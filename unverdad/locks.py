@@ -0,0 +1,126 @@
+"""Advisory locks which keep operations writing to the same game apart.
+
+Each game has a lock file under `unverdad.config.LOCKS_HOME` which is held with
+`fcntl.flock()` for the duration of an install, uninstall, import, profile switch, or
+garbage collection of that game. Other processes wait for it up to a timeout.
+Commands which only read, such as `status` or `du`, never take a lock.
+The local cache tier, which installs of every game share, has its own lock taken
+with `cache_lock()`; when both are needed the game lock is taken first.
+
+`flock()` locks belong to an open file, so a second open of the same file in this
+process would block on itself. Holds are therefore counted per lock, and threads of
+one process are kept apart by a `threading.RLock` instead, which also makes
+`game_lock()` reentrant for nested operations such as `batch`.
+"""
+
+import contextlib
+import fcntl
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Iterator
+
+from unverdad import config
+
+CACHE_LOCK_NAME: str = "cache"
+"""Name of the lock of the local cache tier."""
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT: float = 30.0
+"""Default seconds to wait for a lock held by another process."""
+POLL_INTERVAL: float = 0.1
+"""Seconds between attempts to take a lock held by another process."""
+
+
+class LockTimeout(TimeoutError):
+    """A lock was not released in time."""
+
+
+__guard = threading.Lock()
+__thread_locks: dict[str, threading.RLock] = {}
+__held: dict[str, tuple[int, int]] = {}
+"""File descriptor and hold count of each lock held by this process."""
+
+
+def __thread_lock(name: str) -> threading.RLock:
+    with __guard:
+        return __thread_locks.setdefault(name, threading.RLock())
+
+
+def __flock(name: str, deadline: float) -> int:
+    """Open and lock the file of `name`; return its descriptor."""
+    config.LOCKS_HOME.mkdir(parents=True, exist_ok=True)
+    path = config.LOCKS_HOME / f"{name}.lock"
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(
+                        f"lock '{name}' is held by another process; "
+                        f"gave up waiting for '{path}'"
+                    )
+                if not waiting:
+                    logger.info(f"waiting for another process to release '{path}'")
+                    waiting = True
+                time.sleep(POLL_INTERVAL)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+@contextlib.contextmanager
+def lock(name: str, timeout: float = TIMEOUT) -> Iterator[None]:
+    """Hold the lock called `name` for the duration of the block.
+
+    Args:
+        name: Stem of the lock file in `unverdad.config.LOCKS_HOME`.
+        timeout: Seconds to wait for other processes and threads; 0 fails at once.
+
+    Raises:
+        LockTimeout: The lock was not released within `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+    thread_lock = __thread_lock(name)
+    if not thread_lock.acquire(timeout=max(timeout, 0)):
+        raise LockTimeout(f"lock '{name}' is held by another operation")
+    try:
+        with __guard:
+            fd, count = __held.get(name, (-1, 0))
+        if count == 0:
+            fd = __flock(name, deadline)
+        with __guard:
+            __held[name] = (fd, count + 1)
+        try:
+            yield
+        finally:
+            with __guard:
+                fd, count = __held.pop(name)
+                if count > 1:
+                    __held[name] = (fd, count - 1)
+            if count == 1:
+                os.close(fd)
+    finally:
+        thread_lock.release()
+
+
+def game_lock(
+    game_id: uuid.UUID, timeout: float = TIMEOUT
+) -> contextlib.AbstractContextManager[None]:
+    """Hold the lock of `game_id` for the duration of the block; see `lock()`."""
+    return lock(str(game_id), timeout)
+
+
+def cache_lock(timeout: float = TIMEOUT) -> contextlib.AbstractContextManager[None]:
+    """Hold the lock of the local cache tier for the duration of the block."""
+    return lock(CACHE_LOCK_NAME, timeout)
@@ -0,0 +1,101 @@
+"""Check that `.pak` and `.sig` files look like what the game expects.
+
+An Unreal Engine pak ends with a fixed size footer holding a magic number, the
+format version, and the offset and size of the index of the pak. Its exact length
+depends on the version, so the last `FOOTER_SEARCH` bytes are read with one seek
+and searched for the magic number. A truncated download loses its footer, and an
+unrelated file has none, so both are rejected without reading the rest of the file.
+
+`.sig` files are only checked for a plausible size; many mods ship a signature
+copied from another pak, which the game accepts.
+"""
+
+import concurrent.futures
+import dataclasses
+import os
+import pathlib
+import struct
+from typing import Iterable, Optional
+
+from unverdad import transfer
+
+MAGIC: int = 0x5A6F12E1
+__MAGIC_BYTES = struct.pack("<I", MAGIC)
+__FIELDS = struct.Struct("<iqq")
+"""Version, index offset, and index size, right after the magic number."""
+FOOTER_SEARCH: int = 512
+"""Bytes read from the end of a pak to find its footer."""
+VERSIONS: range = range(1, 12)
+"""Pak format versions which are accepted."""
+SIG_MAX_SIZE: int = 16 << 20
+"""Largest plausible `.sig`; signatures hold 4 bytes per 64 KiB of their pak."""
+
+
+@dataclasses.dataclass(frozen=True)
+class PakFooter:
+    """
+    Attributes:
+        version: Format version of the pak.
+        index_offset: Byte offset of the index.
+        index_size: Size of the index in bytes.
+    """
+
+    version: int
+    index_offset: int
+    index_size: int
+
+
+def read_footer(path: pathlib.Path) -> PakFooter:
+    """Read the footer of the pak at `path`.
+
+    Raises:
+        ValueError: The file has no valid footer.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - FOOTER_SEARCH)
+        f.seek(start)
+        tail = f.read()
+    reason = "no pak footer; the file is truncated or is not a pak"
+    pos = tail.rfind(__MAGIC_BYTES)
+    while pos >= 0:
+        fields = tail[pos + len(__MAGIC_BYTES) :][: __FIELDS.size]
+        if len(fields) == __FIELDS.size:
+            version, index_offset, index_size = __FIELDS.unpack(fields)
+            if version not in VERSIONS:
+                reason = f"unsupported pak version {version}"
+            elif index_offset < 0 or index_size <= 0:
+                reason = f"invalid index at {index_offset} of {index_size} bytes"
+            elif index_offset + index_size > start + pos:
+                reason = (
+                    f"index at {index_offset} of {index_size} bytes is past the end "
+                    f"of the data; the file is truncated"
+                )
+            else:
+                return PakFooter(version, index_offset, index_size)
+        pos = tail.rfind(__MAGIC_BYTES, 0, pos)
+    raise ValueError(reason)
+
+
+def check_pair(pak_path: pathlib.Path, sig_path: pathlib.Path) -> Optional[str]:
+    """Return why the pair is invalid, or None if it looks valid."""
+    try:
+        read_footer(pak_path)
+        sig_size = sig_path.stat().st_size
+    except (OSError, ValueError) as e:
+        return f"'{pak_path}': {e}"
+    if sig_size == 0:
+        return f"'{sig_path}' is empty"
+    if sig_size > SIG_MAX_SIZE:
+        return f"'{sig_path}' is too large to be a signature"
+    return None
+
+
+def check_pairs(
+    pairs: Iterable[tuple[pathlib.Path, pathlib.Path]],
+    workers: int = transfer.DEFAULT_WORKERS,
+) -> list[str]:
+    """Check each pair with `check_pair()` in parallel; return every problem found."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda pair: check_pair(*pair), pairs)
+        return [x for x in results if x is not None]
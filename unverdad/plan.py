@@ -0,0 +1,269 @@
+"""Install plans: every directory and file copy an install will perform.
+
+Plans are computed from the database without touching the destination, so they can
+be printed by `install --dry`, saved with `to_json()` and applied later, or applied
+as is. Each copy carries the size and modification time of its source when it was
+planned, so sources which changed since are detected with `is_stale()`.
+`estimate()` measures what a plan would write against the free space of each
+destination filesystem, so an install that cannot fit is refused before anything
+is written.
+"""
+
+import dataclasses
+import errno
+import json
+import logging
+import os
+import pathlib
+import shutil
+import uuid
+from typing import Iterator, Optional
+
+from unverdad import transfer
+
+logger = logging.getLogger(__name__)
+
+VERSION: int = 1
+"""Format version written by `to_json()`; other versions are rejected."""
+LINK_MODES: list[str] = ["copy", "hardlink", "symlink"]
+"""How `apply()` places files. Hard links fall back to symlinks across filesystems."""
+
+
+@dataclasses.dataclass
+class CopyOp:
+    """Copy `src` to `dst` unless `dst` exists.
+
+    `pak_id` is the pak `src` belongs to, recorded in the install manifest.
+    `size` and `mtime_ns` are the fingerprint of `src` when the plan was made.
+    """
+
+    src: pathlib.Path
+    dst: pathlib.Path
+    pak_id: Optional[uuid.UUID] = None
+    size: int = 0
+    mtime_ns: int = 0
+
+    def is_stale(self) -> bool:
+        """Whether `src` is missing or no longer matches its fingerprint."""
+        try:
+            stat = self.src.stat()
+        except FileNotFoundError:
+            return True
+        return stat.st_size != self.size or stat.st_mtime_ns != self.mtime_ns
+
+
+@dataclasses.dataclass
+class InstallPlan:
+    """
+    Attributes:
+        game_id: Game the plan installs into.
+        link: One of `LINK_MODES`.
+        rmtrees: Directories to remove with their contents, before anything else.
+            A symlink is removed without following it.
+        mkdirs: Directories to create, including missing parents.
+        copies: Files to copy, in no particular order.
+    """
+
+    game_id: Optional[uuid.UUID] = None
+    link: str = "copy"
+    rmtrees: list[pathlib.Path] = dataclasses.field(default_factory=list)
+    mkdirs: list[pathlib.Path] = dataclasses.field(default_factory=list)
+    copies: list[CopyOp] = dataclasses.field(default_factory=list)
+
+    def describe(self) -> Iterator[str]:
+        """Yield shell-like lines equivalent to the plan."""
+        command = {"copy": "cp -n", "hardlink": "ln", "symlink": "ln -s"}[self.link]
+        for dir in self.rmtrees:
+            yield f"rm -r '{dir}'"
+        for dir in self.mkdirs:
+            yield f"mkdir -p '{dir}'"
+        for op in self.copies:
+            yield f"{command} '{op.src}' '{op.dst}'"
+
+
+def to_json(plan: InstallPlan) -> str:
+    """Serialize `plan`; copies are stored as arrays to keep large plans compact."""
+    data = {
+        "version": VERSION,
+        "game_id": None if plan.game_id is None else str(plan.game_id),
+        "link": plan.link,
+        "rmtrees": [str(x) for x in plan.rmtrees],
+        "mkdirs": [str(x) for x in plan.mkdirs],
+        "copies": [
+            [
+                str(op.src),
+                str(op.dst),
+                None if op.pak_id is None else str(op.pak_id),
+                op.size,
+                op.mtime_ns,
+            ]
+            for op in plan.copies
+        ],
+    }
+    return json.dumps(data, separators=(",", ":"))
+
+
+def from_json(text: str) -> InstallPlan:
+    """Inverse of `to_json()`.
+
+    Raises:
+        ValueError: `text` is not a plan of the current `VERSION`.
+    """
+    try:
+        data = json.loads(text)
+        if data.get("version") != VERSION:
+            raise ValueError(
+                f"plan version {data.get('version')} is not supported; "
+                f"expected {VERSION}"
+            )
+        if data["link"] not in LINK_MODES:
+            raise ValueError(f"unknown link mode '{data['link']}'")
+        return InstallPlan(
+            game_id=uuid.UUID(data["game_id"]),
+            link=data["link"],
+            rmtrees=[pathlib.Path(x) for x in data["rmtrees"]],
+            mkdirs=[pathlib.Path(x) for x in data["mkdirs"]],
+            copies=[
+                CopyOp(
+                    src=pathlib.Path(src),
+                    dst=pathlib.Path(dst),
+                    pak_id=None if pak_id is None else uuid.UUID(pak_id),
+                    size=size,
+                    mtime_ns=mtime_ns,
+                )
+                for src, dst, pak_id, size, mtime_ns in data["copies"]
+            ],
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"malformed plan: {e!r}") from e
+
+
+@dataclasses.dataclass
+class Estimate:
+    """What applying a plan would write.
+
+    Attributes:
+        files: Files which do not exist yet.
+        size: Bytes of file data to write, which is 0 unless copying.
+        needed: Bytes to allocate, rounded up to whole blocks, by filesystem.
+        free: Bytes available to unprivileged users, by filesystem.
+            Filesystems are keyed by an existing directory on them.
+    """
+
+    files: int = 0
+    size: int = 0
+    needed: dict[pathlib.Path, int] = dataclasses.field(default_factory=dict)
+    free: dict[pathlib.Path, int] = dataclasses.field(default_factory=dict)
+
+    def shortfalls(self) -> Iterator[str]:
+        """Yield a message for each filesystem without enough free space."""
+        for mount, needed in self.needed.items():
+            if needed > self.free[mount]:
+                yield (
+                    f"'{mount}' needs {transfer.format_size(needed)} "
+                    f"but has {transfer.format_size(self.free[mount])} free"
+                )
+
+    def seconds(self, rate: Optional[float]) -> Optional[float]:
+        """Time to write `size` at `rate` bytes per second, if the rate is known."""
+        if not self.size:
+            return 0.0
+        return self.size / rate if rate else None
+
+
+def __existing_dir(path: pathlib.Path) -> pathlib.Path:
+    while not path.is_dir():
+        path = path.parent
+    return path
+
+
+def estimate(plan: InstallPlan) -> Estimate:
+    """Measure `plan` against the filesystems it writes to, without writing."""
+    result = Estimate()
+    filesystems: dict[int, tuple[pathlib.Path, int]] = {}
+    parents: dict[pathlib.Path, tuple[pathlib.Path, int]] = {}
+    for op in plan.copies:
+        if op.dst.exists() or op.dst.is_symlink():
+            continue
+        result.files += 1
+        if plan.link != "copy":
+            continue
+        result.size += op.size
+        if op.dst.parent not in parents:
+            dir = __existing_dir(op.dst.parent)
+            device = dir.stat().st_dev
+            if device not in filesystems:
+                stat = os.statvfs(dir)
+                filesystems[device] = (dir, stat.f_frsize)
+                result.free[dir] = stat.f_bavail * stat.f_frsize
+                result.needed[dir] = 0
+            parents[op.dst.parent] = filesystems[device]
+        mount, block = parents[op.dst.parent]
+        result.needed[mount] += -(-op.size // block) * block
+    return result
+
+
+def __link(src: pathlib.Path, dst: pathlib.Path, mode: str) -> None:
+    """Link `dst` to `src` unless `dst` exists, like `copy_file()`."""
+    try:
+        if mode == "hardlink":
+            try:
+                os.link(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                os.symlink(src, dst)
+        else:
+            os.symlink(src, dst)
+    except FileExistsError:
+        logger.debug("'%s' exists; skipped", dst)
+
+
+def apply(
+    plan: InstallPlan,
+    limiter: Optional[transfer.TokenBucket] = None,
+    low_priority: bool = False,
+    done: Optional[list[CopyOp]] = None,
+) -> int:
+    """Perform `plan`, copying files in parallel with `transfer.copy_files()`.
+
+    Args:
+        done: Receives each copy of `plan` whose destination is in place, also when
+            a later one fails, so a partial install can still be recorded.
+
+    Returns:
+        Number of bytes copied, which is 0 when linking.
+
+    Raises:
+        OSError: A directory, copy, or link failed; the rest of the copies were
+            still attempted.
+    """
+    for dir in plan.rmtrees:
+        if dir.is_symlink():
+            dir.unlink()
+        elif dir.is_dir():
+            shutil.rmtree(dir)
+        else:
+            logger.warning("tried to remove '%s' but is not a directory", dir)
+            continue
+        logger.info("removed '%s'", dir)
+    for dir in plan.mkdirs:
+        dir.mkdir(parents=True, exist_ok=True)
+    if plan.link != "copy":
+        for op in plan.copies:
+            __link(op.src, op.dst, plan.link)
+            if done is not None:
+                done.append(op)
+        logger.info(f"linked {len(plan.copies)} files")
+        return 0
+    jobs = [(op.src, op.dst) for op in plan.copies]
+    indexes: list[int] = []
+    try:
+        copied = transfer.copy_files(
+            jobs, limiter=limiter, low_priority=low_priority, done=indexes
+        )
+    finally:
+        if done is not None:
+            done.extend(plan.copies[i] for i in indexes)
+    logger.info(f"copied {transfer.format_size(copied)} in {len(jobs)} files")
+    return copied
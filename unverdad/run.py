@@ -7,12 +7,24 @@
 """
 
 import argparse
+import atexit
 import logging
+import logging.handlers
+import os
 import pathlib
+import queue
 import sys
 from typing import Optional
 
-from unverdad import config, errors, subcommands
+from unverdad import config, daemon, errors, locks, subcommands
+
+LOG_MAX_BYTES: int = 1 << 20
+"""Size at which the log file is rotated."""
+LOG_BACKUPS: int = 3
+"""Number of rotated log files kept next to the log file."""
+
+__console_h: Optional[logging.Handler] = None
+__listener: Optional[logging.handlers.QueueListener] = None
 
 
 def mkdir_homes() -> None:
@@ -34,49 +46,64 @@ def init_logging(
 ) -> None:
     """Initialize logging
 
+    Console output is written synchronously, so it stays in order with printed
+    output. Records for `log_file` are put on a queue and written by a
+    `logging.handlers.QueueListener` thread, so logging in loops never waits on the
+    disk. The file is rotated once it reaches `LOG_MAX_BYTES`.
+
+    Calling this again only changes the level; handlers are never added twice.
+
     :param `level`: Level for `root_logger`.
     :param `root_logger`: Logger which will be configured; if None, use the root logger.
     :param `log_file`: Path to file in which to output logs. The file will be created
         if it does not exist, and its parent is an existing directory.
     """
+    global __console_h, __listener
     if root_logger is None:
         root_logger = logging.getLogger()
     root_logger.setLevel(level)
-    console_h = logging.StreamHandler(sys.stdout)
-    console_h.setLevel(level)
-    console_h.setFormatter(logging.Formatter())
-    root_logger.addHandler(console_h)
+    if __console_h is not None and __console_h in root_logger.handlers:
+        __console_h.setLevel(level)
+        return
+    __console_h = logging.StreamHandler(sys.stdout)
+    __console_h.setLevel(level)
+    __console_h.setFormatter(logging.Formatter())
+    root_logger.addHandler(__console_h)
     if log_file is None:
-        return root_logger.warning(f"Log file is not being used")
+        return root_logger.warning("Log file is not being used")
     if not log_file.parent.is_dir() or (log_file.exists() and not log_file.is_file()):
-        return root_logger.warning(f"Log file cannot be created at '{log_file}'")
-    file_h = logging.FileHandler(filename=log_file, mode="a")
+        return root_logger.warning("Log file cannot be created at '%s'", log_file)
+    file_h = logging.handlers.RotatingFileHandler(
+        filename=log_file,
+        mode="a",
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUPS,
+        delay=True,
+    )
     file_h.setLevel(logging.DEBUG)
     file_h.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s"))
-    root_logger.addHandler(file_h)
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    if __listener is not None:
+        __listener.stop()
+    __listener = logging.handlers.QueueListener(
+        log_queue, file_h, respect_handler_level=True
+    )
+    __listener.start()
+    atexit.register(__listener.stop)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
 
-def parse_args(
-    root_logger: Optional[logging.Logger] = None,
-    args: Optional[list[str]] = None,
-) -> errors.Result[None]:
-    """Parse args to configure and perform user chosen actions.
+def build_parser() -> argparse.ArgumentParser:
+    """Create an `argparse.ArgumentParser` for every subcommand.
 
-    Creates, configures, and runs an `argparse.ArgumentParser`.
-    According to the parsed arguments, configure logging and run associated
-    hook functions.
-
-    :param `root_logger`: Logger which is configured.
-    :param `args`: Forwarded directly to `argparse.ArgumentParser.parse_args()`.
-        Default is `sys.argv`.
-
-    :return: Return the `unverdad.errors.Result` from the corresponding subcommand.
+    Parsed namespaces contain `hook`, the function of the chosen subcommand;
+    `subparser`, the parser of that subcommand; and `parser`, this parser.
     """
     parser = argparse.ArgumentParser(
         prog=config.APP_NAME,
         description="manage mods for Guilty Gear Strive",
     )
-    parser.set_defaults(logging_level=logging.WARNING)
+    parser.set_defaults(logging_level=logging.WARNING, parser=parser)
     verbosity_group = parser.add_mutually_exclusive_group()
     verbosity_group.add_argument(
         "-v",
@@ -101,6 +128,14 @@ def parse_args(
         const=logging.ERROR,
         dest="logging_level",
     )
+    parser.add_argument(
+        "--lock-timeout",
+        help="seconds to wait for another process changing the same game. "
+        f"default is {locks.TIMEOUT:g}",
+        type=float,
+        default=locks.TIMEOUT,
+        metavar="SECONDS",
+    )
     subparsers = parser.add_subparsers(
         title="subcommands",
         description="control mod installation",
@@ -109,7 +144,33 @@ def parse_args(
     for subcmd in subcommands.as_list():
         p = subcmd.attach(subparsers)
         p.set_defaults(hook=subcmd.hook, subparser=p)
-    namespace = parser.parse_args(args=args)
+    return parser
+
+
+def parse_args(
+    root_logger: Optional[logging.Logger] = None,
+    args: Optional[list[str]] = None,
+) -> errors.Result[None]:
+    """Parse args to configure and perform user chosen actions.
+
+    Creates, configures, and runs an `argparse.ArgumentParser`.
+    According to the parsed arguments, configure logging and run associated
+    hook functions.
+
+    :param `root_logger`: Logger which is configured.
+    :param `args`: Forwarded directly to `argparse.ArgumentParser.parse_args()`.
+        Default is `sys.argv`.
+
+    :return: Return the `unverdad.errors.Result` from the corresponding subcommand.
+    """
+    return run_namespace(build_parser().parse_args(args=args), root_logger)
+
+
+def run_namespace(
+    namespace: argparse.Namespace,
+    root_logger: Optional[logging.Logger] = None,
+) -> errors.Result[None]:
+    """Configure logging and run the hook of an already parsed `namespace`."""
     init_logging(
         level=namespace.logging_level,
         root_logger=root_logger,
@@ -118,5 +179,28 @@ def parse_args(
     return namespace.hook(namespace)
 
 
+def __forwardable(namespace: argparse.Namespace) -> bool:
+    """True if the subcommand of `namespace` may run in a `serve` daemon.
+
+    `serve` itself always runs here, and so does anything reading this process's
+    stdin, which the daemon cannot see.
+    """
+    if namespace.hook is subcommands.serve.hook:
+        return False
+    return not any(value is sys.stdin for value in vars(namespace).values())
+
+
 def main() -> int:
-    return parse_args().code
+    """Entry point; forward to a running `serve` daemon when possible.
+
+    The arguments are parsed here first, so usage errors never reach the daemon,
+    and the current directory is sent along for relative paths.
+    Set the environment variable `UNVERDAD_NO_DAEMON` to always run in-process.
+    """
+    argv = sys.argv[1:]
+    namespace = build_parser().parse_args(args=argv)
+    if __forwardable(namespace) and not os.getenv("UNVERDAD_NO_DAEMON"):
+        code = daemon.forward(config.SOCKET_FILE, argv, cwd=pathlib.Path.cwd())
+        if code is not None:
+            return code
+    return run_namespace(namespace).code
@@ -0,0 +1,136 @@
+"""Find mod files in directory trees and zip archives.
+
+Each directory is read once with `os.scandir()`, relying on the file type cached in
+each `os.DirEntry` instead of statting every path. Archives are scanned from their
+central directory without reading any member.
+"""
+
+import concurrent.futures
+import dataclasses
+import os
+import pathlib
+import posixpath
+import zipfile
+from typing import Iterable
+
+PAK_SUFFIX = ".pak"
+SIG_SUFFIX = ".sig"
+
+
+@dataclasses.dataclass
+class ScanResult:
+    """Files found by `scan_paks()`.
+
+    Attributes:
+        pairs: `.pak` and `.sig` files with the same stem in the same directory.
+        unpaired: `.pak` or `.sig` files missing their counterpart.
+        ignored: Number of files which are neither `.pak` nor `.sig`.
+    """
+
+    pairs: list[tuple[pathlib.Path, pathlib.Path]] = dataclasses.field(
+        default_factory=list
+    )
+    unpaired: list[pathlib.Path] = dataclasses.field(default_factory=list)
+    ignored: int = 0
+
+
+def scan_paks(root: pathlib.Path) -> ScanResult:
+    """Walk `root` once, pairing `.pak` and `.sig` files by stem.
+
+    Symlinked directories are not followed.
+    """
+    result = ScanResult()
+    stack = [os.fspath(root)]
+    while stack:
+        stems: dict[str, list[str | None]] = {}
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                stem, suffix = os.path.splitext(entry.name)
+                if suffix not in (PAK_SUFFIX, SIG_SUFFIX) or not entry.is_file():
+                    result.ignored += 1
+                    continue
+                slot = stems.setdefault(stem, [None, None])
+                slot[suffix == SIG_SUFFIX] = entry.path
+        __collect(stems.values(), result)
+    return result
+
+
+@dataclasses.dataclass
+class TreeScan:
+    """Everything found by `scan_tree()`, as posix paths relative to its root.
+
+    Attributes:
+        files: Size of each file or symlink, which is not followed.
+        dirs: Every directory below the root.
+    """
+
+    files: dict[str, int] = dataclasses.field(default_factory=dict)
+    dirs: list[str] = dataclasses.field(default_factory=list)
+
+
+def __scan_dir(path: str) -> list[tuple[str, bool, int]]:
+    result = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            size = 0 if is_dir else entry.stat(follow_symlinks=False).st_size
+            result.append((entry.path, is_dir, size))
+    return result
+
+
+def scan_tree(root: pathlib.Path, workers: int = 4) -> TreeScan:
+    """List every file under `root`, reading up to `workers` directories at once.
+
+    Symlinked directories are not followed. A missing `root` is empty.
+    """
+    result = TreeScan()
+    if not root.is_dir():
+        return result
+    top = os.fspath(root)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(__scan_dir, top)}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                for path, is_dir, size in future.result():
+                    relative = pathlib.PurePath(os.path.relpath(path, top)).as_posix()
+                    if is_dir:
+                        result.dirs.append(relative)
+                        pending.add(pool.submit(__scan_dir, path))
+                    else:
+                        result.files[relative] = size
+    return result
+
+
+def scan_zip(archive: zipfile.ZipFile) -> ScanResult:
+    """Pair `.pak` and `.sig` members of `archive` by directory and stem.
+
+    Paths in the result are member names, relative to the root of the archive.
+    """
+    result = ScanResult()
+    stems: dict[tuple[str, str], list[str | None]] = {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        dir, name = posixpath.split(info.filename)
+        stem, suffix = posixpath.splitext(name)
+        if suffix not in (PAK_SUFFIX, SIG_SUFFIX):
+            result.ignored += 1
+            continue
+        slot = stems.setdefault((dir, stem), [None, None])
+        slot[suffix == SIG_SUFFIX] = info.filename
+    __collect(stems.values(), result)
+    return result
+
+
+def __collect(stems: Iterable[list[str | None]], result: ScanResult) -> None:
+    for pak_path, sig_path in stems:
+        if pak_path is not None and sig_path is not None:
+            result.pairs.append((pathlib.Path(pak_path), pathlib.Path(sig_path)))
+        else:
+            result.unpaired.append(pathlib.Path(pak_path or sig_path or ""))
@@ -1,7 +1,7 @@
 import argparse
-from typing import Protocol
+from typing import Optional, Protocol
 
-from unverdad import errors
+from unverdad import config, errors, transfer
 
 
 class SubCommand(Protocol):
@@ -19,3 +19,48 @@ class SubCommand(Protocol):
         :param args: Namespace object resulting from the parsed args.
         """
         ...
+
+
+def size_type(text: str) -> int:
+    """Argument type parsing a byte count with `transfer.parse_size()`."""
+    try:
+        return transfer.parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_throttle_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add `--max-rate` and `--low-priority`; see `throttle()` for their defaults."""
+    throttle_opt = parser.add_argument_group(
+        title="throttling",
+        description="limit the impact on other programs using the disk. "
+        "defaults are taken from the install table of the config.",
+    )
+    throttle_opt.add_argument(
+        "--max-rate",
+        help="maximum bytes written per second, such as 200M. 0 is unlimited.",
+        type=size_type,
+    )
+    throttle_opt.add_argument(
+        "--low-priority",
+        help="evict copied data from the page cache while installing",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+    )
+
+
+def throttle(args) -> errors.Result[tuple[int, bool]]:
+    """Max rate and low priority from `args`, or from the install table of the config.
+
+    :param args: Namespace parsed with arguments from `add_throttle_arguments()`.
+    """
+    max_rate: Optional[int] = args.max_rate
+    if max_rate is None:
+        try:
+            max_rate = transfer.parse_size(config.SETTINGS.install.max_rate)
+        except ValueError as e:
+            return errors.ErrorResult(f"invalid install.max_rate in config: {e}")
+    low_priority = args.low_priority
+    if low_priority is None:
+        low_priority = config.SETTINGS.install.low_priority
+    return errors.GoodResult((max_rate, low_priority))
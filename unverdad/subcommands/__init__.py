@@ -5,9 +5,45 @@ Designed to be imported under a namespace.
 """
 
 from unverdad.subcommand import SubCommand
-from unverdad.subcommands import config, import_mods, install, mod_registry, uninstall
+from unverdad.subcommands import (
+    apply,
+    batch,
+    category,
+    check,
+    config,
+    du,
+    fetch,
+    gc,
+    import_mods,
+    install,
+    mod_registry,
+    profile,
+    search,
+    serve,
+    status,
+    sync_metadata,
+    uninstall,
+)
 
 
 def as_list() -> list[SubCommand]:
     """Return a new list of all subcommand modules."""
-    return [config, import_mods, install, mod_registry, uninstall]
+    return [
+        apply,
+        batch,
+        category,
+        check,
+        config,
+        du,
+        fetch,
+        gc,
+        import_mods,
+        install,
+        mod_registry,
+        profile,
+        search,
+        serve,
+        status,
+        sync_metadata,
+        uninstall,
+    ]
@@ -0,0 +1,52 @@
+"""Apply a plan written by `install --plan-out` or `uninstall --plan-out`.
+"""
+
+import argparse
+import logging
+import pathlib
+
+from unverdad import api, errors, plan, subcommand
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "apply",
+        help="apply a saved install or uninstall plan",
+        description="perform the operations of a plan file. copies whose source "
+        "changed since the plan was made are skipped with a warning, and the command "
+        "fails once the rest is applied.",
+    )
+    parser.add_argument(
+        "plan",
+        help="plan file written with --plan-out",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--strict",
+        help="apply nothing if any source changed since the plan was made",
+        action="store_true",
+    )
+    subcommand.add_throttle_arguments(parser)
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    try:
+        saved_plan = plan.from_json(args.plan.read_text())
+    except (OSError, ValueError) as e:
+        return errors.ErrorResult(f"could not read plan '{args.plan}': {e}")
+    throttle = subcommand.throttle(args)
+    if errors.is_error(throttle):
+        return errors.ErrorResult(throttle.message)
+    max_rate, low_priority = throttle.value
+    result = api.Library(lock_timeout=args.lock_timeout).apply_plan(
+        saved_plan,
+        max_rate=max_rate,
+        low_priority=low_priority,
+        strict=args.strict,
+    )
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
+    return errors.GoodResult()
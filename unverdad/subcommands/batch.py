@@ -0,0 +1,112 @@
+"""Run many subcommands in one process and one transaction.
+"""
+
+import argparse
+import logging
+import shlex
+from typing import Any
+
+from unverdad import errors
+from unverdad.data import database
+from unverdad.subcommands import install
+
+logger = logging.getLogger(__name__)
+
+
+class _LineFailed(Exception):
+    """Raised inside a line's savepoint to undo its changes."""
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "batch",
+        help="run subcommands read from a file",
+        description="run one subcommand per line, such as 'mod-registry -n NAME --enable'. "
+        "database changes are committed together at the end; a failing line only "
+        "undoes its own changes. install lines are combined and run once at the end. "
+        "blank lines and lines starting with '#' are skipped.",
+    )
+    parser.add_argument(
+        "file",
+        help="file of subcommands, or '-' for stdin",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default="-",
+    )
+    return parser
+
+
+def __install_key(namespace: argparse.Namespace) -> tuple[Any, ...]:
+    """Install lines with the same key can be run as one install."""
+    return (
+        namespace.game_id,
+        namespace.game_name,
+        namespace.dry,
+        tuple(namespace.categories),
+        namespace.max_rate,
+        namespace.low_priority,
+        namespace.link,
+        namespace.plan_out,
+    )
+
+
+def __report(lineno: int, result: errors.Result) -> None:
+    if errors.is_error(result):
+        print(f"{lineno}: error {result.code}: {result.message}")
+    else:
+        print(f"{lineno}: ok")
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    failed = 0
+    installs: dict[tuple[Any, ...], tuple[list[int], argparse.Namespace]] = {}
+    with args.file, con.batch():
+        for lineno, line in enumerate(args.file, start=1):
+            argv = shlex.split(line, comments=True)
+            if not argv:
+                continue
+            try:
+                namespace = args.parser.parse_args(argv)
+            except SystemExit:
+                failed += 1
+                __report(lineno, errors.ErrorResult("invalid arguments", 2))
+                continue
+            if namespace.hook is hook:
+                failed += 1
+                __report(lineno, errors.ErrorResult("batch cannot be nested"))
+                continue
+            if namespace.hook is install.hook:
+                key = __install_key(namespace)
+                if key in installs:
+                    installs[key][0].append(lineno)
+                    installs[key][1].mod_ids.extend(namespace.mod_ids)
+                else:
+                    # Lines without ids share argparse's default list; own a copy
+                    # before later lines extend it.
+                    namespace.mod_ids = list(namespace.mod_ids)
+                    installs[key] = ([lineno], namespace)
+                continue
+            logger.debug("%d: %s", lineno, argv)
+            result: errors.Result[None] = errors.GoodResult()
+            try:
+                with con:
+                    result = namespace.hook(namespace)
+                    if errors.is_error(result):
+                        raise _LineFailed()
+            except _LineFailed:
+                failed += 1
+            except (Exception, SystemExit) as e:
+                logger.debug("%d: %r", lineno, e)
+                failed += 1
+                result = errors.ErrorResult(f"{type(e).__name__}: {e}")
+            __report(lineno, result)
+    for linenos, namespace in installs.values():
+        logger.debug(f"install for lines {linenos}")
+        result = install.hook(namespace)
+        failed += len(linenos) if errors.is_error(result) else 0
+        for lineno in linenos:
+            __report(lineno, result)
+    if failed:
+        return errors.ErrorResult(f"{failed} lines failed", code=1)
+    return errors.GoodResult()
@@ -0,0 +1,174 @@
+"""Subcommand for the category hierarchy and mod categories.
+"""
+
+import argparse
+import logging
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad import errors
+from unverdad.data import builders, database, schema, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "category",
+        help="create categories and assign mods to them",
+        description="manage the category hierarchy. without an action, print every category.",
+    )
+    parser.add_argument(
+        "name",
+        help="name of the category",
+        nargs="?",
+    )
+    parser.add_argument(
+        "--parent",
+        help="name of the parent category used by --create and --move; "
+        "--move without it makes NAME a root category.",
+    )
+    action_opt = parser.add_argument_group(title="actions")
+    action_opt = action_opt.add_mutually_exclusive_group()
+    for flag, help in [
+        ("--create", "create category NAME"),
+        ("--delete", "delete category NAME and all of its descendants"),
+        ("--move", "change the parent of category NAME"),
+        ("--assign", "add the selected mods to category NAME"),
+        ("--unassign", "remove the selected mods from category NAME"),
+    ]:
+        action_opt.add_argument(
+            flag,
+            help=help,
+            action="store_const",
+            const=flag.removeprefix("--"),
+            dest="action",
+        )
+    mod_opt = parser.add_argument_group(title="mod selection")
+    mod_opt.add_argument(
+        "--mod-id",
+        "-m",
+        help="select MOD_ID",
+        action="append",
+        dest="mod_ids",
+        default=[],
+        type=uuid.UUID,
+    )
+    mod_opt.add_argument(
+        "--mod-name",
+        "-n",
+        help="select NAME of mod",
+        action="append",
+        dest="mod_names",
+        default=[],
+    )
+    return parser
+
+
+def __find_category(con: sqlite3.Connection, name: str) -> uuid.UUID | str:
+    rows = con.execute(
+        "SELECT category_id FROM category WHERE name = ?", [name]
+    ).fetchall()
+    match rows:
+        case []:
+            return f"no category named '{name}'"
+        case [row]:
+            return row["category_id"]
+        case _:
+            return f"'{name}' matches {len(rows)} categories"
+
+
+def __selected_mods(con: sqlite3.Connection, args) -> list[uuid.UUID]:
+    conditions = builders.ConditionBuilderNode(
+        combine_operator=builders.LogicalOperator.OR
+    )
+    for mod_id in args.mod_ids:
+        conditions._add_param(column_name="mod_id", column_value=mod_id)
+    for mod_name in args.mod_names:
+        conditions._add_param(column_name="name", column_value=mod_name)
+    if conditions.is_empty():
+        return []
+    sql_statement = f"SELECT mod_id FROM mod WHERE {conditions.render()}"
+    return [row["mod_id"] for row in con.execute(sql_statement, conditions.params())]
+
+
+def __on_list(con: sqlite3.Connection) -> None:
+    sql_statement = """
+        SELECT
+            category.category_id,
+            category.parent_id,
+            category.name,
+            COUNT(DISTINCT mod_category.mod_id) AS mod_count
+        FROM category
+        INNER JOIN category_closure ON category_closure.ancestor_id = category.category_id
+        LEFT JOIN mod_category ON mod_category.category_id = category_closure.descendant_id
+        GROUP BY category.category_id
+        ORDER BY category.name
+    """
+    children: dict[Optional[uuid.UUID], list] = {}
+    for row in con.execute(sql_statement):
+        children.setdefault(row["parent_id"], []).append(row)
+
+    def show(parent_id: Optional[uuid.UUID], depth: int) -> None:
+        for row in children.get(parent_id, []):
+            print(f"{"  " * depth}{row["name"]} ({row["mod_count"]} mods)")
+            show(row["category_id"], depth + 1)
+
+    show(None, 0)
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    if args.action is None:
+        __on_list(con=con)
+        return errors.GoodResult()
+    if args.name is None:
+        args.subparser.error(f"--{args.action} requires a category NAME")
+    parent_id = None
+    if args.parent:
+        match __find_category(con=con, name=args.parent):
+            case str(msg):
+                return errors.ErrorResult(msg)
+            case found:
+                parent_id = found
+    if args.action == "create":
+        category = tables.category.CategoryEntity(
+            category_id=schema.new_uuid(),
+            name=args.name,
+            parent_id=parent_id,
+        )
+        tables.category.insert_many(con, [category])
+        logger.info(f"created category '{category.name}'")
+        return errors.GoodResult()
+    match __find_category(con=con, name=args.name):
+        case str(msg):
+            return errors.ErrorResult(msg)
+        case found:
+            category_id = found
+    match args.action:
+        case "delete":
+            tables.category.delete_many(con, [category_id])
+        case "move":
+            try:
+                with con:
+                    con.execute(
+                        "UPDATE category SET parent_id = ? WHERE category_id = ?",
+                        [parent_id, category_id],
+                    )
+            except sqlite3.IntegrityError as e:
+                return errors.ErrorResult(f"cannot move '{args.name}': {e}")
+        case "assign" | "unassign":
+            entities = [
+                tables.mod_category.ModCategoryEntity(
+                    mod_id=mod_id,
+                    category_id=category_id,
+                )
+                for mod_id in __selected_mods(con=con, args=args)
+            ]
+            if args.action == "assign":
+                tables.mod_category.insert_many(con, entities)
+            else:
+                tables.mod_category.delete_many(con, entities)
+            logger.info(f"{args.action}ed {len(entities)} mods")
+    return errors.GoodResult()
@@ -0,0 +1,52 @@
+"""Verify derived data in the database.
+"""
+
+import argparse
+import logging
+
+from unverdad import errors
+from unverdad.data import database, tables, views
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "check",
+        help="verify the database is consistent",
+        description="compare the materialized mod and pak tables with the views "
+        "they are derived from, and the counters of each game with a fresh count.",
+    )
+    parser.add_argument(
+        "--repair",
+        help="rebuild tables which differ from what they are derived from",
+        action="store_true",
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    differing = []
+    for table, (missing, extra) in views.check_materialized(con).items():
+        if missing or extra:
+            differing.append(table)
+            logger.warning(f"{table}: {missing} rows missing, {extra} rows extra")
+        else:
+            logger.info(f"{table}: ok")
+    stale_games = tables.stats.check(con)
+    if stale_games:
+        differing.append(tables.stats.TABLE_NAME)
+        logger.warning(f"{tables.stats.TABLE_NAME}: {stale_games} games miscounted")
+    else:
+        logger.info(f"{tables.stats.TABLE_NAME}: ok")
+    if not differing:
+        return errors.GoodResult()
+    if not args.repair:
+        return errors.ErrorResult(
+            f"{", ".join(differing)} are inconsistent; rerun with --repair"
+        )
+    views.refresh_materialized(con)
+    tables.stats.rebuild(con)
+    logger.info(f"rebuilt {", ".join(differing)}")
+    return errors.GoodResult()
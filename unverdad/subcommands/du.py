@@ -0,0 +1,142 @@
+"""Report disk usage of imported mods.
+
+Sizes are summed from table pak_size, which imports fill in. The report itself
+never writes; `--measure` first records the sizes of paks imported before sizes
+were recorded, which reads `mods_home`.
+"""
+
+import argparse
+import logging
+import uuid
+
+from unverdad import api, errors, transfer
+from unverdad.data import database
+
+logger = logging.getLogger(__name__)
+
+MOD_SIZE = """
+    SELECT
+        mod.mod_id,
+        mod.game_id,
+        COUNT(pak.pak_id) AS paks,
+        COUNT(pak_size.pak_id) AS measured,
+        IFNULL(SUM(pak_size.pak_size + pak_size.sig_size), 0) AS size
+    FROM mod
+    LEFT JOIN pak USING (mod_id)
+    LEFT JOIN pak_size USING (pak_id)
+    WHERE :game_id IS NULL OR mod.game_id = :game_id
+    GROUP BY mod.mod_id
+"""
+"""Size of each mod, optionally of one game, and how many of its paks are measured."""
+
+REPORTS = {
+    "game": f"""
+        WITH mod_size AS ({MOD_SIZE})
+        SELECT
+            game.name,
+            IFNULL(SUM(mod_size.size), 0) AS size
+        FROM game
+        LEFT JOIN mod_size USING (game_id)
+        WHERE :game_id IS NULL OR game.game_id = :game_id
+        GROUP BY game.game_id
+    """,
+    "mod": f"""
+        WITH mod_size AS ({MOD_SIZE})
+        SELECT mod.name, mod_size.size
+        FROM mod_size
+        INNER JOIN mod USING (mod_id)
+    """,
+    # A mod in several categories of one subtree counts once towards its root.
+    "category": f"""
+        WITH
+            mod_size AS ({MOD_SIZE}),
+            in_category AS (
+                SELECT DISTINCT category_closure.ancestor_id, mod_category.mod_id
+                FROM mod_category
+                INNER JOIN category_closure
+                    ON category_closure.descendant_id = mod_category.category_id
+            )
+        SELECT
+            category.name,
+            SUM(mod_size.size) AS size
+        FROM in_category
+        INNER JOIN category ON category.category_id = in_category.ancestor_id
+        INNER JOIN mod_size USING (mod_id)
+        GROUP BY category.category_id
+    """,
+}
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "du",
+        help="report disk usage of imported mods",
+        description="sum the sizes of imported .pak and .sig files by game, mod, or "
+        "category, largest first. categories include their subcategories.",
+    )
+    game_opt = parser.add_argument_group(
+        title="game",
+        description="only count mods of one game. default is every game.",
+    )
+    game_opt = game_opt.add_mutually_exclusive_group()
+    game_opt.add_argument(
+        "--game-id",
+        help="internal id of the game",
+        type=uuid.UUID,
+    )
+    game_opt.add_argument(
+        "--game-name",
+        help="name of the game",
+    )
+    parser.add_argument(
+        "--by",
+        help="what to group sizes by. default is game",
+        choices=list(REPORTS),
+        default="game",
+    )
+    parser.add_argument(
+        "--limit",
+        help="show at most N rows",
+        type=int,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--measure",
+        help="first measure and record paks which have no size yet",
+        action="store_true",
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    if args.limit is not None and args.limit < 1:
+        args.subparser.error("--limit must be at least 1")
+    con = database.get_db()
+    library = api.Library(con=con)
+    game_id = None
+    if args.game_id or args.game_name:
+        result = library.find_game(game_id=args.game_id, game_name=args.game_name)
+        if errors.is_error(result):
+            return errors.ErrorResult(result.message)
+        game_id = result.value.game_id
+    if args.measure:
+        library.backfill_sizes()
+    sql_statement = f"{REPORTS[args.by]}\nORDER BY size DESC, name"
+    if args.limit is not None:
+        sql_statement += f"\nLIMIT {args.limit}"
+    for row in con.execute(sql_statement, {"game_id": game_id}):
+        print(f"{transfer.format_size(row["size"])}\t{row["name"]}")
+    size, unmeasured = con.execute(
+        f"""
+        SELECT IFNULL(SUM(size), 0), IFNULL(SUM(paks - measured), 0)
+        FROM ({MOD_SIZE})
+        """,
+        {"game_id": game_id},
+    ).fetchone()
+    print(f"{transfer.format_size(size)}\ttotal")
+    if unmeasured:
+        logger.warning(
+            f"{unmeasured} paks have no size and are not counted; "
+            "measure them with --measure"
+        )
+    return errors.GoodResult()
@@ -0,0 +1,117 @@
+"""Download a mod archive and import it.
+
+Downloads are kept under `unverdad.config.DOWNLOADS_HOME` until they complete, so
+running the same command again resumes an interrupted download.
+"""
+
+import argparse
+import logging
+import re
+import uuid
+import zipfile
+
+from unverdad import api, config, download, errors, subcommand
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(text: str) -> str:
+    if re.fullmatch(r"[0-9a-fA-F]{64}", text) is None:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a sha256 hex digest")
+    return text.lower()
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "fetch",
+        help="download and import a mod",
+        description="download a zip archive over several connections and import "
+        "its .pak and .sig files. interrupted downloads are resumed.",
+    )
+    parser.add_argument(
+        "url",
+        help="http or https url of the archive",
+    )
+    parser.add_argument(
+        "name",
+        help="name of the mod. default is the archive name without its suffix.",
+        nargs="?",
+    )
+    game_opt = parser.add_mutually_exclusive_group()
+    game_opt.add_argument(
+        "--game-id",
+        help="internal id of the game",
+        type=uuid.UUID,
+    )
+    game_opt.add_argument(
+        "--game-name",
+        help="name of the game",
+    )
+    parser.add_argument(
+        "--enabled",
+        help="determine if the imported mod is set as enabled",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+    parser.add_argument(
+        "--gb-mod-id",
+        help="id of the mod on gamebanana, used by sync-metadata",
+    )
+    parser.add_argument(
+        "--connections",
+        help=f"maximum concurrent connections. default is {download.DEFAULT_CONNECTIONS}",
+        type=int,
+        default=download.DEFAULT_CONNECTIONS,
+    )
+    verify_opt = parser.add_argument_group(
+        title="verification",
+        description="reject the download unless it matches",
+    )
+    verify_opt.add_argument(
+        "--size",
+        help="expected size, such as '120M' or '125829120'",
+        type=subcommand.size_type,
+    )
+    verify_opt.add_argument(
+        "--sha256",
+        help="expected sha256 hex digest",
+        type=_sha256,
+    )
+    parser.add_argument(
+        "--keep",
+        help="keep the downloaded archive in the downloads directory",
+        action="store_true",
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    if args.connections < 1:
+        args.subparser.error("--connections must be at least 1")
+    try:
+        archive = download.download(
+            args.url,
+            config.DOWNLOADS_HOME,
+            connections=args.connections,
+            size=args.size,
+            sha256=args.sha256,
+        )
+    except download.DownloadError as e:
+        return errors.ErrorResult(str(e))
+    if not zipfile.is_zipfile(archive):
+        return errors.ErrorResult(
+            f"'{archive}' is not a zip archive; extract it and use import instead"
+        )
+    result = api.Library(lock_timeout=args.lock_timeout).import_archive(
+        name=args.name or archive.stem,
+        archive=archive,
+        game_id=args.game_id,
+        game_name=args.game_name,
+        enabled=args.enabled,
+        gb_mod_id=args.gb_mod_id,
+    )
+    if errors.is_error(result):
+        return errors.ErrorResult(f"{result.message}; archive kept at '{archive}'")
+    if not args.keep:
+        archive.unlink()
+    return errors.GoodResult()
@@ -0,0 +1,98 @@
+"""Remove files which no pak points to.
+"""
+
+import argparse
+import logging
+import sqlite3
+import uuid
+
+from unverdad import api, config, errors, garbage, locks, transfer
+from unverdad.data import database, schema, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "gc",
+        help="remove orphaned mod files",
+        description="find files in mods_home and in the mods directory of each game "
+        "which belong to no imported pak, such as those of deleted mods or failed "
+        "imports, and remove them along with directories left empty. "
+        "files in the local cache which belong to no cached pak are removed too, "
+        "unless only one game is collected.",
+    )
+    parser.add_argument(
+        "--dry",
+        help="only list what would be removed",
+        action="store_true",
+    )
+    game_opt = parser.add_argument_group(
+        title="game",
+        description="only collect files of one game. default is every game.",
+    )
+    game_opt = game_opt.add_mutually_exclusive_group()
+    game_opt.add_argument(
+        "--game-id",
+        help="internal id of the game",
+        type=uuid.UUID,
+    )
+    game_opt.add_argument(
+        "--game-name",
+        help="name of the game",
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    if args.game_id or args.game_name:
+        result = api.Library(con=con).find_game(
+            game_id=args.game_id, game_name=args.game_name
+        )
+        if errors.is_error(result):
+            return errors.ErrorResult(result.message)
+        games = [result.value]
+    else:
+        games = list(
+            schema.select_as(
+                con, tables.game.GameEntity, "SELECT * FROM game ORDER BY name"
+            )
+        )
+    total = 0
+    for game in games:
+        # An import creates its files before its paks, which would look orphaned.
+        try:
+            with locks.game_lock(game.game_id, args.lock_timeout):
+                total += __collect(con, game, args.dry)
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+    if not (args.game_id or args.game_name):
+        # Fills of the cache create files before their rows.
+        try:
+            with locks.cache_lock(args.lock_timeout):
+                found = garbage.find_cache(con, config.SETTINGS.cache.path)
+                total += __remove(con, found, args.dry)
+        except locks.LockTimeout as e:
+            return errors.ErrorResult(str(e))
+    print(f"{transfer.format_size(total)}\t{"reclaimable" if args.dry else "freed"}")
+    return errors.GoodResult()
+
+
+def __collect(con: sqlite3.Connection, game: tables.game.GameEntity, dry: bool) -> int:
+    """Print the garbage of `game` and remove it unless `dry`; return its size."""
+    found = garbage.find(con, game, config.SETTINGS.mods_home)
+    return __remove(con, found, dry)
+
+
+def __remove(con: sqlite3.Connection, found: garbage.Garbage, dry: bool) -> int:
+    """Print `found` and remove it unless `dry`; return its size."""
+    for path, size in found.files:
+        print(f"{transfer.format_size(size)}\t{path}")
+    for dir in found.dirs:
+        print(f"-\t{dir}/")
+    if dry:
+        return found.size()
+    freed = garbage.remove(found)
+    tables.install_manifest.delete_many(con, [path for path, _ in found.files])
+    return freed
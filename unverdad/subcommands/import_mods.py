@@ -3,13 +3,9 @@
 import argparse
 import logging
 import pathlib
-import sqlite3
-import subprocess
 import uuid
-from typing import Optional
 
-from unverdad import config, errors
-from unverdad.data import database, schema, tables
+from unverdad import api, config, errors, scanner
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +27,13 @@ def _pak_path(path_str: str) -> tuple[pathlib.Path, pathlib.Path]:
     return (pak_path, sig_path)
 
 
+def _archive_path(path_str: str) -> pathlib.Path:
+    path = pathlib.Path(path_str).resolve()
+    if not path.is_file():
+        raise argparse.ArgumentTypeError(f"'{path_str}' is not a valid file")
+    return path
+
+
 def attach(subparsers):
     parser = subparsers.add_parser(
         "import",
@@ -71,73 +74,63 @@ def attach(subparsers):
         action="append",
         type=_pak_path,
     )
+    path_args.add_argument(
+        "--archive",
+        help="zip archive to extract .pak and .sig files from. directories are flattened. may not be combined with --dir or --file.",
+        type=_archive_path,
+    )
     parser.add_argument(
         "name",
         help="name to be used instead automatically naming",
         nargs="?",
     )
+    parser.add_argument(
+        "--update",
+        help="replace the files of existing mod MOD with the given ones, rewriting "
+        "only the changed parts of each .pak in mods_home and where it is installed. "
+        "paks are matched by file name. may not be combined with --archive.",
+        metavar="MOD",
+    )
     parser.add_argument(
         "--enabled",
         help="determine if the imported mod is set as enabled",
         action=argparse.BooleanOptionalAction,
         default=False,
     )
-    return parser
-
-
-def __game_id_name(
-    con: sqlite3.Connection,
-    name: Optional[str] = None,
-    game_id: Optional[uuid.UUID] = None,
-) -> tuple[uuid.UUID, str] | str:
-    sql_select = f"SELECT name, game_id FROM game WHERE "
-    if game_id:
-        sql_select += "game_id = ?"
-    elif name or config.SETTINGS.default_game.enabled:
-        sql_select += "match_name(name, ?)"
-    else:
-        return "Specify a game or enable a default game"
-    row = con.execute(
-        sql_select,
-        [game_id or name or config.SETTINGS.default_game.name],
-    ).fetchone()
-    if not row:
-        message = f"Could not find game with"
-        if game_id:
-            return f"{message} id '{game_id}'"
-        return f"{message} name '{name or config.SETTINGS.default_game.name}'"
-    return (row["game_id"], row["name"])
-
-
-def __copy_files(files: list[pathlib.Path], dir: pathlib.Path, dry: bool = False):
-    cmd = ["cp", "-n"] + files + [dir]
-    if dry:
-        print(*cmd)
-        return
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
+    parser.add_argument(
+        "--gb-mod-id",
+        help="id of the mod on gamebanana, used by sync-metadata",
     )
-    result.check_returncode()
+    return parser
 
 
 def hook(args) -> errors.Result[None]:
-    con = database.get_db()
-
-    match __game_id_name(con=con, game_id=args.game_id, name=args.game_name):
-        case (id, name):
-            game_id = id
-            game_name = name
-        case str(msg):
-            return errors.ErrorResult(msg)
-
+    if args.archive:
+        if args.dir or args.file:
+            args.subparser.error("--archive may not be combined with --dir or --file")
+        if args.update:
+            args.subparser.error("--update may not be combined with --archive")
+        return __import_archive(args)
     files = args.file or []
     dirs = args.dir or []
     for dir in dirs:
-        for pak_path in dir.glob("**/*.pak"):
-            files.append(_pak_path(pak_path))
-
+        scan = scanner.scan_paks(dir)
+        logger.debug(
+            f"'{dir}': {len(scan.pairs)} pairs, {len(scan.unpaired)} unpaired, {scan.ignored} ignored"
+        )
+        missing_sigs = []
+        for path in scan.unpaired:
+            if path.suffix == scanner.PAK_SUFFIX:
+                missing_sigs.append(path)
+            else:
+                logger.warning("skipping '%s' which has no matching .pak file", path)
+        if missing_sigs:
+            lines = "\n".join(f"  {path}" for path in missing_sigs)
+            return errors.ErrorResult(f"missing matching .sig files for:\n{lines}")
+        files.extend(scan.pairs)
+
+    if args.update:
+        return __update(args, files)
     mod_name = None
     if args.name:
         mod_name = args.name
@@ -148,33 +141,63 @@ def hook(args) -> errors.Result[None]:
     if mod_name is None:
         return errors.ErrorResult(f"mod name could not be determined")
 
-    parent_dir = config.SETTINGS.mods_home / game_name / mod_name
-    parent_dir = parent_dir.expanduser().resolve()
+    library = api.Library(lock_timeout=args.lock_timeout)
     if args.dry:
+        game_result = library.find_game(game_id=args.game_id, game_name=args.game_name)
+        if errors.is_error(game_result):
+            return errors.ErrorResult(game_result.message)
+        parent_dir = config.SETTINGS.mods_home / game_result.value.name / mod_name
+        parent_dir = parent_dir.expanduser().resolve()
         print(f"mkdir -p {parent_dir}")
-    else:
-        parent_dir.mkdir(parents=True)
-    mod = tables.mod.ModEntity(
-        mod_id=schema.new_uuid(),
-        game_id=game_id,
+        print("cp", "-n", *[file for pair in files for file in pair], parent_dir)
+        print(f"import mod '{mod_name}' with {len(files)} paks")
+        return errors.GoodResult()
+    result = library.import_mod(
         name=mod_name,
+        files=files,
+        game_id=args.game_id,
+        game_name=args.game_name,
         enabled=args.enabled,
+        gb_mod_id=args.gb_mod_id,
     )
-    paks = [
-        tables.pak.PakEntity(
-            pak_id=schema.new_uuid(),
-            mod_id=mod.mod_id,
-            pak_path=pak_path.name,
-            sig_path=sig_path.name,
-        )
-        for pak_path, sig_path in files
-    ]
-    files = [file for pak in files for file in pak]
-    __copy_files(files=files, dir=parent_dir, dry=args.dry)
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
+    return errors.GoodResult()
+
+
+def __import_archive(args) -> errors.Result[None]:
+    mod_name = args.name or args.archive.stem
+    library = api.Library(lock_timeout=args.lock_timeout)
     if args.dry:
-        print(f"import mod {mod} with paks {paks}")
+        print(f"extract mod '{mod_name}' from '{args.archive}'")
         return errors.GoodResult()
-    with con:
-        tables.mod.insert_many(con, [mod])
-        tables.pak.insert_many(con, paks)
+    result = library.import_archive(
+        name=mod_name,
+        archive=args.archive,
+        game_id=args.game_id,
+        game_name=args.game_name,
+        enabled=args.enabled,
+        gb_mod_id=args.gb_mod_id,
+    )
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
+    return errors.GoodResult()
+
+
+def __update(
+    args, files: list[tuple[pathlib.Path, pathlib.Path]]
+) -> errors.Result[None]:
+    if not files:
+        return errors.ErrorResult("no files to update the mod with")
+    if args.dry:
+        print(f"update mod '{args.update}' with {len(files)} paks")
+        return errors.GoodResult()
+    result = api.Library(lock_timeout=args.lock_timeout).update_mod(
+        name=args.update,
+        files=files,
+        game_id=args.game_id,
+        game_name=args.game_name,
+    )
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
     return errors.GoodResult()
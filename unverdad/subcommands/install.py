@@ -4,12 +4,12 @@
 import argparse
 import logging
 import pathlib
-import sqlite3
-import subprocess
 import uuid
 
-from unverdad import config, errors
-from unverdad.data import builders, database, views
+from unverdad import api, config, errors, plan, subcommand, transfer
+from unverdad.data import tables
+
+logger = logging.getLogger(__name__)
 
 
 def attach(subparsers) -> argparse.ArgumentParser:
@@ -35,9 +35,23 @@ def attach(subparsers) -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--dry",
-        help="do not run any commands; instead, print what would have been run.",
+        help="do not run any commands; instead, print what would have been run, "
+        "followed by the space it needs and an estimate of how long it would take.",
         action="store_true",
     )
+    parser.add_argument(
+        "--plan-out",
+        help="write the plan, with fingerprints of its sources, to FILE for the "
+        "apply subcommand instead of installing. the cache tier is not used.",
+        type=pathlib.Path,
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--link",
+        help="copy files or link them from mods_home. "
+        "default is taken from the install table of the config.",
+        choices=plan.LINK_MODES,
+    )
     parser.add_argument(
         "--mod-id",
         help="include mods by id",
@@ -46,85 +60,89 @@ def attach(subparsers) -> argparse.ArgumentParser:
         default=[],
         type=uuid.UUID,
     )
+    parser.add_argument(
+        "--category",
+        help="only install mods in CATEGORY or any of its descendants",
+        action="append",
+        dest="categories",
+        default=[],
+    )
+    subcommand.add_throttle_arguments(parser)
     return parser
 
 
-def __copy_files(
-    files: list[pathlib.Path],
-    dir: pathlib.Path,
-    dry: bool = False,
-):
-    cmd = ["cp", "-n", *files, dir]
-    if dry:
-        print(*[f"'{x}'" if isinstance(x, pathlib.Path) else f"{x}" for x in cmd])
-        return
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
+def __print_estimate(
+    library: api.Library,
+    install_plan: plan.InstallPlan,
+    max_rate: int,
+) -> errors.Result[None]:
+    """Print what `install_plan` would write as shell comments."""
+    estimate = plan.estimate(install_plan)
+    print(
+        f"# {estimate.files} new files, "
+        f"{transfer.format_size(estimate.size)} to write"
     )
-    result.check_returncode()
-
-
-def __mod_files(con: sqlite3.Connection, mod_id: uuid.UUID) -> list[pathlib.Path] | str:
-    mod_files = []
-    for pak_row in con.execute(f"SELECT * FROM v_pak WHERE mod_id = ?", [mod_id]):
-        pak = views.PakView(**pak_row)
-        pak_path = (config.SETTINGS.mods_home / pak.pak_path).expanduser().resolve()
-        sig_path = (config.SETTINGS.mods_home / pak.sig_path).expanduser().resolve()
-        if not pak_path.is_file() or not sig_path.is_file():
-            return f"'{pak_path}' and/or '{sig_path}' are not valid files"
-        mod_files.append(pak_path)
-        mod_files.append(sig_path)
-    return mod_files
+    for mount, needed in estimate.needed.items():
+        print(
+            f"# '{mount}': {transfer.format_size(needed)} needed, "
+            f"{transfer.format_size(estimate.free[mount])} free"
+        )
+    rate = tables.install_log.throughput(library.con)
+    if max_rate > 0:
+        rate = min(rate, max_rate) if rate else max_rate
+    seconds = estimate.seconds(rate)
+    if seconds is None:
+        print("# duration unknown until an unthrottled install has been measured")
+    elif seconds:
+        print(f"# about {seconds:.1f}s at {transfer.format_size(int(rate))}/s")
+    shortfalls = list(estimate.shortfalls())
+    if shortfalls:
+        return errors.ErrorResult(f"not enough space: {'; '.join(shortfalls)}")
+    return errors.GoodResult()
 
 
 def hook(args) -> errors.Result[None]:
-    logger = logging.getLogger(__name__)
     logger.info("install mods")
-    conditions = builders.ConditionBuilderBranch(
-        combine_operator=builders.LogicalOperator.AND
-    )
-    game_cond = conditions.add_subfilter(combine_operator=builders.LogicalOperator.AND)
-    if args.game_id:
-        game_cond._add_param(
-            column_name="game_id",
-            column_value=args.game_id,
-        )
-    elif args.game_name or config.SETTINGS.default_game.enabled:
-        game_cond._add_param_expr(
-            column_name="game_name",
-            expression="match_name({column}, {param})",
-            param_value=args.game_name or config.SETTINGS.default_game.name,
+    throttle = subcommand.throttle(args)
+    if errors.is_error(throttle):
+        return errors.ErrorResult(throttle.message)
+    max_rate, low_priority = throttle.value
+    link = args.link or config.SETTINGS.install.link
+    if link not in plan.LINK_MODES:
+        return errors.ErrorResult(f"invalid install.link in config: '{link}'")
+    library = api.Library(lock_timeout=args.lock_timeout)
+    if args.dry or args.plan_out:
+        result = library.plan_install(
+            game_id=args.game_id,
+            game_name=args.game_name,
+            mod_ids=args.mod_ids,
+            categories=args.categories,
+            link=link,
         )
-    else:
-        args.subparser.error(
-            "either enable default_game or use argument --game-id or --game-name"
-        )
-    mod_conds = conditions.add_subfilter(combine_operator=builders.LogicalOperator.OR)
-    mod_conds._add_param(column_name="enabled", column_value=True)
-    for mod_id in args.mod_ids:
-        mod_conds._add_param(column_name="mod_id", column_value=mod_id)
-    db = database.get_db()
-    sql_statement = f"SELECT * FROM v_mod\nWHERE {conditions.render()}"
-    logger.debug(f"{sql_statement=!s}")
-    result = errors.ErrorResult("Could not find any mods to install")
-    for mod_row in db.execute(sql_statement, conditions.params()):
-        mod = views.ModView(**mod_row)
-        destination = (mod.game_path / mod.game_path_offset).expanduser().resolve()
-        if not destination.is_dir():
-            return errors.ErrorResult(f"'{destination}' is not a valid directory")
-        destination = mod.install_path.expanduser().resolve()
-        if args.dry:
-            print(f"mkdir -p '{destination}'")
-        else:
-            destination.mkdir(parents=True, exist_ok=True)
-        match __mod_files(con=db, mod_id=mod.mod_id):
-            case str(msg):
-                return errors.ErrorResult(msg)
-            case list() as files:
-                mod_files = files
-        logger.info(f"installing mod '{mod.mod_name}' ({len(mod_files)} files)...")
-        __copy_files(files=mod_files, dir=destination, dry=args.dry)
-        result = errors.GoodResult()
-    return result
+        if errors.is_error(result):
+            return errors.ErrorResult(result.message)
+        if args.plan_out:
+            try:
+                args.plan_out.write_text(plan.to_json(result.value))
+            except OSError as e:
+                return errors.ErrorResult(
+                    f"could not write plan '{args.plan_out}': {e}"
+                )
+            logger.info(f"wrote plan to '{args.plan_out}'")
+        if not args.dry:
+            return errors.GoodResult()
+        for line in result.value.describe():
+            print(line)
+        return __print_estimate(library, result.value, max_rate)
+    result = library.install(
+        game_id=args.game_id,
+        game_name=args.game_name,
+        mod_ids=args.mod_ids,
+        categories=args.categories,
+        max_rate=max_rate,
+        low_priority=low_priority,
+        link=link,
+    )
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
+    return errors.GoodResult()
@@ -2,16 +2,40 @@
 """
 
 import argparse
+import dataclasses
 import logging
 import sqlite3
 import uuid
+from typing import Optional
 
 from unverdad import config, errors
-from unverdad.data import builders, database, tables
+from unverdad.data import builders, database, schema, tables
 
 logger = logging.getLogger(__name__)
 
 
+FIELDS = [x.name for x in dataclasses.fields(tables.mod.ModEntity)]
+SORT_KEYS = ["name", "mod_id"]
+"""Unique columns, so a key identifies a position in the listing."""
+
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return value
+
+
+def _fields(text: str) -> list[str]:
+    fields = [x.strip() for x in text.split(",") if x.strip()]
+    unknown = [x for x in fields if x not in FIELDS]
+    if unknown or not fields:
+        raise argparse.ArgumentTypeError(
+            f"unknown fields {unknown}; choose from {",".join(FIELDS)}"
+        )
+    return fields
+
+
 def attach(subparsers):
     parser = subparsers.add_parser(
         "mod-registry",
@@ -56,26 +80,79 @@ def attach(subparsers):
         dest="mod_names",
         default=[],
     )
+    parser.add_argument(
+        "--category",
+        "-c",
+        help="Only include mods in CATEGORY or any of its descendants",
+        action="append",
+        dest="categories",
+        default=[],
+    )
+    page_opt = parser.add_argument_group(
+        title="listing",
+        description="page through the listed mods. "
+        "these do not limit which mods --enable or --disable change.",
+    )
+    page_opt.add_argument(
+        "--sort",
+        help="order mods by KEY. default is name",
+        choices=SORT_KEYS,
+        default="name",
+        metavar="KEY",
+    )
+    page_opt.add_argument(
+        "--after",
+        help="only list mods whose sort key comes after KEY, "
+        "such as the last one listed by a previous --limit",
+        metavar="KEY",
+    )
+    page_opt.add_argument(
+        "--limit",
+        help="list at most N mods",
+        type=_positive_int,
+        metavar="N",
+    )
+    page_opt.add_argument(
+        "--fields",
+        help=f"comma separated columns to print, one mod per line. "
+        f"any of {",".join(FIELDS)}",
+        type=_fields,
+    )
     return parser
 
 
 def __on_show(
-    con,
+    con: sqlite3.Connection,
     cond: builders.ConditionBuilder,
+    sort: str,
+    fields: Optional[list[str]],
+    limit: Optional[int],
 ):
-    """"""
-    data = []
-    with con:
-        sql_clause = cond.render()
-        params = cond.params()
-        if sql_clause:
-            sql_clause = f"WHERE {sql_clause}"
-        for mod_row in con.execute(f"SELECT * FROM mod {sql_clause}", params):
-            s = "\n".join([f"| {key} = {mod_row[key]}" for key in mod_row.keys()])
-            s = f"{mod_row["name"]}\n{s}"
-            data.append(s)
-    msg = "\n\n".join(data)
-    logger.info(f"{msg}")
+    """Print matching mods ordered by `sort` as they are read."""
+    columns = ", ".join(dict.fromkeys(["name", sort, *(fields or FIELDS)]))
+    sql_statement = f"SELECT {columns} FROM mod"
+    if sql_clause := cond.render():
+        sql_statement += f" WHERE {sql_clause}"
+    sql_statement += f" ORDER BY {sort}"
+    params = dict(cond.params())
+    if limit is not None:
+        sql_statement += " LIMIT :limit"
+        params["limit"] = limit
+    logger.debug(f"{sql_statement=!s}")
+    if fields:
+        print("\t".join(fields))
+    count = 0
+    last = None
+    for row in con.execute(sql_statement, params):
+        if fields:
+            print("\t".join(str(row[x]) for x in fields))
+        else:
+            s = "\n".join([f"| {x} = {row[x]}" for x in FIELDS])
+            print(f"{"\n" if count else ""}{row["name"]}\n{s}")
+        count += 1
+        last = row[sort]
+    if limit is not None and count == limit:
+        logger.info(f"listed {count} mods; continue with --after '{last}'")
 
 
 def __on_set(
@@ -101,14 +178,25 @@ def hook(args) -> errors.Result[None]:
         or_conds._add_param(column_name="mod_id", column_value=mod_id)
     for mod_name in args.mod_names:
         or_conds._add_param(column_name="name", column_value=mod_name)
+    category_conds = conditions.add_subfilter(
+        combine_operator=builders.LogicalOperator.OR
+    )
+    for category in args.categories:
+        category_conds._add_param_expr(
+            column_name="mod_id",
+            expression=tables.category_closure.MOD_FILTER_EXPR,
+            param_value=category,
+        )
     con = database.get_db()
     if args.game_id:
         and_conds._add_param(column_name="game_id", column_value=args.game_id)
     elif args.game_name:
-        for game_row in con.execute(
-            "SELECT * FROM game WHERE name = :name", {"name": args.game_name}
+        for game_entity in schema.select_as(
+            con,
+            tables.game.GameEntity,
+            "SELECT * FROM game WHERE name = :name",
+            {"name": args.game_name},
         ):
-            game_entity = tables.game.GameEntity(**game_row)
             and_conds._add_param(
                 column_name="game_id", column_value=game_entity.game_id
             )
@@ -124,8 +212,23 @@ def hook(args) -> errors.Result[None]:
             cond=conditions,
             enabled=enable,
         )
+    if args.after is not None:
+        after = args.after
+        if args.sort == "mod_id":
+            try:
+                after = uuid.UUID(args.after)
+            except ValueError:
+                args.subparser.error(f"--after '{args.after}' is not a mod id")
+        and_conds._add_param(
+            column_name=args.sort,
+            column_value=after,
+            operator=builders.CompareOperator.MORE_THAN,
+        )
     __on_show(
         con=con,
         cond=conditions,
+        sort=args.sort,
+        fields=args.fields,
+        limit=args.limit,
     )
     return errors.GoodResult()
@@ -0,0 +1,328 @@
+"""Named mod profiles.
+
+Each profile has a prebuilt install tree of links under
+`unverdad.config.PROFILES_HOME`. Switching to a profile atomically replaces the
+game's mods directory with a symlink to that tree, so no mod files are copied.
+"""
+
+import argparse
+import logging
+import os
+import pathlib
+import shutil
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad import config, errors, locks
+from unverdad.data import builders, database, schema, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "profile",
+        help="manage and switch between named sets of mods",
+        description="manage named sets of mods. without an action, list the profiles of a game.",
+    )
+    game_opt = parser.add_argument_group(
+        title="game",
+        description="choose the game of the profile, "
+        "required if default_game is not enabled.",
+    )
+    game_opt = game_opt.add_mutually_exclusive_group()
+    game_opt.add_argument(
+        "--game-id",
+        help="internal id of the game",
+        type=uuid.UUID,
+    )
+    game_opt.add_argument(
+        "--game-name",
+        help="name of the game",
+    )
+    parser.add_argument(
+        "name",
+        help="name of the profile",
+        nargs="?",
+    )
+    action_opt = parser.add_argument_group(title="actions")
+    action_opt = action_opt.add_mutually_exclusive_group()
+    for flag, help in [
+        ("--create", "create profile NAME containing the selected mods"),
+        ("--delete", "delete profile NAME and its install tree"),
+        ("--add", "add the selected mods to profile NAME"),
+        ("--remove", "remove the selected mods from profile NAME"),
+        ("--build", "rebuild the install tree of profile NAME"),
+        ("--switch", "install profile NAME, building it first if necessary"),
+    ]:
+        action_opt.add_argument(
+            flag,
+            help=help,
+            action="store_const",
+            const=flag.removeprefix("--"),
+            dest="action",
+        )
+    mod_opt = parser.add_argument_group(title="mod selection")
+    mod_opt.add_argument(
+        "--mod-id",
+        "-m",
+        help="select MOD_ID",
+        action="append",
+        dest="mod_ids",
+        default=[],
+        type=uuid.UUID,
+    )
+    mod_opt.add_argument(
+        "--mod-name",
+        "-n",
+        help="select NAME of mod",
+        action="append",
+        dest="mod_names",
+        default=[],
+    )
+    mod_opt.add_argument(
+        "--enabled",
+        help="select every currently enabled mod",
+        action="store_true",
+    )
+    return parser
+
+
+def __find_game(
+    con: sqlite3.Connection,
+    game_id: Optional[uuid.UUID] = None,
+    game_name: Optional[str] = None,
+) -> tables.game.GameEntity | str:
+    sql_statement = "SELECT * FROM game WHERE "
+    if game_id:
+        sql_statement += "game_id = :game"
+    elif game_name or config.SETTINGS.default_game.enabled:
+        sql_statement += "match_name(name, :game)"
+    else:
+        return "specify a game or enable default_game"
+    game = next(
+        schema.select_as(
+            con,
+            tables.game.GameEntity,
+            sql_statement,
+            {"game": game_id or game_name or config.SETTINGS.default_game.name},
+        ),
+        None,
+    )
+    if game is None:
+        return "no game found"
+    if game.game_path is None:
+        return "game path needs to be set"
+    return game
+
+
+def _mods_dir(game: tables.game.GameEntity) -> pathlib.Path:
+    """Directory the game loads mods from; it is not resolved, so it may be a symlink."""
+    assert game.game_path is not None
+    mods_dir = game.game_path / game.game_path_offset / game.mods_home_relative_path
+    mods_dir = mods_dir.expanduser()
+    return mods_dir.parent.resolve() / mods_dir.name
+
+
+def __is_active(game: tables.game.GameEntity, profile: tables.profile.ProfileEntity):
+    mods_dir = _mods_dir(game)
+    return (
+        profile.build_path is not None
+        and mods_dir.is_symlink()
+        and mods_dir.readlink() == profile.build_path
+    )
+
+
+def __selected_mods(
+    con: sqlite3.Connection, game_id: uuid.UUID, args
+) -> list[uuid.UUID]:
+    conditions = builders.ConditionBuilderBranch(
+        combine_operator=builders.LogicalOperator.AND,
+    )
+    and_conds = conditions.add_subfilter(combine_operator=builders.LogicalOperator.AND)
+    and_conds._add_param(column_name="game_id", column_value=game_id)
+    or_conds = conditions.add_subfilter(combine_operator=builders.LogicalOperator.OR)
+    for mod_id in args.mod_ids:
+        or_conds._add_param(column_name="mod_id", column_value=mod_id)
+    for mod_name in args.mod_names:
+        or_conds._add_param(column_name="name", column_value=mod_name)
+    if args.enabled:
+        or_conds._add_param(column_name="enabled", column_value=True)
+    if or_conds.is_empty():
+        return []
+    sql_statement = f"SELECT mod_id FROM mod WHERE {conditions.render()}"
+    return [row["mod_id"] for row in con.execute(sql_statement, conditions.params())]
+
+
+def __link(src: pathlib.Path, dst: pathlib.Path) -> None:
+    """Hard link `dst` to `src`; fallback to a symlink across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        os.symlink(src, dst)
+
+
+def __swap(mods_dir: pathlib.Path, tree: pathlib.Path) -> Optional[str]:
+    """Atomically point `mods_dir` at `tree`.
+
+    A temporary symlink is created next to `mods_dir` and renamed over it, so the
+    game never sees a missing or partially populated mods directory.
+    """
+    if mods_dir.exists() and not mods_dir.is_symlink():
+        return f"'{mods_dir}' is not managed by a profile; uninstall its mods first"
+    mods_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp = mods_dir.with_name(f".{mods_dir.name}.{schema.new_uuid().hex}")
+    os.symlink(tree, tmp, target_is_directory=True)
+    os.replace(tmp, mods_dir)
+    logger.info(f"'{mods_dir}' -> '{tree}'")
+
+
+def __build(
+    con: sqlite3.Connection,
+    game: tables.game.GameEntity,
+    profile: tables.profile.ProfileEntity,
+) -> errors.Result[pathlib.Path]:
+    """Create a new install tree for `profile` and retire the previous one."""
+    tree = config.PROFILES_HOME / game.name / f"{profile.name}.{schema.new_uuid().hex}"
+    tree.mkdir(parents=True)
+    sql_statement = """
+        SELECT m_mod.mod_name, m_pak.pak_path, m_pak.sig_path
+        FROM profile_mod
+        INNER JOIN m_mod USING (mod_id)
+        INNER JOIN m_pak USING (mod_id)
+        WHERE profile_mod.profile_id = ?
+    """
+    count = 0
+    for row in con.execute(sql_statement, [profile.profile_id]):
+        mod_dir = tree / row["mod_name"]
+        mod_dir.mkdir(exist_ok=True)
+        for file in [row["pak_path"], row["sig_path"]]:
+            src = (config.SETTINGS.mods_home / file).expanduser().resolve()
+            if not src.is_file():
+                shutil.rmtree(tree)
+                return errors.ErrorResult(f"'{src}' is not a valid file")
+            __link(src, mod_dir / src.name)
+            count += 1
+    was_active = __is_active(game, profile)
+    old_tree = profile.build_path
+    with con:
+        con.execute(
+            "UPDATE profile SET build_path = ? WHERE profile_id = ?",
+            [tree, profile.profile_id],
+        )
+    if was_active:
+        __swap(_mods_dir(game), tree)
+    if old_tree is not None and old_tree.is_dir():
+        shutil.rmtree(old_tree)
+    logger.info(f"built profile '{profile.name}' ({count} links)")
+    return errors.GoodResult(tree)
+
+
+def __on_list(con: sqlite3.Connection, game: tables.game.GameEntity) -> None:
+    sql_statement = """
+        SELECT profile.*, COUNT(profile_mod.mod_id) AS mod_count
+        FROM profile
+        LEFT JOIN profile_mod USING (profile_id)
+        WHERE profile.game_id = ?
+        GROUP BY profile.profile_id
+        ORDER BY profile.name
+    """
+    for row in con.execute(sql_statement, [game.game_id]):
+        profile = tables.profile.ProfileEntity(
+            profile_id=row["profile_id"],
+            game_id=row["game_id"],
+            name=row["name"],
+            build_path=row["build_path"],
+        )
+        active = "*" if __is_active(game, profile) else " "
+        print(f"{active} {profile.name} ({row["mod_count"]} mods)")
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    match __find_game(con=con, game_id=args.game_id, game_name=args.game_name):
+        case str(msg):
+            return errors.ErrorResult(msg)
+        case tables.game.GameEntity() as found:
+            game = found
+    if args.action is None:
+        __on_list(con=con, game=game)
+        return errors.GoodResult()
+    if args.name is None:
+        args.subparser.error(f"--{args.action} requires a profile NAME")
+    try:
+        with locks.game_lock(game.game_id, args.lock_timeout):
+            return __on_action(con=con, game=game, args=args)
+    except locks.LockTimeout as e:
+        return errors.ErrorResult(str(e))
+
+
+def __on_action(
+    con: sqlite3.Connection, game: tables.game.GameEntity, args
+) -> errors.Result[None]:
+    mod_ids = __selected_mods(con=con, game_id=game.game_id, args=args)
+    existing = next(
+        schema.select_as(
+            con,
+            tables.profile.ProfileEntity,
+            "SELECT * FROM profile WHERE game_id = ? AND name = ?",
+            [game.game_id, args.name],
+        ),
+        None,
+    )
+    if args.action == "create":
+        if existing is not None:
+            return errors.ErrorResult(f"profile '{args.name}' already exists")
+        profile = tables.profile.ProfileEntity(
+            profile_id=schema.new_uuid(),
+            game_id=game.game_id,
+            name=args.name,
+        )
+        with con:
+            tables.profile.insert_many(con, [profile])
+            tables.profile_mod.insert_many(
+                con,
+                [
+                    tables.profile_mod.ProfileModEntity(profile.profile_id, mod_id)
+                    for mod_id in mod_ids
+                ],
+            )
+        logger.info(f"created profile '{profile.name}' with {len(mod_ids)} mods")
+        return errors.GoodResult()
+    if existing is None:
+        return errors.ErrorResult(f"no profile named '{args.name}'")
+    profile = existing
+    entities = [
+        tables.profile_mod.ProfileModEntity(profile.profile_id, mod_id)
+        for mod_id in mod_ids
+    ]
+    match args.action:
+        case "delete":
+            if __is_active(game, profile):
+                return errors.ErrorResult(
+                    f"profile '{profile.name}' is installed; uninstall it first"
+                )
+            tables.profile.delete_many(con, [profile.profile_id])
+            if profile.build_path is not None and profile.build_path.is_dir():
+                shutil.rmtree(profile.build_path)
+            return errors.GoodResult()
+        case "add":
+            tables.profile_mod.insert_many(con, entities)
+        case "remove":
+            tables.profile_mod.delete_many(con, entities)
+        case "switch":
+            tree = profile.build_path
+            if tree is None or not tree.is_dir():
+                result = __build(con, game, profile)
+                if errors.is_error(result):
+                    return result
+                tree = result.value
+            if msg := __swap(_mods_dir(game), tree):
+                return errors.ErrorResult(msg)
+            return errors.GoodResult()
+    if profile.build_path is not None or args.action == "build":
+        result = __build(con, game, profile)
+        if errors.is_error(result):
+            return result
+    return errors.GoodResult()
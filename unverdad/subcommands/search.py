@@ -0,0 +1,61 @@
+"""Full-text search of imported mods.
+"""
+
+import argparse
+import logging
+import sqlite3
+
+from unverdad import errors
+from unverdad.data import database, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "search",
+        help="search mods by name, category, and description",
+        description="search mods by name, category (including parent categories), "
+        "and gamebanana description. every word must match the start of a word; "
+        "results are ordered by relevance.",
+    )
+    parser.add_argument(
+        "query",
+        help="words to search for",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--limit",
+        help="show at most N results. default is 20",
+        type=int,
+        default=20,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--fts",
+        help="pass QUERY to sqlite as FTS5 query syntax, such as 'sol OR ky'",
+        action="store_true",
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    if args.limit < 1:
+        args.subparser.error("--limit must be at least 1")
+    text = " ".join(args.query)
+    query = text if args.fts else tables.mod_fts.to_query(text)
+    con = database.get_db()
+    try:
+        rows = tables.mod_fts.search(con, query, limit=args.limit).fetchall()
+    except sqlite3.OperationalError as e:
+        return errors.ErrorResult(f"could not search for '{text}': {e}")
+    for row in rows:
+        enabled = "*" if row["enabled"] else " "
+        print(f"{enabled} {row["name"]}\t{row["mod_id"]}")
+        if row["categories"]:
+            print(f"    categories: {row["categories"]}")
+        if row["snippet"]:
+            print(f"    {row["snippet"]}")
+    if not rows:
+        logger.info(f"no mods match '{text}'")
+    return errors.GoodResult()
@@ -0,0 +1,38 @@
+"""Run as a daemon answering requests over a Unix domain socket.
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+
+from unverdad import config, daemon, errors
+from unverdad.data import database
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "serve",
+        help="keep a warm process to answer other calls",
+        description="serve JSON-RPC requests over a Unix domain socket. "
+        "while it is running, other invocations are forwarded to it.",
+    )
+    parser.add_argument(
+        "--socket",
+        help=f"path of the socket. default is '{config.SOCKET_FILE}'",
+        type=pathlib.Path,
+        default=config.SOCKET_FILE,
+    )
+    return parser
+
+
+def hook(args) -> errors.Result[None]:
+    path = args.socket.expanduser()
+    if daemon.is_running(path):
+        return errors.ErrorResult(f"already serving on '{path}'")
+    path.unlink(missing_ok=True)
+    database.get_db()
+    asyncio.run(daemon.Server(parser=args.parser, path=path).serve())
+    return errors.GoodResult()
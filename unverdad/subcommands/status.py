@@ -0,0 +1,192 @@
+"""Summarize mods and install state of each game.
+
+Counts come from table stats and install state from table install_manifest, so
+nothing on disk is read unless --deep is given.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import logging
+import os
+import pathlib
+import sqlite3
+import uuid
+from typing import Optional
+
+from unverdad import api, errors, transfer
+from unverdad.data import database, schema, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "status",
+        help="summarize mods and what is installed",
+        description="show the number of mods and paks of each game, how many are "
+        "enabled, and what the last install placed in the game directory.",
+    )
+    game_opt = parser.add_argument_group(
+        title="game",
+        description="only show one game. default is every game.",
+    )
+    game_opt = game_opt.add_mutually_exclusive_group()
+    game_opt.add_argument(
+        "--game-id",
+        help="internal id of the game",
+        type=uuid.UUID,
+    )
+    game_opt.add_argument(
+        "--game-name",
+        help="name of the game",
+    )
+    parser.add_argument(
+        "--deep",
+        help="stat every installed file and walk the mods directory to find files "
+        "which were changed, removed, or added since they were installed",
+        action="store_true",
+    )
+    return parser
+
+
+def __mods_dir(game: tables.game.GameEntity) -> Optional[pathlib.Path]:
+    if game.game_path is None:
+        return None
+    mods_dir = game.game_path / game.game_path_offset / game.mods_home_relative_path
+    return mods_dir.expanduser()
+
+
+def __stat(path: pathlib.Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def __deep(
+    con: sqlite3.Connection,
+    game: tables.game.GameEntity,
+    mods_dir: pathlib.Path,
+) -> int:
+    """Print installed files which drifted from the manifest; return their count."""
+    manifest = list(
+        schema.select_as(
+            con,
+            tables.install_manifest.InstallManifestEntity,
+            "SELECT * FROM install_manifest WHERE game_id = ?",
+            [game.game_id],
+        )
+    )
+    with concurrent.futures.ThreadPoolExecutor(transfer.DEFAULT_WORKERS) as pool:
+        stats = pool.map(__stat, [x.path for x in manifest])
+        drift = 0
+        for entry, stat in zip(manifest, stats):
+            if stat is None:
+                print(f"  missing: {entry.path}")
+            elif stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+                print(f"  changed: {entry.path}")
+            else:
+                continue
+            drift += 1
+    if mods_dir.is_symlink():
+        return drift
+    known = {x.path for x in manifest}
+    for dir, _, files in os.walk(mods_dir.resolve()):
+        for file in files:
+            path = pathlib.Path(dir, file)
+            if path not in known:
+                print(f"  untracked: {path}")
+                drift += 1
+    return drift
+
+
+def __print_status(
+    con: sqlite3.Connection,
+    game: tables.game.GameEntity,
+    deep: bool,
+) -> int:
+    """Print the status of `game`; return the number of drifted files found."""
+    stats = next(
+        schema.select_as(
+            con,
+            tables.stats.StatsEntity,
+            "SELECT * FROM stats WHERE game_id = ?",
+            [game.game_id],
+        )
+    )
+    print(game.name)
+    print(f"  mods: {stats.mods} ({stats.enabled_mods} enabled)")
+    print(f"  paks: {stats.paks} ({stats.enabled_paks} enabled)")
+    mods_dir = __mods_dir(game)
+    if mods_dir is None:
+        print("  game path is not set")
+        return 0
+    if mods_dir.is_symlink():
+        print(f"  profile installed: {os.readlink(mods_dir)}")
+    if stats.installed_files:
+        last = con.execute(
+            "SELECT MAX(installed_at) FROM install_manifest WHERE game_id = ?",
+            [game.game_id],
+        ).fetchone()[0]
+        last = datetime.datetime.fromtimestamp(last).isoformat(" ", "seconds")
+        print(
+            f"  installed: {stats.installed_files} files, "
+            f"{transfer.format_size(stats.installed_bytes)}, last at {last}"
+        )
+        pending, stale = con.execute(
+            """
+            SELECT
+                (
+                    SELECT COUNT(*) FROM m_pak INNER JOIN m_mod USING (mod_id)
+                    WHERE m_mod.game_id = :game_id AND m_pak.enabled AND NOT EXISTS (
+                        SELECT 1 FROM install_manifest
+                        WHERE install_manifest.pak_id = m_pak.pak_id
+                    )
+                ),
+                (
+                    SELECT COUNT(*) FROM install_manifest
+                    LEFT JOIN m_pak USING (pak_id)
+                    WHERE install_manifest.game_id = :game_id
+                        AND NOT IFNULL(m_pak.enabled, 0)
+                )
+            """,
+            {"game_id": game.game_id},
+        ).fetchone()
+        if pending:
+            print(f"  {pending} enabled paks are not installed")
+        if stale:
+            print(f"  {stale} installed files belong to disabled or deleted mods")
+        if not pending and not stale:
+            print("  installed mods match enabled mods")
+    elif not mods_dir.is_symlink():
+        print("  installed: nothing")
+    if not deep:
+        return 0
+    drift = __deep(con, game, mods_dir)
+    if not drift:
+        print("  no drift found on disk")
+    return drift
+
+
+def hook(args) -> errors.Result[None]:
+    con = database.get_db()
+    if args.game_id or args.game_name:
+        result = api.Library(con=con).find_game(
+            game_id=args.game_id, game_name=args.game_name
+        )
+        if errors.is_error(result):
+            return errors.ErrorResult(result.message)
+        games = [result.value]
+    else:
+        games = list(
+            schema.select_as(
+                con, tables.game.GameEntity, "SELECT * FROM game ORDER BY name"
+            )
+        )
+    drift = 0
+    for game in games:
+        drift += __print_status(con, game, deep=args.deep)
+    if drift:
+        return errors.ErrorResult(f"{drift} installed files differ from the manifest")
+    return errors.GoodResult()
@@ -0,0 +1,136 @@
+"""Fetch metadata of mods from GameBanana.
+"""
+
+import argparse
+import dataclasses
+import logging
+import time
+import uuid
+
+from unverdad import config, errors, gamebanana
+from unverdad.data import database, tables
+
+logger = logging.getLogger(__name__)
+
+
+def attach(subparsers) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(
+        "sync-metadata",
+        help="fetch mod metadata from gamebanana",
+        description="fetch metadata of every mod with a gamebanana id. "
+        "entries which have not changed since the last sync are skipped.",
+    )
+    parser.add_argument(
+        "--mod-id",
+        "-m",
+        help="only sync MOD_ID",
+        action="append",
+        dest="mod_ids",
+        default=[],
+        type=uuid.UUID,
+    )
+    parser.add_argument(
+        "--base-url",
+        help="root url of the api. default is gamebanana.base_url from the config.",
+    )
+    parser.add_argument(
+        "--connections",
+        help=f"number of concurrent connections. default is {gamebanana.DEFAULT_CONNECTIONS}",
+        type=int,
+        default=gamebanana.DEFAULT_CONNECTIONS,
+    )
+    parser.add_argument(
+        "--force",
+        help="fetch every entry, even if it has not changed",
+        action="store_true",
+    )
+    return parser
+
+
+def __game_id(data: dict) -> str | None:
+    game = data.get("_aGame")
+    if isinstance(game, dict) and game.get("_idRow") is not None:
+        return str(game["_idRow"])
+    return None
+
+
+def hook(args) -> errors.Result[None]:
+    if args.connections < 1:
+        args.subparser.error("--connections must be at least 1")
+    con = database.get_db()
+    sql_statement = """
+        SELECT
+            mod.mod_id,
+            mod.game_id,
+            mod.gb_mod_id,
+            gb_metadata.gb_mod_id AS fetched_gb_mod_id,
+            gb_metadata.etag,
+            gb_metadata.last_modified
+        FROM mod
+        LEFT JOIN gb_metadata USING (mod_id)
+        WHERE mod.gb_mod_id IS NOT NULL
+    """
+    requests = []
+    game_ids = {}
+    for row in con.execute(sql_statement):
+        if args.mod_ids and row["mod_id"] not in args.mod_ids:
+            continue
+        validators = not args.force and row["fetched_gb_mod_id"] == row["gb_mod_id"]
+        requests.append(
+            gamebanana.ModRequest(
+                key=row["mod_id"],
+                gb_mod_id=str(row["gb_mod_id"]),
+                etag=row["etag"] if validators else None,
+                last_modified=row["last_modified"] if validators else None,
+            )
+        )
+        game_ids[row["mod_id"]] = row["game_id"]
+    if not requests:
+        return errors.ErrorResult("no mods have a gamebanana id")
+    counts = {"updated": 0, "unchanged": 0, "failed": 0}
+    try:
+        responses = gamebanana.fetch_mods(
+            requests,
+            base_url=args.base_url or config.SETTINGS.gamebanana.base_url,
+            connections=args.connections,
+        )
+        for response in responses:
+            entity = tables.gb_metadata.GbMetadataEntity(
+                mod_id=response.request.key,
+                gb_mod_id=response.request.gb_mod_id,
+                status=response.status,
+                fetched_at=time.time(),
+            )
+            if response.data is None:
+                if response.error:
+                    counts["failed"] += 1
+                    logger.warning("mod %s: %s", entity.gb_mod_id, response.error)
+                else:
+                    counts["unchanged"] += 1
+                tables.gb_metadata.touch_many(con, [entity])
+                continue
+            counts["updated"] += 1
+            entity = dataclasses.replace(
+                entity,
+                name=response.data.get("_sName"),
+                description=response.data.get("_sDescription"),
+                body=response.text,
+                etag=response.etag,
+                last_modified=response.last_modified,
+            )
+            with con:
+                tables.gb_metadata.upsert_many(con, [entity])
+                if gb_game_id := __game_id(response.data):
+                    con.execute(
+                        """
+                        UPDATE game SET gb_game_id = ?
+                        WHERE game_id = ? AND gb_game_id IS NULL
+                        """,
+                        [gb_game_id, game_ids[entity.mod_id]],
+                    )
+    except ValueError as e:
+        return errors.ErrorResult(str(e))
+    logger.info(", ".join(f"{count} {key}" for key, count in counts.items()))
+    if counts["failed"]:
+        return errors.ErrorResult(f"{counts['failed']} of {len(requests)} mods failed")
+    return errors.GoodResult()
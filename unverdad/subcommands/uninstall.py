@@ -1,11 +1,9 @@
 import argparse
 import logging
 import pathlib
-import subprocess
 import uuid
 
-from unverdad import config, errors
-from unverdad.data import database, tables
+from unverdad import api, errors, plan
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +19,12 @@ def attach(subparsers) -> argparse.ArgumentParser:
         help="do not perform any actions; print what would be done instead",
         action="store_true",
     )
+    parser.add_argument(
+        "--plan-out",
+        help="write the plan to FILE for the apply subcommand instead of running it",
+        type=pathlib.Path,
+        metavar="FILE",
+    )
     game_opt = parser.add_argument_group(
         title="game",
         description="choose the game in which to uninstall the mods",
@@ -38,43 +42,24 @@ def attach(subparsers) -> argparse.ArgumentParser:
     return parser
 
 
-def __remove_dir(dir: pathlib.Path, dry: bool = False):
-    cmd = ["rm", "--verbose", "--recursive", dir]
-    if dry:
-        print(*cmd)
-        return
-    if not dir.is_dir():
-        return logger.warning(
-            f"tried to recursively remove '{dir}' but is not a directory."
-        )
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-    )
-    logger.debug(result.stdout)
-    result.check_returncode()
-
-
 def hook(args) -> errors.Result[None]:
-    sql_statement = """SELECT * FROM game WHERE """
-    param = {}
-    if args.game_id:
-        sql_statement += "game_id = :game_id"
-        param["game_id"] = args.game_id
-    elif args.game_name or config.SETTINGS.default_game.enabled:
-        sql_statement += "match_name(name, :game_name)"
-        param["game_name"] = args.game_name or config.SETTINGS.default_game.name
-    else:
-        args.subparser.error("specify a game or enable default_game")
-    con = database.get_db()
-    game_row = con.execute(sql_statement, param).fetchone()
-    if game_row is None:
-        return errors.ErrorResult("no game found")
-    game = tables.game.GameEntity(**game_row)
-    if game.game_path is None:
-        return errors.ErrorResult("game path needs to be set")
-    mods_home = game.game_path / game.game_path_offset / game.mods_home_relative_path
-    mods_home = mods_home.expanduser().resolve()
-    __remove_dir(mods_home, dry=args.dry)
+    library = api.Library(lock_timeout=args.lock_timeout)
+    result = library.plan_uninstall(game_id=args.game_id, game_name=args.game_name)
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
+    uninstall_plan = result.value
+    if args.dry:
+        for line in uninstall_plan.describe():
+            print(line)
+    if args.plan_out:
+        try:
+            args.plan_out.write_text(plan.to_json(uninstall_plan))
+        except OSError as e:
+            return errors.ErrorResult(f"could not write plan '{args.plan_out}': {e}")
+        logger.info(f"wrote plan to '{args.plan_out}'")
+    if args.dry or args.plan_out:
+        return errors.GoodResult()
+    result = library.apply_plan(uninstall_plan)
+    if errors.is_error(result):
+        return errors.ErrorResult(result.message)
     return errors.GoodResult()
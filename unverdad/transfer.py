@@ -0,0 +1,176 @@
+"""Copy files in-process with optional throttling.
+
+Files are copied by a small pool of threads sharing one `TokenBucket`, so the
+combined rate of every worker stays under the configured limit.
+"""
+
+import concurrent.futures
+import logging
+import os
+import pathlib
+import re
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE: int = 1 << 20
+"""Bytes copied per system call, and the granularity of throttling."""
+FADVISE_WINDOW: int = 16 << 20
+"""Bytes written between flushes in low priority mode."""
+DEFAULT_WORKERS: int = min(4, os.cpu_count() or 1)
+
+__UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count with an optional binary unit suffix.
+
+    >>> parse_size("200M")
+    209715200
+    >>> parse_size("1.5k")
+    1536
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", text, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"'{text}' is not a size such as '512K', '200M', or '2G'")
+    return int(float(match[1]) * __UNITS[match[2].upper()])
+
+
+def format_size(size: int) -> str:
+    """Inverse of `parse_size()`, rounded to one decimal place.
+
+    >>> format_size(209715200)
+    '200.0M'
+    """
+    for unit in ["T", "G", "M", "K"]:
+        if size >= __UNITS[unit]:
+            return f"{size / __UNITS[unit]:.1f}{unit}"
+    return f"{size}B"
+
+
+class TokenBucket:
+    """Thread-safe token bucket where each token is one byte.
+
+    Consumers may overdraw the bucket; they then sleep until the debt is repaid,
+    which keeps the long term rate at `rate` no matter how many threads share it.
+    """
+
+    def __init__(self, rate: int, capacity: Optional[int] = None):
+        """
+        Args:
+            rate: Bytes per second; must be positive.
+            capacity: Maximum burst in bytes. Default is one second worth of `rate`.
+        """
+        if rate <= 0:
+            raise ValueError(f"{rate=} must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(rate, CHUNK_SIZE)
+        self.__tokens: float = self.capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """Take `amount` tokens, blocking while the bucket is in debt."""
+        with self.__lock:
+            now = time.monotonic()
+            elapsed = now - self.__updated
+            self.__tokens = min(self.capacity, self.__tokens + elapsed * self.rate)
+            self.__updated = now
+            self.__tokens -= amount
+            wait = -self.__tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+def __drop_cache(fd: int, offset: int, length: int) -> None:
+    """Advise the kernel to evict a range from the page cache, where supported."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+
+def copy_file(
+    src: pathlib.Path,
+    dst: pathlib.Path,
+    limiter: Optional[TokenBucket] = None,
+    low_priority: bool = False,
+) -> int:
+    """Copy `src` to `dst` unless `dst` already exists, like `cp -n`.
+
+    Args:
+        limiter: Throttle shared with other copies, if any.
+        low_priority:
+            Evict copied data from the page cache as it goes, so bulk copies do not
+            push out pages other programs are using.
+
+    Returns:
+        Number of bytes copied, which is 0 when `dst` exists.
+    """
+    try:
+        fdst = open(dst, "xb")
+    except FileExistsError:
+        logger.debug("'%s' exists; skipped", dst)
+        return 0
+    try:
+        with fdst, open(src, "rb") as fsrc:
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            size = os.fstat(in_fd).st_size
+            offset = flushed = 0
+            while offset < size:
+                count = min(CHUNK_SIZE, size - offset)
+                if limiter is not None:
+                    limiter.consume(count)
+                sent = os.sendfile(out_fd, in_fd, offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                if low_priority and (
+                    offset - flushed >= FADVISE_WINDOW or offset >= size
+                ):
+                    os.fdatasync(out_fd)
+                    __drop_cache(in_fd, flushed, offset - flushed)
+                    __drop_cache(out_fd, flushed, offset - flushed)
+                    flushed = offset
+    except BaseException:
+        dst.unlink(missing_ok=True)
+        raise
+    return offset
+
+
+def copy_files(
+    jobs: list[tuple[pathlib.Path, pathlib.Path]],
+    limiter: Optional[TokenBucket] = None,
+    low_priority: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    done: Optional[list[int]] = None,
+) -> int:
+    """Copy each `(src, dst)` pair of `jobs` in parallel using `copy_file()`.
+
+    Args:
+        done: Receives the index in `jobs` of each pair whose `dst` is in place,
+            also when another copy fails.
+
+    Returns:
+        Total number of bytes copied.
+
+    Raises:
+        OSError: The first error raised by any copy, after the rest have finished.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(copy_file, src, dst, limiter, low_priority) for src, dst in jobs
+        ]
+    copied = 0
+    error: Optional[OSError] = None
+    for index, future in enumerate(futures):
+        try:
+            copied += future.result()
+        except OSError as e:
+            error = error or e
+            continue
+        if done is not None:
+            done.append(index)
+    if error is not None:
+        raise error
+    return copied